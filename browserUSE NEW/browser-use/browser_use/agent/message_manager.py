@@ -0,0 +1,252 @@
+"""
+Conversation history of an agent, kept within a token budget.
+
+The system prompt and the task are pinned. Model outputs and action results of the steps are
+kept as long as they fit, once they don't the oldest steps are replaced by a one line summary
+each. Stack traces are never sent to the model, they are in the logs.
+
+Messages are ordered from the most to the least stable (system prompt, task, summary, recent
+steps, current state), so providers can serve the common prefix from their prompt cache. OpenAI
+does that on its own, Anthropic needs cache_control breakpoints which are set with
+cache_control=True. Steps are summarized in batches and the summary is only appended to, so
+the history is the same prefix from one step to the next until the next batch.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 800  # a downscaled screenshot, roughly
+SUMMARY_RESULT_CHARS = 100
+# once the recent steps don't fit, the oldest are summarized until they fill this much of
+# the budget, which leaves room for many steps until the summary has to change again
+COMPACT_TO = 0.5
+
+_STACK_TRACE = re.compile(
+	r'\n?(Stacktrace:\n)?Traceback \(most recent call last\):\n.*', flags=re.DOTALL
+)
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+	"""Rough token count, good enough to stay under a budget without calling a tokenizer"""
+	if isinstance(message.content, str):
+		return len(message.content) // CHARS_PER_TOKEN + 4
+
+	tokens = 4
+	for item in message.content:
+		if isinstance(item, dict) and item.get('type') == 'image_url':
+			tokens += IMAGE_TOKENS
+		elif isinstance(item, dict):
+			tokens += len(item.get('text', '')) // CHARS_PER_TOKEN
+		else:
+			tokens += len(str(item)) // CHARS_PER_TOKEN
+	return tokens
+
+
+def strip_stack_trace(text: str) -> str:
+	return _STACK_TRACE.sub('', text).rstrip()
+
+
+def with_cache_control(message: BaseMessage) -> BaseMessage:
+	"""Copy of a message with an Anthropic cache breakpoint after its content"""
+	if isinstance(message.content, str):
+		content = [{'type': 'text', 'text': message.content}]
+	else:
+		content = [dict(item) if isinstance(item, dict) else item for item in message.content]
+	for item in reversed(content):
+		if isinstance(item, dict) and item.get('type') == 'text':
+			item['cache_control'] = {'type': 'ephemeral'}
+			break
+	return message.model_copy(update={'content': content})
+
+
+def has_image(message: BaseMessage) -> bool:
+	return not isinstance(message.content, str) and any(
+		isinstance(item, dict) and item.get('type') == 'image_url' for item in message.content
+	)
+
+
+@dataclass
+class StepMessages:
+	step: int
+	messages: list[BaseMessage] = field(default_factory=list)
+	summary: str = ''
+	# the state message of the step, if it had a screenshot
+	screenshot: Optional[BaseMessage] = None
+
+	@property
+	def tokens(self) -> int:
+		return sum(estimate_tokens(message) for message in self.messages)
+
+
+@dataclass
+class MessageTokens:
+	"""Estimated input tokens of one LLM call"""
+
+	step: int
+	pinned: int
+	history: int
+	state: int
+	summarized_steps: int
+
+	@property
+	def total(self) -> int:
+		return self.pinned + self.history + self.state
+
+
+class MessageManager:
+	def __init__(
+		self,
+		system_message: SystemMessage,
+		max_input_tokens: int = 128000,
+		cache_control: bool = False,
+	):
+		"""
+		@param max_input_tokens: Budget for everything sent to the model in one call, the
+		current state message included.
+		@param cache_control: Mark the end of the system prompt, the task and the history as
+		Anthropic cache breakpoints.
+		"""
+		self.max_input_tokens = max_input_tokens
+		self.cache_control = cache_control
+		self.pinned: list[BaseMessage] = [system_message]
+		self.steps: list[StepMessages] = []
+		self.step_tokens: list[MessageTokens] = []
+		# steps before this index are only sent as their line in the summary
+		self.summarized = 0
+		self.summary_lines: list[str] = []
+		# step of the latest screenshot, sent again in its place while the page doesn't change
+		self.screenshot_step: Optional[StepMessages] = None
+
+	def add_task(self, task: str) -> None:
+		self.pinned.append(HumanMessage(content=f'Your task is: {task}'))
+
+	def _step(self, step: int) -> StepMessages:
+		if not self.steps or self.steps[-1].step != step:
+			self.steps.append(StepMessages(step=step))
+		return self.steps[-1]
+
+	def add_model_output(self, step: int, content: str) -> None:
+		entry = self._step(step)
+		entry.messages.append(AIMessage(content=content))
+		try:
+			action = json.loads(content).get('action', {})
+			entry.summary = ', '.join(action) if isinstance(action, dict) else ''
+		except (json.JSONDecodeError, AttributeError):
+			entry.summary = ''
+
+	def add_result(
+		self, step: int, extracted_content: Optional[str] = None, error: Optional[str] = None
+	) -> None:
+		entry = self._step(step)
+		for text in (extracted_content, error):
+			if text:
+				text = strip_stack_trace(text)
+				entry.messages.append(HumanMessage(content=text))
+				if len(text) > SUMMARY_RESULT_CHARS:
+					short = text[:SUMMARY_RESULT_CHARS] + '…'
+				else:
+					short = text
+				entry.summary += f' -> {short}'
+
+	@property
+	def messages(self) -> list[BaseMessage]:
+		"""The whole conversation without any trimming"""
+		return self.pinned + [message for entry in self.steps for message in entry.messages]
+
+	def _recent_tokens(self, shown: Optional[StepMessages] = None) -> int:
+		recent = self.steps[self.summarized :]
+		tokens = sum(entry.tokens for entry in recent)
+		if shown is not None and shown in recent:
+			tokens += estimate_tokens(shown.screenshot)
+		return tokens
+
+	def _summary_message(self) -> HumanMessage:
+		return HumanMessage(content='Summary of earlier steps:\n' + '\n'.join(self.summary_lines))
+
+	def get_messages(
+		self, state_message: BaseMessage, step: int, screenshot_unchanged: bool = False
+	) -> list[BaseMessage]:
+		"""
+		Pinned messages, the summary of older steps, the recent steps and the state message.
+
+		Once the recent steps don't fit into the budget anymore, the oldest of them are moved into
+		the summary (see COMPACT_TO).
+
+		@param screenshot_unchanged: The state message has no screenshot because the page looks
+		the same as in the latest one. That step's state message is then part of the history,
+		at the same place every step until the page changes, so it stays in the prompt cache.
+		"""
+		shown = self.screenshot_step if screenshot_unchanged else None
+		pinned_tokens = sum(estimate_tokens(message) for message in self.pinned)
+		state_tokens = estimate_tokens(state_message)
+		budget = self.max_input_tokens - pinned_tokens - state_tokens
+
+		summary_tokens = estimate_tokens(self._summary_message()) if self.summary_lines else 0
+		if summary_tokens + self._recent_tokens(shown) > budget:
+			while (
+				self.summarized < len(self.steps)
+				and self._recent_tokens(shown) > budget * COMPACT_TO
+			):
+				entry = self.steps[self.summarized]
+				self.summary_lines.append(f'Step {entry.step}: {entry.summary.strip(" ->")}')
+				self.summarized += 1
+
+		recent = self.steps[self.summarized :]
+		used = self._recent_tokens(shown)
+		history: list[BaseMessage] = []
+		if self.summary_lines:
+			summary = self._summary_message()
+			if used + estimate_tokens(summary) > budget:
+				# even the summary doesn't fit, drop its oldest lines (in a batch as well)
+				room = (budget - used) * COMPACT_TO
+				while self.summary_lines and estimate_tokens(summary) > room:
+					self.summary_lines.pop(0)
+					summary = self._summary_message()
+			if self.summary_lines:
+				history.append(summary)
+				used += estimate_tokens(summary)
+		for entry in recent:
+			if entry is shown:
+				history.append(entry.screenshot)
+			history.extend(entry.messages)
+		if shown is not None and shown not in recent:
+			# its step was summarized, the screenshot has to come along on its own
+			history.append(shown.screenshot)
+			used += estimate_tokens(shown.screenshot)
+
+		if has_image(state_message):
+			self.screenshot_step = self._step(step)
+			self.screenshot_step.screenshot = state_message
+
+		tokens = MessageTokens(
+			step=step,
+			pinned=pinned_tokens,
+			history=used,
+			state=state_tokens,
+			summarized_steps=self.summarized,
+		)
+		self.step_tokens.append(tokens)
+		logger.debug(
+			f'🔢 Input ~{tokens.total} tokens (pinned {tokens.pinned}, history {tokens.history}, '
+			f'state {tokens.state}, {tokens.summarized_steps} steps summarized)'
+		)
+
+		pinned = list(self.pinned)
+		if self.cache_control:
+			# Anthropic allows 4 breakpoints: the system prompt is shared by all tasks, the task
+			# by all steps, the summary by the steps until the next batch is summarized and the
+			# history up to now by the next step
+			pinned = [with_cache_control(message) for message in pinned]
+			if self.summary_lines:
+				history[0] = with_cache_control(history[0])
+			if history:
+				history[-1] = with_cache_control(history[-1])
+		return pinned + history + [state_message]
@@ -0,0 +1,61 @@
+"""
+Prices of LLMs for the cost accounting of agents.
+
+Models are looked up by the longest matching prefix of their name, so dated versions like
+'gpt-4o-2024-08-06' or 'claude-3-5-sonnet-20241022' get the price of their family. Prices change,
+register your own (or pass `pricing` to the Agent) for models missing here:
+
+	register_pricing('my-finetune', Pricing(uncached_input=1.0, output=2.0))
+"""
+
+import logging
+from typing import Any, Optional
+
+from browser_use.agent.views import Pricing
+
+logger = logging.getLogger(__name__)
+
+PRICING: dict[str, Pricing] = {
+	'gpt-4o-mini': Pricing(uncached_input=0.15, cached_input=0.075, output=0.60),
+	'gpt-4o': Pricing(uncached_input=2.50, cached_input=1.25, output=10.00),
+	'gpt-4-turbo': Pricing(uncached_input=10.00, output=30.00),
+	'o1-mini': Pricing(uncached_input=3.00, cached_input=1.50, output=12.00),
+	'o1': Pricing(uncached_input=15.00, cached_input=7.50, output=60.00),
+	'claude-3-5-sonnet': Pricing(
+		uncached_input=3.00, cached_input=0.30, cache_write=3.75, output=15.00
+	),
+	'claude-3-5-haiku': Pricing(
+		uncached_input=0.80, cached_input=0.08, cache_write=1.00, output=4.00
+	),
+	'claude-3-opus': Pricing(
+		uncached_input=15.00, cached_input=1.50, cache_write=18.75, output=75.00
+	),
+	'claude-3-haiku': Pricing(
+		uncached_input=0.25, cached_input=0.03, cache_write=0.30, output=1.25
+	),
+	'gemini-1.5-pro': Pricing(uncached_input=1.25, cached_input=0.3125, output=5.00),
+	'gemini-1.5-flash': Pricing(uncached_input=0.075, cached_input=0.01875, output=0.30),
+	'mistral-large': Pricing(uncached_input=2.00, output=6.00),
+}
+
+
+def register_pricing(model: str, pricing: Pricing) -> None:
+	"""Adds or replaces the price of a model (or of every model starting with this name)"""
+	PRICING[model] = pricing
+
+
+def model_name(llm: Any) -> Optional[str]:
+	return getattr(llm, 'model_name', None) or getattr(llm, 'model', None)
+
+
+def pricing_for(model: Optional[str]) -> Optional[Pricing]:
+	"""Price of a model, None if it's unknown"""
+	if not isinstance(model, str) or not model:
+		return None
+	# providers prefix some names, e.g. 'models/gemini-1.5-pro' or 'accounts/.../llama'
+	name = model.rsplit('/', 1)[-1]
+	matches = [prefix for prefix in PRICING if name.startswith(prefix)]
+	if not matches:
+		logger.debug(f'No pricing for model {model}, its cost is not tracked')
+		return None
+	return PRICING[max(matches, key=len)]
@@ -75,7 +75,8 @@ _[:] elements are just for more context, but not interactable.
 		Returns:
 		    str: Formatted system prompt
 		"""
-		time_str = self.current_date.strftime('%Y-%m-%d %H:%M')
+		# only the date, so the prompt stays the same for a whole day and providers can cache it
+		time_str = self.current_date.strftime('%Y-%m-%d')
 
 		AGENT_PROMPT = f"""
 You are an AI agent that helps users interact with websites. You receive a list of interactive elements from the current webpage and must respond with specific actions. Today's date is {time_str}.
@@ -111,6 +112,15 @@ Interactive elements:
 {self.state.dom_items_to_string()}
         """
 
+		if self.state.downloads:
+			downloads = '\n'.join(
+				f'- {d.suggested_filename}: {d.status} ({d.path})' for d in self.state.downloads
+			)
+			state_description += f'\nDownloads:\n{downloads}\n'
+
+		if self.state.screenshot_unchanged:
+			state_description += '\nThe page looks the same as in the latest screenshot above.'
+
 		if self.state.screenshot:
 			# Format message for vision model
 			return HumanMessage(
@@ -118,7 +128,9 @@ Interactive elements:
 					{'type': 'text', 'text': state_description},
 					{
 						'type': 'image_url',
-						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},
+						'image_url': {
+							'url': f'data:image/{self.state.screenshot_format};base64,{self.state.screenshot}'
+						},
 					},
 				]
 			)
@@ -0,0 +1,199 @@
+"""
+LLM rate limiting and token budgets shared by concurrently running agents.
+
+Agents get the RateLimiter of their provider and model from a process-wide registry by default
+(see `rate_limiter_for`), so they stay within the per-minute limits together, and when one of
+them is rate limited all of them back off instead of each hitting 429s on their own.
+"""
+
+import asyncio
+import logging
+import random
+import time
+import weakref
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 60  # limits are per minute
+
+
+class RateLimiter:
+	"""Sliding window limit on LLM requests and tokens per minute"""
+
+	def __init__(
+		self,
+		requests_per_minute: Optional[int] = None,
+		tokens_per_minute: Optional[int] = None,
+	):
+		self.requests_per_minute = requests_per_minute
+		self.tokens_per_minute = tokens_per_minute
+
+		self._requests: deque[float] = deque()
+		self._tokens: deque[tuple[float, int]] = deque()
+		self._tokens_in_window = 0
+		# callers are served in order, a waiting caller holds the lock while it sleeps. An
+		# asyncio.Lock belongs to one event loop, but shared limiters outlive loops (one
+		# asyncio.run per script or test), so there is one lock per loop.
+		self._locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+			weakref.WeakKeyDictionary()
+		)
+
+		# set after a 429, nobody sends requests until then
+		self._blocked_until = 0.0
+
+		self.total_requests = 0
+		self.total_wait = 0.0
+		self.rate_limit_errors = 0
+		self.throttled = 0.0  # seconds backed off after 429s
+
+	def _prune(self, now: float) -> None:
+		while self._requests and now - self._requests[0] >= WINDOW:
+			self._requests.popleft()
+		while self._tokens and now - self._tokens[0][0] >= WINDOW:
+			self._tokens_in_window -= self._tokens.popleft()[1]
+
+	def _delay(self, now: float) -> float:
+		"""Seconds until another request fits into the window"""
+		delay = max(self._blocked_until - now, 0.0)
+		if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+			delay = self._requests[0] + WINDOW - now
+		if self.tokens_per_minute and self._tokens_in_window >= self.tokens_per_minute:
+			# wait until enough of the oldest usage has left the window
+			excess = self._tokens_in_window - self.tokens_per_minute
+			for timestamp, tokens in self._tokens:
+				excess -= tokens
+				if excess < 0:
+					delay = max(delay, timestamp + WINDOW - now)
+					break
+		return delay
+
+	def _lock(self) -> asyncio.Lock:
+		loop = asyncio.get_running_loop()
+		if loop not in self._locks:
+			self._locks[loop] = asyncio.Lock()
+		return self._locks[loop]
+
+	async def acquire(self) -> float:
+		"""Waits until a request is allowed and counts it, returns the seconds waited"""
+		start = time.monotonic()
+		async with self._lock():
+			while True:
+				now = time.monotonic()
+				self._prune(now)
+				delay = self._delay(now)
+				if delay <= 0:
+					break
+				logger.debug(f'LLM rate limit reached, waiting {delay:.1f}s')
+				await asyncio.sleep(delay)
+
+			self._requests.append(time.monotonic())
+			self.total_requests += 1
+
+		waited = time.monotonic() - start
+		self.total_wait += waited
+		return waited
+
+	def block_for(self, seconds: float) -> None:
+		"""Holds back every request of every agent for a while, after the provider sent a 429"""
+		self.rate_limit_errors += 1
+		self.throttled += seconds
+		self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+	def stats(self) -> dict:
+		return {
+			'requests': self.total_requests,
+			'wait_s': round(self.total_wait, 2),
+			'rate_limit_errors': self.rate_limit_errors,
+			'throttled_s': round(self.throttled, 2),
+		}
+
+	def record_tokens(self, tokens: int) -> None:
+		"""Counts the tokens a request actually used"""
+		if tokens:
+			self._tokens.append((time.monotonic(), tokens))
+			self._tokens_in_window += tokens
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def model_key(llm: Any) -> str:
+	"""Provider and model of a chat model, e.g. 'ChatOpenAI:gpt-4o'"""
+	model = getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or 'default'
+	return f'{type(llm).__name__}:{model}'
+
+
+def rate_limiter_for(llm: Any) -> RateLimiter:
+	"""
+	The RateLimiter shared by all agents of this process that use the same provider and model.
+
+	It has no limits of its own, it only makes everyone back off together after a 429. Set its
+	limits explicitly, or pass agents a RateLimiter with limits instead.
+	"""
+	return _limiters.setdefault(model_key(llm), RateLimiter())
+
+
+def throttle_stats() -> dict[str, dict]:
+	"""Per model: requests, time waited for the limits and time throttled after 429s"""
+	return {key: limiter.stats() for key, limiter in _limiters.items()}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+	"""429 of any provider (openai, anthropic, mistral, ...), without importing their SDKs"""
+	if type(error).__name__ == 'RateLimitError':
+		return True
+	status = getattr(error, 'status_code', None) or getattr(
+		getattr(error, 'response', None), 'status_code', None
+	)
+	return status == 429
+
+
+def retry_after(error: Exception) -> Optional[float]:
+	"""Seconds from the Retry-After (or retry-after-ms) header of a 429 response, if any"""
+	headers = getattr(getattr(error, 'response', None), 'headers', None)
+	if not headers:
+		return None
+
+	try:
+		if headers.get('retry-after-ms'):
+			return float(headers['retry-after-ms']) / 1000
+		value = headers.get('retry-after')
+		if not value:
+			return None
+		try:
+			return float(value)
+		except ValueError:
+			return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+	except (TypeError, ValueError):
+		return None
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+	"""Exponential backoff with jitter: between half and the full base * 2^attempt"""
+	delay = min(base * 2**attempt, maximum)
+	return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBudget:
+	"""Total number of tokens a group of agents may use"""
+
+	def __init__(self, max_tokens: int):
+		self.max_tokens = max_tokens
+		self.used = 0
+
+	def record(self, tokens: int) -> None:
+		was_exhausted = self.exhausted
+		self.used += tokens
+		if self.exhausted and not was_exhausted:
+			logger.warning(f'Token budget of {self.max_tokens} tokens exhausted ({self.used} used)')
+
+	@property
+	def remaining(self) -> int:
+		return max(self.max_tokens - self.used, 0)
+
+	@property
+	def exhausted(self) -> bool:
+		return self.used >= self.max_tokens
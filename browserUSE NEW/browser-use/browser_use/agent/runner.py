@@ -0,0 +1,183 @@
+"""
+Runs a queue of agent tasks concurrently.
+
+A bounded number of workers take tasks from the queue, each task leases a browser from a pool
+for the duration of its run, and all agents share one LLM rate limiter and token budget:
+
+	runner = AgentRunner(llm, max_workers=8, requests_per_minute=500, max_tokens=5_000_000)
+	async for result in runner.run(tasks):
+		print(result.task_id, result.success)
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional, Protocol
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from browser_use.agent.rate_limit import RateLimiter, TokenBudget, rate_limiter_for
+from browser_use.agent.service import Agent
+from browser_use.agent.views import TaskResult
+from browser_use.browser.service import Browser
+from browser_use.controller.service import Controller
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool(Protocol):
+	def lease(self) -> Any:
+		"""Async context manager that yields a Browser nobody else uses meanwhile"""
+		...
+
+
+class LocalBrowserPool:
+	"""
+	Browsers launched on this host, one per concurrent lease.
+
+	Browsers are kept open between leases, so consecutive tasks of a worker don't pay for
+	launching Chromium again. Every lease starts with a fresh context though, a task never sees
+	the cookies, storage or tabs of the one before.
+	"""
+
+	def __init__(self, **browser_kwargs):
+		self.browser_kwargs = {'headless': True, **browser_kwargs}
+		self._idle: list[Browser] = []
+		self._browsers: list[Browser] = []
+
+	@asynccontextmanager
+	async def lease(self) -> AsyncIterator[Browser]:
+		if self._idle:
+			browser = self._idle.pop()
+		else:
+			browser = Browser(**self.browser_kwargs)
+			self._browsers.append(browser)
+		try:
+			yield browser
+		finally:
+			try:
+				await browser.reset_context()
+				self._idle.append(browser)
+			except Exception as e:
+				logger.warning(f'Closing pooled browser that could not be reset: {str(e)}')
+				self._browsers.remove(browser)
+				await browser.close(force=True)
+
+	async def close(self) -> None:
+		await asyncio.gather(
+			*(browser.close(force=True) for browser in self._browsers), return_exceptions=True
+		)
+		self._browsers.clear()
+		self._idle.clear()
+
+
+class AgentRunner:
+	def __init__(
+		self,
+		llm: BaseChatModel,
+		max_workers: int = 4,
+		browser_pool: Optional[BrowserPool] = None,
+		rate_limiter: Optional[RateLimiter] = None,
+		token_budget: Optional[TokenBudget] = None,
+		requests_per_minute: Optional[int] = None,
+		tokens_per_minute: Optional[int] = None,
+		max_tokens: Optional[int] = None,
+		max_steps: int = 100,
+		**agent_kwargs,
+	):
+		"""
+		@param max_workers: Number of tasks that run at the same time.
+		@param browser_pool: Where browsers are leased from, e.g. a DolphinProfilePool. By
+		default every worker gets a headless local browser.
+		@param requests_per_minute: LLM limit for the agents of this runner, ignored if a
+		rate_limiter is passed. Without limits the runner uses the model's shared rate limiter.
+		@param tokens_per_minute: Same for tokens.
+		@param max_tokens: Tokens all tasks together may use, ignored if a token_budget is
+		passed. Tasks that haven't started once it is exhausted are skipped.
+		@param agent_kwargs: Passed on to every Agent, e.g. use_vision.
+		"""
+		self.llm = llm
+		self.max_workers = max_workers
+		self._owns_pool = browser_pool is None
+		self.browser_pool = browser_pool or LocalBrowserPool()
+		if rate_limiter is None:
+			# limits of one runner don't change those of other agents on the same model
+			if requests_per_minute is not None or tokens_per_minute is not None:
+				rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+			else:
+				rate_limiter = rate_limiter_for(llm)
+		self.rate_limiter = rate_limiter
+		self.token_budget = token_budget or (TokenBudget(max_tokens) if max_tokens else None)
+		self.max_steps = max_steps
+		self.agent_kwargs = agent_kwargs
+
+	async def run(self, tasks: Iterable[str]) -> AsyncIterator[TaskResult]:
+		"""Runs all tasks and yields their results in the order they finish"""
+		queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+		for task_id, task in enumerate(tasks):
+			queue.put_nowait((task_id, task))
+
+		results: asyncio.Queue[TaskResult] = asyncio.Queue()
+		n_tasks = queue.qsize()
+		workers = [
+			asyncio.create_task(self._worker(queue, results))
+			for _ in range(min(self.max_workers, n_tasks))
+		]
+
+		try:
+			for _ in range(n_tasks):
+				yield await results.get()
+		finally:
+			for worker in workers:
+				worker.cancel()
+			await asyncio.gather(*workers, return_exceptions=True)
+			if self._owns_pool:
+				await self.browser_pool.close()
+
+	async def run_all(self, tasks: Iterable[str]) -> list[TaskResult]:
+		"""Runs all tasks and returns their results in task order"""
+		results = [result async for result in self.run(tasks)]
+		return sorted(results, key=lambda result: result.task_id)
+
+	async def _worker(
+		self, queue: 'asyncio.Queue[tuple[int, str]]', results: 'asyncio.Queue[TaskResult]'
+	) -> None:
+		while True:
+			try:
+				task_id, task = queue.get_nowait()
+			except asyncio.QueueEmpty:
+				return
+			results.put_nowait(await self._run_task(task_id, task))
+
+	async def _run_task(self, task_id: int, task: str) -> TaskResult:
+		if self.token_budget and self.token_budget.exhausted:
+			return TaskResult(task_id=task_id, task=task, error='Token budget exhausted')
+
+		start = time.time()
+		try:
+			async with self.browser_pool.lease() as browser:
+				history = await self._run_agent(task, browser)
+			result = TaskResult(task_id=task_id, task=task, history=history)
+		except Exception as e:
+			logger.error(f'Task {task_id} failed: {str(e)}')
+			result = TaskResult(task_id=task_id, task=task, error=str(e))
+
+		result.duration_s = time.time() - start
+		logger.info(
+			f'{"✅" if result.success else "❌"} Task {task_id} finished in {result.duration_s:.1f}s'
+		)
+		return result
+
+	async def _run_agent(self, task: str, browser: Browser):
+		controller = Controller()
+		controller.set_browser(browser)
+		agent = Agent(
+			task=task,
+			llm=self.llm,
+			controller=controller,
+			rate_limiter=self.rate_limiter,
+			token_budget=self.token_budget,
+			**self.agent_kwargs,
+		)
+		return await agent.run(max_steps=self.max_steps)
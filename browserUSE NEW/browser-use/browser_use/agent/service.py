@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
@@ -11,19 +12,27 @@ from typing import Any, Optional, Type, TypeVar
 from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from openai import RateLimitError
+from langchain_core.messages import AIMessage, BaseMessage
 from pydantic import BaseModel, ValidationError
 
+from browser_use.agent.message_manager import MessageManager
+from browser_use.agent.pricing import model_name, pricing_for
 from browser_use.agent.prompts import AgentMessagePrompt, SystemPrompt
+from browser_use.agent.rate_limit import (
+	RateLimiter,
+	TokenBudget,
+	backoff_delay,
+	is_rate_limit_error,
+	rate_limiter_for,
+	retry_after,
+)
 from browser_use.agent.views import (
 	ActionResult,
 	AgentError,
 	AgentHistory,
 	AgentHistoryList,
 	AgentOutput,
-	ModelPricingCatalog,
+	Pricing,
 	TokenDetails,
 	TokenUsage,
 )
@@ -53,14 +62,39 @@ class Agent:
 		save_conversation_path: Optional[str] = None,
 		max_failures: int = 5,
 		retry_delay: int = 10,
+		max_retry_delay: int = 120,
 		system_prompt_class: Type[SystemPrompt] = SystemPrompt,
+		rate_limiter: Optional[RateLimiter] = None,
+		token_budget: Optional[TokenBudget] = None,
+		max_input_tokens: int = 128000,
+		pricing: Optional[Pricing] = None,
+		max_cost: Optional[float] = None,
 	):
+		"""
+		@param retry_delay: Backoff after the first rate limit error, doubled for every
+		further one in a row up to max_retry_delay. A Retry-After header takes precedence.
+		@param rate_limiter: Limits LLM requests and tokens per minute, by default the one
+		shared by all agents of this process using the same provider and model.
+		@param token_budget: Tokens this agent (and all agents sharing it) may use, the run
+		stops once it is exhausted.
+		@param max_input_tokens: Budget per LLM call. Older steps of the conversation are
+		summarized to stay within it, the system prompt and task are always sent.
+		@param pricing: Price of the model, by default looked up in browser_use.agent.pricing.
+		@param max_cost: USD this agent may spend. The run stops before a step that would likely
+		go over it, estimated from the cost of the previous step.
+		"""
 		self.agent_id = str(uuid.uuid4())  # unique identifier for the agent
 
 		self.task = task
 		self.use_vision = use_vision
 		self.llm = llm
 		self.save_conversation_path = save_conversation_path
+		self.rate_limiter = rate_limiter or rate_limiter_for(llm)
+		self.token_budget = token_budget
+		self.pricing = pricing or pricing_for(model_name(llm))
+		self.max_cost = max_cost
+		if max_cost is not None and self.pricing is None:
+			logger.warning(f'No pricing for {model_name(llm)}, max_cost has no effect without one')
 
 		# Controller setup
 		self.controller_injected = controller is not None
@@ -74,7 +108,7 @@ class Agent:
 		# Action and output models setup
 		self._setup_action_models()
 
-		self.messages = []
+		self.max_input_tokens = max_input_tokens
 		self._initialize_messages()
 
 		# Tracking variables
@@ -83,6 +117,13 @@ class Agent:
 		self.consecutive_failures = 0
 		self.max_failures = max_failures
 		self.retry_delay = retry_delay
+		self.max_retry_delay = max_retry_delay
+		self.consecutive_rate_limits = 0
+		self.throttled = 0.0  # seconds this agent spent backing off after rate limit errors
+		self.step_usage: Optional[TokenUsage] = None  # usage of the current step's LLM call
+		self.step_cost: Optional[float] = None
+		self.llm_latency: Optional[float] = None
+		self.total_cost = 0.0
 
 		if save_conversation_path:
 			logger.info(f'Saving conversation to {save_conversation_path}')
@@ -107,17 +148,31 @@ class Agent:
 		# Get action descriptions from controller's registry
 		action_descriptions = self.controller.registry.get_prompt_description()
 		self.system_prompt = self.system_prompt_class(action_descriptions, datetime.now())
-		self.messages.append(self.system_prompt.get_system_message())
+		self.message_manager = MessageManager(
+			self.system_prompt.get_system_message(),
+			max_input_tokens=self.max_input_tokens,
+			# OpenAI caches prompt prefixes on its own, Anthropic only at explicit breakpoints
+			cache_control=isinstance(self.llm, ChatAnthropic),
+		)
 		self.set_task(self.task)
 
+	@property
+	def messages(self) -> list[BaseMessage]:
+		"""The whole conversation, before it is trimmed to the token budget"""
+		return self.message_manager.messages
+
 	def set_task(self, task: str) -> None:
-		self.messages.append(HumanMessage(content=f'Your task is: {task}'))
+		self.message_manager.add_task(task)
 
 	@time_execution_async('--step')
 	async def step(self) -> None:
 		"""Execute one step of the task"""
 		logger.info(f'\n📍 Step {self.n_steps}')
 		state = None
+		self.step_usage = None
+		self.step_cost = None
+		self.llm_latency = None
+		step_start = time.time()
 		try:
 			state = await self.controller.browser.get_state(use_vision=self.use_vision)
 			model_output = await self.get_next_action(state)
@@ -127,9 +182,10 @@ class Agent:
 			if result.is_done:
 				logger.result(f'{result.extracted_content}')
 			self.consecutive_failures = 0
+			self.consecutive_rate_limits = 0
 
 		except Exception as e:
-			result = self._handle_step_error(e)
+			result = await self._handle_step_error(e)
 			model_output = None
 
 			if result.error:
@@ -141,20 +197,33 @@ class Agent:
 				)
 		if state:
 			self._update_messages_with_result(result)
-			self._make_history_item(model_output, state, result)
+			self._make_history_item(model_output, state, result, time.time() - step_start)
+		self.n_steps += 1
 
-	def _handle_step_error(self, error: Exception) -> ActionResult:
+	async def _handle_step_error(self, error: Exception) -> ActionResult:
 		"""Handle all types of errors that can occur during a step"""
 		error_msg = AgentError.format_error(error)
 		prefix = f'❌ Result failed {self.consecutive_failures + 1}/{self.max_failures} times:\n '
 
+		if is_rate_limit_error(error):
+			delay = retry_after(error)
+			if delay is None:
+				delay = backoff_delay(
+					self.consecutive_rate_limits, self.retry_delay, self.max_retry_delay
+				)
+			self.consecutive_rate_limits += 1
+			logger.warning(f'{prefix}{error_msg} Backing off for {delay:.1f}s')
+			# every agent on this model waits, not just the one that hit the limit
+			self.rate_limiter.block_for(delay)
+			self.throttled += delay
+			await asyncio.sleep(delay)
+			self.consecutive_failures += 1
+			return ActionResult(error=error_msg)
+
+		self.consecutive_rate_limits = 0
 		if isinstance(error, (ValidationError, ValueError)):
 			logger.error(f'{prefix}{error_msg}')
 			self.consecutive_failures += 1
-		elif isinstance(error, RateLimitError):
-			logger.warning(f'{prefix}{error_msg}')
-			time.sleep(self.retry_delay)
-			self.consecutive_failures += 1
 		else:
 			logger.error(f'{prefix}{error_msg}')
 			self.consecutive_failures += 1
@@ -163,169 +232,107 @@ class Agent:
 
 	def _update_messages_with_result(self, result: ActionResult) -> None:
 		"""Update message history with action results"""
-		if result.extracted_content:
-			self.messages.append(HumanMessage(content=result.extracted_content))
-		if result.error:
-			self.messages.append(HumanMessage(content=result.error))
+		self.message_manager.add_result(
+			self.n_steps, extracted_content=result.extracted_content, error=result.error
+		)
 
 	def _make_history_item(
 		self,
 		model_output: AgentOutput | None,
 		state: BrowserState,
 		result: ActionResult,
+		duration_s: Optional[float] = None,
 	) -> None:
 		"""Create and store history item"""
-		history_item = AgentHistory(model_output=model_output, result=result, state=state)
+		history_item = AgentHistory(
+			model_output=model_output,
+			result=result,
+			state=state,
+			usage=self.step_usage,
+			cost=self.step_cost,
+			llm_latency_s=self.llm_latency,
+			duration_s=duration_s,
+		)
 		self.history.history.append(history_item)
 
 	@time_execution_async('--get_next_action')
 	async def get_next_action(self, state: BrowserState) -> AgentOutput:
 		"""Get next action from LLM based on current state"""
 		new_message = AgentMessagePrompt(state).get_user_message()
-		input_messages = self.messages + [new_message]
+		input_messages = self.message_manager.get_messages(
+			new_message, self.n_steps, screenshot_unchanged=state.screenshot_unchanged
+		)
+
+		await self.rate_limiter.acquire()
 
 		structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True)
+		llm_start = time.time()
 		response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
+		self.llm_latency = time.time() - llm_start
+		self._update_usage_metadata(response.get('raw'))
 
 		parsed: AgentOutput = response['parsed']
 
 		self._update_message_history(state, parsed)
 		self._log_response(parsed)
 		self._save_conversation(input_messages, parsed)
-		# self._update_usage_metadata(response['raw'])
 		return parsed
 
-	def _calc_token_cost(self) -> float:
+	def _calc_token_cost(self, usage: Optional[TokenUsage] = None) -> Optional[float]:
 		"""
-		Calculate the cost of tokens used in a request based on the model.
+		Cost of the tokens in USD, None if the model's price is unknown.
 
-		:param usage_metadata: TokenUsage model containing token usage details.
-		:param model_name: The name of the model used.
-		:return: Cost of the tokens used.
+		@param usage: Tokens to price, by default all tokens this agent used so far.
 		"""
-		if isinstance(self.llm, ChatOpenAI):
-			model_name = self.llm.model_name
-		elif isinstance(self.llm, ChatAnthropic):
-			model_name = self.llm.model
-		else:
-			logger.debug('Model name not supported for pricing calculation')
-			return 0
-
-		pricing_catalog = ModelPricingCatalog()
-
-		if model_name == 'gpt-4o':
-			model_pricing = pricing_catalog.gpt_4o
-		elif model_name == 'gpt-4o-mini':
-			model_pricing = pricing_catalog.gpt_4o_mini
-		elif model_name == 'claude-3-5-sonnet-20240620':
-			model_pricing = pricing_catalog.claude_3_5_sonnet
-		else:
-			logger.debug(f'Unsupported model: {model_name}')
-			return 0
+		if self.pricing is None:
+			return None
+		return self.pricing.cost(usage or self.usage_metadata)
 
-		uncached_input_tokens = (
-			self.usage_metadata.input_tokens - self.usage_metadata.input_token_details.cache_read
-		)
-		factor = 1e6
-		cost = (
-			(uncached_input_tokens / factor) * model_pricing.uncached_input
-			+ (self.usage_metadata.input_token_details.cache_read / factor)
-			* model_pricing.cached_input
-			+ (self.usage_metadata.output_tokens / factor) * model_pricing.output
-		)
-		return cost
-
-	def _update_usage_metadata(self, raw_response: AIMessage) -> None:
+	def _update_usage_metadata(self, raw_response: Optional[AIMessage]) -> None:
 		"""
-		Process the response and update usage.
+		Counts the usage of a response: for the step, the run, and against the shared rate
+		limit and token budget.
 
-		:param raw_response: The response object containing usage metadata.
+		LangChain puts it into usage_metadata for every provider that reports it.
 		"""
-		# only supported for openai models for now
-		if isinstance(self.llm, ChatAnthropic):
-			token_usage_data: dict[str, Any] = raw_response.response_metadata['usage']
-			usage_metadata = TokenUsage(
-				input_tokens=token_usage_data.get('input_tokens', 0),
-				output_tokens=token_usage_data.get('output_tokens', 0),
-				total_tokens=token_usage_data.get('input_tokens', 0)
-				+ token_usage_data.get('output_tokens', 0),
-			)
-			self.usage_metadata.input_tokens += usage_metadata.input_tokens
-			self.usage_metadata.output_tokens += usage_metadata.output_tokens
-			self.usage_metadata.total_tokens += usage_metadata.total_tokens
-
-		elif isinstance(self.llm, ChatOpenAI):
-			token_usage_data: dict[str, Any] = raw_response.response_metadata['token_usage']
-			usage_metadata = TokenUsage(
-				input_tokens=token_usage_data.get('prompt_tokens', 0),
-				output_tokens=token_usage_data.get('completion_tokens', 0),
-				total_tokens=token_usage_data.get('total_tokens', 0),
-				input_token_details=TokenDetails(
-					audio=token_usage_data.get('prompt_tokens_details', {}).get('audio_tokens', 0),
-					cache_read=token_usage_data.get('prompt_tokens_details', {}).get(
-						'cached_tokens', 0
-					),
-					reasoning=0,  # Assuming reasoning is not part of prompt_tokens_details
-				),
-				output_token_details=TokenDetails(
-					audio=token_usage_data.get('completion_tokens_details', {}).get(
-						'audio_tokens', 0
-					),
-					cache_read=0,  # Assuming cache_read is not part of completion_tokens_details
-					reasoning=token_usage_data.get('completion_tokens_details', {}).get(
-						'reasoning_tokens', 0
-					),
-				),
-			)
-
-			self.usage_metadata.input_tokens += usage_metadata.input_tokens
-			self.usage_metadata.output_tokens += usage_metadata.output_tokens
-			self.usage_metadata.total_tokens += usage_metadata.total_tokens
-
-			# update usage metadata
-			if usage_metadata.input_token_details:
-				for detail_key in usage_metadata.input_token_details.model_dump():
-					setattr(
-						self.usage_metadata.input_token_details,
-						detail_key,
-						getattr(self.usage_metadata.input_token_details, detail_key)
-						+ getattr(usage_metadata.input_token_details, detail_key),
-					)
+		usage = getattr(raw_response, 'usage_metadata', None)
+		if not usage:
+			logger.debug('Response has no usage metadata, tokens and cost are not tracked')
+			return
 
-			if usage_metadata.output_token_details:
-				for detail_key in usage_metadata.output_token_details.model_dump():
-					setattr(
-						self.usage_metadata.output_token_details,
-						detail_key,
-						getattr(self.usage_metadata.output_token_details, detail_key)
-						+ getattr(usage_metadata.output_token_details, detail_key),
-					)
+		self.step_usage = TokenUsage.from_usage_metadata(usage)
+		self.usage_metadata = self.usage_metadata + self.step_usage
+		self.step_cost = self._calc_token_cost(self.step_usage)
+		if self.step_cost is not None:
+			self.total_cost += self.step_cost
 
-		else:
-			logger.debug('Model name not supported for pricing calculation')
-			return
+		self.rate_limiter.record_tokens(self.step_usage.total_tokens)
+		if self.token_budget:
+			self.token_budget.record(self.step_usage.total_tokens)
 
-		self._log_usage_metadata(usage_metadata)
+		self._log_usage_metadata(self.step_usage)
 
 	def _log_usage_metadata(self, current_tokens: Optional[TokenUsage] = None) -> None:
 		"""Log the usage metadata"""
-		total_cost = self._calc_token_cost()
 		total_tokens = self.usage_metadata.total_tokens
+		cost = f' = ${self.total_cost:.4f} 💰' if self.pricing else ''
 		logger.debug(
-			f'🔢 Total Tokens: input: {self.usage_metadata.input_tokens} (cached: {self.usage_metadata.input_token_details.cache_read}) + output: {self.usage_metadata.output_tokens} = {total_tokens} = ${total_cost:.4f} 💰'
+			f'🔢 Total Tokens: input: {self.usage_metadata.input_tokens} (cached: {self.usage_metadata.input_token_details.cache_read}) + output: {self.usage_metadata.output_tokens} = {total_tokens}{cost}'
 		)
 
 		if current_tokens:
+			details = current_tokens.input_token_details
+			latency = f' in {self.llm_latency:.2f}s' if self.llm_latency is not None else ''
 			logger.debug(
-				f'🔢 Last  Tokens: input: {current_tokens.input_tokens} (cached: {current_tokens.input_token_details.cache_read}) + output: {current_tokens.output_tokens} = {current_tokens.total_tokens} '
+				f'🔢 Last  Tokens: input: {current_tokens.input_tokens} (cache read: {details.cache_read}, cache write: {details.cache_creation}) + output: {current_tokens.output_tokens} = {current_tokens.total_tokens}{latency}'
 			)
 
 	def _update_message_history(self, state: BrowserState, parsed: Optional[dict] = None):
 		"""Update message history with current state and parsed response"""
 		if parsed is None:
 			# Handle None response gracefully
-			self.messages.append(
-				AIMessage(content=json.dumps({"error": "Failed to parse response"}))
+			self.message_manager.add_model_output(
+				self.n_steps, json.dumps({"error": "Failed to parse response"})
 			)
 			return
 
@@ -334,11 +341,11 @@ class Agent:
 				content = parsed.model_dump_json(exclude_unset=True)
 			else:
 				content = json.dumps(parsed)
-			self.messages.append(AIMessage(content=content))
+			self.message_manager.add_model_output(self.n_steps, content)
 		except Exception as e:
 			logger.error(f"Error updating message history: {str(e)}")
-			self.messages.append(
-				AIMessage(content=json.dumps({"error": f"Message update failed: {str(e)}"}))
+			self.message_manager.add_model_output(
+				self.n_steps, json.dumps({"error": f"Message update failed: {str(e)}"})
 			)
 
 	def _log_response(self, response: Any) -> None:
@@ -420,6 +427,9 @@ class Agent:
 				if self._too_many_failures():
 					break
 
+				if self._over_budget():
+					break
+
 				await self.step()
 
 				if self._is_task_complete():
@@ -428,6 +438,10 @@ class Agent:
 			else:
 				logger.info('❌ Failed to complete task in maximum steps')
 
+			if self.throttled:
+				logger.info(f'⏳ Spent {self.throttled:.1f}s backing off after rate limit errors')
+			self._log_run_usage()
+
 			return self.history
 
 		finally:
@@ -442,6 +456,42 @@ class Agent:
 			if not self.controller_injected:
 				await self.controller.browser.close()
 
+	def _over_budget(self) -> bool:
+		"""
+		Check if the next step would likely exceed the token budget or max_cost.
+
+		Steps only get bigger as the history grows, so the last one is a lower bound for the next.
+		"""
+		last = next((h for h in reversed(self.history.history) if h.usage), None)
+
+		if self.token_budget:
+			next_tokens = last.usage.total_tokens if last else 0
+			if self.token_budget.exhausted or self.token_budget.remaining < next_tokens:
+				logger.error(
+					f'❌ Stopping because the token budget is exhausted '
+					f'({self.token_budget.remaining} of {self.token_budget.max_tokens} left)'
+				)
+				return True
+
+		if self.max_cost is not None:
+			next_cost = (last.cost or 0) if last else 0
+			if self.total_cost + next_cost > self.max_cost:
+				logger.error(
+					f'❌ Stopping because the next step would exceed the budget of '
+					f'${self.max_cost:.2f} (${self.total_cost:.4f} spent)'
+				)
+				return True
+
+		return False
+
+	def _log_run_usage(self) -> None:
+		summary = self.history.usage_summary()
+		cost = f' ${summary["cost_usd"]:.4f},' if summary['cost_usd'] is not None else ''
+		logger.info(
+			f'💰 {summary["total_tokens"]} tokens ({summary["cache_read_tokens"]} cached),{cost} '
+			f'{summary["llm_latency_s"]:.1f}s of {summary["duration_s"]:.1f}s waiting for the LLM'
+		)
+
 	def _too_many_failures(self) -> bool:
 		"""Check if we should stop due to too many failures"""
 		if self.consecutive_failures >= self.max_failures:
@@ -3,9 +3,9 @@ from __future__ import annotations
 import traceback
 from typing import Optional, Type
 
-from openai import RateLimitError
 from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
 
+from browser_use.agent.rate_limit import is_rate_limit_error
 from browser_use.browser.views import BrowserState
 from browser_use.controller.registry.views import ActionModel
 
@@ -13,6 +13,7 @@ from browser_use.controller.registry.views import ActionModel
 class TokenDetails(BaseModel):
 	audio: int = 0
 	cache_read: int = 0
+	cache_creation: int = 0
 	reasoning: int = 0
 
 
@@ -26,21 +27,63 @@ class TokenUsage(BaseModel):
 	# allow arbitrary types
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
+	@classmethod
+	def from_usage_metadata(cls, usage: dict) -> 'TokenUsage':
+		"""From LangChain's usage_metadata of an AIMessage, the same for every provider"""
+		input_details = usage.get('input_token_details') or {}
+		output_details = usage.get('output_token_details') or {}
+		return cls(
+			input_tokens=usage.get('input_tokens', 0),
+			output_tokens=usage.get('output_tokens', 0),
+			total_tokens=usage.get('total_tokens', 0),
+			input_token_details=TokenDetails(
+				audio=input_details.get('audio') or 0,
+				cache_read=input_details.get('cache_read') or 0,
+				cache_creation=input_details.get('cache_creation') or 0,
+			),
+			output_token_details=TokenDetails(
+				audio=output_details.get('audio') or 0,
+				reasoning=output_details.get('reasoning') or 0,
+			),
+		)
+
+	def __add__(self, other: 'TokenUsage') -> 'TokenUsage':
+		def add(a: TokenDetails, b: TokenDetails) -> TokenDetails:
+			return TokenDetails(**{key: value + getattr(b, key) for key, value in a})
+
+		return TokenUsage(
+			input_tokens=self.input_tokens + other.input_tokens,
+			output_tokens=self.output_tokens + other.output_tokens,
+			total_tokens=self.total_tokens + other.total_tokens,
+			input_token_details=add(self.input_token_details, other.input_token_details),
+			output_token_details=add(self.output_token_details, other.output_token_details),
+		)
 
-class Pricing(BaseModel):
-	uncached_input: float  # per 1M tokens
-	cached_input: float
-	output: float
 
+class Pricing(BaseModel):
+	"""USD per 1M tokens, cache reads and writes cost the same as other input unless set"""
 
-class ModelPricingCatalog(BaseModel):
-	gpt_4o: Pricing = Field(default=Pricing(uncached_input=2.50, cached_input=1.25, output=10.00))
-	gpt_4o_mini: Pricing = Field(
-		default=Pricing(uncached_input=0.15, cached_input=0.075, output=0.60)
-	)
-	claude_3_5_sonnet: Pricing = Field(
-		default=Pricing(uncached_input=3.00, cached_input=1.50, output=15.00)
-	)
+	uncached_input: float
+	output: float
+	cached_input: Optional[float] = None
+	cache_write: Optional[float] = None
+
+	def cost(self, usage: TokenUsage) -> float:
+		"""
+		Cost of a request or a sum of requests.
+
+		LangChain counts cache reads and writes in input_tokens, they are priced separately.
+		"""
+		details = usage.input_token_details
+		cached_input = self.uncached_input if self.cached_input is None else self.cached_input
+		cache_write = self.uncached_input if self.cache_write is None else self.cache_write
+		uncached = max(usage.input_tokens - details.cache_read - details.cache_creation, 0)
+		return (
+			uncached * self.uncached_input
+			+ details.cache_read * cached_input
+			+ details.cache_creation * cache_write
+			+ usage.output_tokens * self.output
+		) / 1e6
 
 
 class ActionResult(BaseModel):
@@ -87,6 +130,10 @@ class AgentHistory(BaseModel):
 	model_output: AgentOutput | None
 	result: ActionResult
 	state: BrowserState
+	usage: Optional[TokenUsage] = None
+	cost: Optional[float] = None  # USD, None if the model's price is unknown
+	llm_latency_s: Optional[float] = None
+	duration_s: Optional[float] = None
 
 	model_config = ConfigDict(arbitrary_types_allowed=True, protected_namespaces=())
 
@@ -138,6 +185,64 @@ class AgentHistoryList(BaseModel):
 		"""Get all screenshots from history"""
 		return [h.state.screenshot for h in self.history if h.state.screenshot]
 
+	def diagnostics_summary(self) -> dict:
+		"""Network, console and long task totals of all steps that collected diagnostics"""
+		steps = [h.state.diagnostics for h in self.history if h.state.diagnostics]
+		slowest = sorted(
+			(request for step in steps for request in step.slowest_requests),
+			key=lambda request: request.duration_ms,
+			reverse=True,
+		)
+		return {
+			'steps': len(steps),
+			'requests': sum(step.request_count for step in steps),
+			'failed_requests': sum(len(step.failed_requests) for step in steps),
+			'bytes_received': sum(step.bytes_received for step in steps),
+			'blocked_ms': sum(step.blocked_ms for step in steps),
+			'console_errors': sum(len(step.console_errors) for step in steps),
+			'long_tasks': sum(step.long_tasks for step in steps),
+			'long_task_ms': sum(step.long_task_ms for step in steps),
+			'slowest_requests': [f'{r.duration_ms:.0f}ms {r.url}' for r in slowest[:5]],
+		}
+
+	def total_usage(self) -> TokenUsage:
+		"""Tokens of all steps together"""
+		total = TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0)
+		for h in self.history:
+			if h.usage:
+				total = total + h.usage
+		return total
+
+	def total_cost(self) -> Optional[float]:
+		"""USD of all steps together, None if no step could be priced"""
+		costs = [h.cost for h in self.history if h.cost is not None]
+		return sum(costs) if costs else None
+
+	def total_duration_s(self) -> float:
+		return sum(h.duration_s or 0 for h in self.history)
+
+	def total_llm_latency_s(self) -> float:
+		return sum(h.llm_latency_s or 0 for h in self.history)
+
+	def usage_summary(self) -> dict:
+		"""Per-run totals of tokens, cost and time"""
+		usage = self.total_usage()
+		cost = self.total_cost()
+		return {
+			'steps': len(self.history),
+			'input_tokens': usage.input_tokens,
+			'cache_read_tokens': usage.input_token_details.cache_read,
+			'output_tokens': usage.output_tokens,
+			'total_tokens': usage.total_tokens,
+			'cost_usd': round(cost, 6) if cost is not None else None,
+			'duration_s': round(self.total_duration_s(), 2),
+			'llm_latency_s': round(self.total_llm_latency_s(), 2),
+		}
+
+	def cache_read_tokens(self) -> list[int]:
+		"""Input tokens read from the provider's prompt cache, per step"""
+		return [h.usage.input_token_details.cache_read if h.usage else 0 for h in self.history]
+
 	def action_names(self) -> list[str]:
 		"""Get all action names from history"""
 		return [list(action.keys())[0] for action in self.model_actions()]
@@ -202,6 +307,20 @@ class AgentError:
 		"""Format error message based on error type"""
 		if isinstance(error, ValidationError):
 			return f'{AgentError.VALIDATION_ERROR}\nDetails: {str(error)}'
-		if isinstance(error, RateLimitError):
+		if is_rate_limit_error(error):
 			return AgentError.RATE_LIMIT_ERROR
 		return f'Unexpected error: {str(error)}\nStacktrace:\n{traceback.format_exc()}'
+
+
+class TaskResult(BaseModel):
+	"""Outcome of one task of an AgentRunner"""
+
+	task_id: int
+	task: str
+	history: Optional[AgentHistoryList] = None
+	error: Optional[str] = None
+	duration_s: float = 0
+
+	@property
+	def success(self) -> bool:
+		return self.error is None and self.history is not None and self.history.is_done()
@@ -0,0 +1,133 @@
+"""
+Thin command layer on top of a page's CDP session.
+
+Playwright's high level calls wait for actionability, retry and often need several protocol
+round trips. For hot paths that don't need those semantics (the element was just checked by
+the DOM extraction, or there is no element at all) sending the raw CDP command is cheaper.
+"""
+
+import base64
+import logging
+from typing import Any, Literal, Optional
+
+from playwright.async_api import CDPSession, Page
+
+from browser_use.browser.views import BrowserError
+
+logger = logging.getLogger(__name__)
+
+# what Playwright's animations='disabled' does: finite animations jump to their end state,
+# infinite ones are held at their start, and the caret is hidden
+FREEZE_ANIMATIONS = """
+(() => {
+	const held = [];
+	for (const animation of document.getAnimations()) {
+		const timing = animation.effect && animation.effect.getComputedTiming();
+		if (timing && timing.endTime !== Infinity) {
+			try { animation.finish(); } catch (e) {}
+		} else if (animation.playState === 'running') {
+			animation.pause();
+			animation.currentTime = 0;
+			held.push(animation);
+		}
+	}
+	window.__browserUseHeldAnimations = held;
+	const style = document.createElement('style');
+	style.id = 'browser-use-freeze-animations';
+	style.textContent = '* { caret-color: transparent !important; }';
+	(document.head || document.documentElement).appendChild(style);
+})()
+"""
+
+RESUME_ANIMATIONS = """
+(() => {
+	(window.__browserUseHeldAnimations || []).forEach(animation => animation.play());
+	delete window.__browserUseHeldAnimations;
+	document.getElementById('browser-use-freeze-animations')?.remove();
+})()
+"""
+
+
+class CDPCommands:
+	"""Raw CDP commands for one page"""
+
+	def __init__(self, session: CDPSession):
+		self.session = session
+
+	@classmethod
+	async def for_page(cls, page: Page) -> 'CDPCommands':
+		return cls(await page.context.new_cdp_session(page))
+
+	async def click(
+		self,
+		x: float,
+		y: float,
+		button: Literal['left', 'middle', 'right'] = 'left',
+		click_count: int = 1,
+	) -> None:
+		"""Mouse press and release at viewport coordinates, without any actionability checks"""
+		for event_type in ('mousePressed', 'mouseReleased'):
+			await self.session.send(
+				'Input.dispatchMouseEvent',
+				{'type': event_type, 'x': x, 'y': y, 'button': button, 'clickCount': click_count},
+			)
+
+	async def insert_text(self, text: str) -> None:
+		"""Inserts text into the focused element as a single input event"""
+		await self.session.send('Input.insertText', {'text': text})
+
+	async def scroll(self, delta_y: float, delta_x: float = 0, x: float = 0, y: float = 0) -> None:
+		"""Mouse wheel scroll at viewport coordinates"""
+		await self.session.send(
+			'Input.dispatchMouseEvent',
+			{'type': 'mouseWheel', 'x': x, 'y': y, 'deltaX': delta_x, 'deltaY': delta_y},
+		)
+
+	async def evaluate(self, expression: str, await_promise: bool = False) -> Any:
+		"""Evaluates an expression in the page and returns its value by value"""
+		response = await self.session.send(
+			'Runtime.evaluate',
+			{'expression': expression, 'returnByValue': True, 'awaitPromise': await_promise},
+		)
+		if 'exceptionDetails' in response:
+			details = response['exceptionDetails']
+			message = details.get('exception', {}).get('description') or details.get('text')
+			raise BrowserError(f'Evaluation failed: {message}')
+		return response['result'].get('value')
+
+	async def screenshot(
+		self,
+		format: Literal['png', 'jpeg', 'webp'] = 'png',
+		quality: Optional[int] = None,
+		clip: Optional[dict] = None,
+	) -> bytes:
+		"""
+		Captures the viewport (or clip) encoded by the browser itself, webp included.
+
+		@param clip: {'x', 'y', 'width', 'height', 'scale'} in CSS pixels.
+		"""
+		params: dict[str, Any] = {'format': format}
+		if quality is not None and format != 'png':
+			params['quality'] = quality
+		if clip is not None:
+			params['clip'] = clip
+		response = await self.session.send('Page.captureScreenshot', params)
+		return base64.b64decode(response['data'])
+
+	async def freeze_animations(self) -> None:
+		"""Puts CSS and web animations into a deterministic state until resume_animations()"""
+		await self.evaluate(FREEZE_ANIMATIONS)
+
+	async def resume_animations(self) -> None:
+		await self.evaluate(RESUME_ANIMATIONS)
+
+	async def layout_metrics(self) -> dict:
+		"""Page.getLayoutMetrics - viewport and content sizes in CSS pixels"""
+		return await self.session.send('Page.getLayoutMetrics')
+
+	async def detach(self) -> None:
+		try:
+			await self.session.detach()
+		except Exception:
+			# the page is already gone
+			pass
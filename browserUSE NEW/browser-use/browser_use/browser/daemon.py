@@ -0,0 +1,249 @@
+"""
+Warm local browser daemon.
+
+Launching Chromium and doing the first navigation is a large part of short script runs. The
+daemon is a Chromium process with a CDP endpoint and a persistent user data directory that
+outlives the script, so `Browser(use_daemon=True)` (or `Browser(cdp_url=...)`) only has to
+attach to it and reuses its warm processes, disk cache and DNS cache.
+
+Usage:
+	python -m browser_use.browser.daemon start [--port 9222] [--headed]
+	python -m browser_use.browser.daemon status
+	python -m browser_use.browser.daemon stop
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from browser_use.browser.views import BrowserError, DaemonInfo
+
+logger = logging.getLogger(__name__)
+
+DAEMON_DIR = Path.home() / '.cache' / 'browser_use' / 'daemon'
+STATE_PATH = DAEMON_DIR / 'daemon.json'
+DEFAULT_PORT = 9222
+STARTUP_TIMEOUT = 15
+
+
+def chromium_executable() -> str:
+	"""Path of the Chromium build installed by `playwright install`"""
+	from playwright.sync_api import sync_playwright
+
+	with sync_playwright() as playwright:
+		return playwright.chromium.executable_path
+
+
+def launch_chromium(
+	port: int,
+	user_data_dir: str,
+	headless: bool = True,
+	extra_args: Optional[list[str]] = None,
+) -> subprocess.Popen:
+	"""
+	Starts a detached Chromium with a CDP endpoint on the given port.
+
+	The process is put in its own session so it survives the parent script.
+	"""
+	# imported here because the service module imports this one
+	from browser_use.browser.service import CHROME_ARGS
+
+	command = [
+		chromium_executable(),
+		f'--remote-debugging-port={port}',
+		f'--user-data-dir={user_data_dir}',
+		*CHROME_ARGS,
+		*(extra_args or []),
+	]
+	if headless:
+		command.append('--headless=new')
+
+	os.makedirs(user_data_dir, exist_ok=True)
+	return subprocess.Popen(
+		command,
+		stdout=subprocess.DEVNULL,
+		stderr=subprocess.DEVNULL,
+		start_new_session=True,
+	)
+
+
+def wait_for_cdp(port: int, timeout: float = STARTUP_TIMEOUT) -> dict:
+	"""Polls the CDP version endpoint until the browser answers"""
+	deadline = time.time() + timeout
+	while True:
+		try:
+			with urllib.request.urlopen(f'http://127.0.0.1:{port}/json/version', timeout=1) as r:
+				return json.loads(r.read())
+		except (urllib.error.URLError, ConnectionError, TimeoutError):
+			if time.time() > deadline:
+				raise BrowserError(f'Browser did not open a CDP endpoint on port {port}')
+			time.sleep(0.1)
+
+
+def _is_alive(pid: int) -> bool:
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except PermissionError:
+		return True
+	return True
+
+
+def _read_state() -> Optional[DaemonInfo]:
+	try:
+		return DaemonInfo.model_validate_json(STATE_PATH.read_text())
+	except (FileNotFoundError, ValueError):
+		return None
+
+
+def _cmdline_matches(info: DaemonInfo) -> bool:
+	"""
+	Whether the pid is still a browser with the daemon's CDP port.
+
+	Only checked where /proc exists. Elsewhere the browser id check in _is_daemon has to do.
+	"""
+	if not Path('/proc').is_dir():
+		return True
+	try:
+		cmdline = Path(f'/proc/{info.pid}/cmdline').read_bytes().split(b'\0')
+	except FileNotFoundError:
+		return False
+	except OSError:
+		return True
+	return f'--remote-debugging-port={info.port}'.encode() in cmdline
+
+
+def _is_daemon(info: DaemonInfo) -> bool:
+	"""
+	Whether the state file still describes the browser we launched.
+
+	The pid alone is not enough, it can be reused by an unrelated process, and the port can
+	be served by another browser. The browser id is unique per browser run.
+	"""
+	if not _is_alive(info.pid) or not _cmdline_matches(info):
+		return False
+	try:
+		version = wait_for_cdp(info.port, timeout=1)
+	except BrowserError:
+		return False
+	return version.get('webSocketDebuggerUrl') == info.browser_id
+
+
+def daemon_status() -> Optional[DaemonInfo]:
+	"""The running daemon, or None. Cleans up the state file of a dead daemon."""
+	info = _read_state()
+	if info is None:
+		return None
+
+	if _is_daemon(info):
+		return info
+
+	logger.debug(f'Removing stale daemon state for pid {info.pid}')
+	STATE_PATH.unlink(missing_ok=True)
+	return None
+
+
+def start_daemon(
+	port: int = DEFAULT_PORT,
+	headless: bool = True,
+	user_data_dir: Optional[str] = None,
+) -> DaemonInfo:
+	"""Starts the daemon if it is not running yet and returns its info"""
+	running = daemon_status()
+	if running is not None:
+		return running
+
+	try:
+		wait_for_cdp(port, timeout=0)
+	except BrowserError:
+		pass
+	else:
+		raise BrowserError(f'Port {port} is already used by another browser')
+
+	user_data_dir = user_data_dir or str(DAEMON_DIR / 'profile')
+	process = launch_chromium(port, user_data_dir, headless=headless)
+	try:
+		version = wait_for_cdp(port)
+		# a browser that took the port in the meantime answers while ours has exited
+		if process.poll() is not None:
+			raise BrowserError(f'Browser exited before opening a CDP endpoint on port {port}')
+	except BrowserError:
+		process.kill()
+		raise
+
+	info = DaemonInfo(
+		pid=process.pid,
+		port=port,
+		user_data_dir=user_data_dir,
+		headless=headless,
+		browser_id=version['webSocketDebuggerUrl'],
+	)
+	STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+	STATE_PATH.write_text(info.model_dump_json())
+	logger.info(f'Started browser daemon (pid {info.pid}) at {info.cdp_url}')
+	return info
+
+
+def stop_daemon(timeout: float = 5) -> bool:
+	"""Stops the daemon. Returns False if none was running."""
+	info = _read_state()
+	if info is None:
+		return False
+
+	# never signal a pid that is no longer our browser
+	if not _is_daemon(info):
+		logger.debug(f'Removing stale daemon state for pid {info.pid}')
+		STATE_PATH.unlink(missing_ok=True)
+		return False
+
+	os.kill(info.pid, signal.SIGTERM)
+	deadline = time.time() + timeout
+	while _is_alive(info.pid) and time.time() < deadline:
+		time.sleep(0.1)
+	if _is_alive(info.pid) and _cmdline_matches(info):
+		os.kill(info.pid, signal.SIGKILL)
+
+	STATE_PATH.unlink(missing_ok=True)
+	logger.info(f'Stopped browser daemon (pid {info.pid})')
+	return True
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='Manage the warm local browser daemon')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	start = subparsers.add_parser('start', help='Start the daemon if it is not running')
+	start.add_argument('--port', type=int, default=DEFAULT_PORT)
+	start.add_argument('--headed', action='store_true', help='Show the browser window')
+	start.add_argument('--user-data-dir', default=None)
+
+	subparsers.add_parser('stop', help='Stop the daemon')
+	subparsers.add_parser('status', help='Print the daemon info as JSON')
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'start':
+		info = start_daemon(args.port, headless=not args.headed, user_data_dir=args.user_data_dir)
+		print(json.dumps({**info.model_dump(), 'cdp_url': info.cdp_url}))
+	elif args.command == 'stop':
+		if not stop_daemon():
+			print('Browser daemon is not running')
+	else:
+		info = daemon_status()
+		if info is None:
+			print('Browser daemon is not running')
+		else:
+			print(json.dumps({**info.model_dump(), 'cdp_url': info.cdp_url}))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,106 @@
+"""
+Per-step network, console and long task diagnostics.
+
+Only attached when `Browser(collect_diagnostics=True)`, otherwise no listeners or init scripts
+are installed at all.
+"""
+
+import asyncio
+import logging
+
+from playwright.async_api import ConsoleMessage, Page, Request
+
+from browser_use.browser.views import RequestTiming, StepDiagnostics
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_REQUESTS = 5
+
+LONG_TASK_OBSERVER = """
+(() => {
+	window.__browserUseLongTasks = [];
+	try {
+		new PerformanceObserver((list) => {
+			for (const entry of list.getEntries()) window.__browserUseLongTasks.push(entry.duration);
+		}).observe({type: 'longtask', buffered: true});
+	} catch (e) {}
+})();
+"""
+
+
+class DiagnosticsCollector:
+	"""Collects page activity between two calls of collect()"""
+
+	def __init__(self):
+		self._requests: list[RequestTiming] = []
+		self._failed: list[str] = []
+		self._console_errors: list[str] = []
+		self._pending: set[asyncio.Task] = set()
+
+	def attach(self, page: Page) -> None:
+		page.on('requestfinished', self._on_request_finished)
+		page.on('requestfailed', self._on_request_failed)
+		page.on('console', self._on_console)
+		page.on('pageerror', lambda error: self._console_errors.append(f'Uncaught: {error}'))
+
+	def _on_request_finished(self, request: Request) -> None:
+		# sizes() is a protocol round trip, don't block the event dispatch on it
+		task = asyncio.ensure_future(self._record(request))
+		self._pending.add(task)
+		task.add_done_callback(self._pending.discard)
+
+	def _on_request_failed(self, request: Request) -> None:
+		self._failed.append(f'{request.method} {request.url} ({request.failure})')
+
+	def _on_console(self, message: ConsoleMessage) -> None:
+		if message.type == 'error':
+			self._console_errors.append(message.text)
+
+	async def _record(self, request: Request) -> None:
+		timing = request.timing
+		try:
+			sizes = await request.sizes()
+			size = sizes['responseBodySize'] + sizes['responseHeadersSize']
+		except Exception:
+			# the page or request is gone already
+			size = 0
+
+		self._requests.append(
+			RequestTiming(
+				url=request.url,
+				method=request.method,
+				resource_type=request.resource_type,
+				duration_ms=max(timing['responseEnd'], 0),
+				blocked_ms=max(timing['requestStart'], 0),
+				bytes=size,
+			)
+		)
+
+	async def collect(self, page: Page) -> StepDiagnostics:
+		"""Summary of everything since the last call, then starts over"""
+		if self._pending:
+			await asyncio.gather(*self._pending, return_exceptions=True)
+
+		try:
+			long_tasks: list[float] = await page.evaluate(
+				'window.__browserUseLongTasks ? window.__browserUseLongTasks.splice(0) : []'
+			)
+		except Exception:
+			long_tasks = []
+
+		requests, self._requests = self._requests, []
+		failed, self._failed = self._failed, []
+		console_errors, self._console_errors = self._console_errors, []
+
+		return StepDiagnostics(
+			request_count=len(requests) + len(failed),
+			failed_requests=failed,
+			bytes_received=sum(r.bytes for r in requests),
+			blocked_ms=sum(r.blocked_ms for r in requests),
+			slowest_requests=sorted(requests, key=lambda r: r.duration_ms, reverse=True)[
+				:SLOWEST_REQUESTS
+			],
+			console_errors=console_errors,
+			long_tasks=len(long_tasks),
+			long_task_ms=sum(long_tasks),
+		)
@@ -0,0 +1,248 @@
+"""
+Client for the local API of the Dolphin Anty app.
+
+One client keeps one pooled HTTP session, so all calls reuse their keep-alive connections, and
+logs in again only when the login the app returned expires (or when the app answers 401). Connection errors, 5xx and
+429 responses are retried with exponential backoff. Latency is recorded per endpoint.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Optional
+
+import aiohttp
+
+from browser_use.browser.views import BrowserError, EndpointStats
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DolphinApiError(BrowserError):
+	def __init__(self, message: str, status: Optional[int] = None):
+		super().__init__(message)
+		self.status = status
+
+
+class _Retry(Exception):
+	"""Retryable response, delay is the server's Retry-After if it sent one"""
+
+	def __init__(self, message: str, delay: Optional[float] = None):
+		super().__init__(message)
+		self.delay = delay
+
+
+def automation_ws_url(profile_data: dict) -> str:
+	"""CDP websocket URL from the response of starting a profile with automation"""
+	if not profile_data.get('success') or 'automation' not in profile_data:
+		raise DolphinApiError(f'Failed to start profile: {profile_data}')
+	automation = profile_data['automation']
+	return f'ws://127.0.0.1:{automation["port"]}{automation["wsEndpoint"]}'
+
+
+def token_lifetime(login_data: Any) -> Optional[float]:
+	"""
+	Seconds until the login expires, from the response of logging in: expires_in seconds or an
+	expires_at unix or ISO 8601 timestamp, at the top level or in data. None if the app didn't
+	say.
+	"""
+	if not isinstance(login_data, dict):
+		return None
+	for data in (login_data, login_data.get('data')):
+		if not isinstance(data, dict):
+			continue
+		expires_in = data.get('expires_in', data.get('expiresIn'))
+		if isinstance(expires_in, (int, float)):
+			return float(expires_in)
+
+		expires_at = data.get('expires_at', data.get('expiresAt'))
+		if isinstance(expires_at, str):
+			try:
+				expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00')).timestamp()
+			except ValueError:
+				logger.debug(f'Unknown Dolphin login expiry format: {expires_at}')
+				continue
+		if isinstance(expires_at, (int, float)):
+			return expires_at - time.time()
+	return None
+
+
+class DolphinApiClient:
+	def __init__(
+		self,
+		api_url: str,
+		api_token: Optional[str],
+		token_ttl: float = 1800,
+		max_retries: int = 3,
+		backoff: float = 0.25,
+		timeout: float = 60,
+		max_connections: int = 16,
+	):
+		"""
+		@param token_ttl: Seconds after which we log in again before the next call, when the app
+		doesn't say when the login expires.
+		@param max_retries: Retries per call on connection errors, 5xx and 429.
+		@param backoff: Delay before the first retry, doubled for every further one.
+		@param timeout: Total timeout per request, starting a profile can take a while.
+		"""
+		self.api_url = api_url.rstrip('/')
+		self.api_token = api_token
+		self.token_ttl = token_ttl
+		self.max_retries = max_retries
+		self.backoff = backoff
+		self.timeout = timeout
+		self.max_connections = max_connections
+
+		self.stats: dict[str, EndpointStats] = {}
+		self._session: aiohttp.ClientSession | None = None
+		self._token_expires_at = 0.0
+		# an asyncio.Lock belongs to one event loop, but a client may be used from several (one
+		# asyncio.run per script or test), so there is one lock per loop
+		self._auth_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+			weakref.WeakKeyDictionary()
+		)
+
+	def _auth_lock(self) -> asyncio.Lock:
+		loop = asyncio.get_running_loop()
+		if loop not in self._auth_locks:
+			self._auth_locks[loop] = asyncio.Lock()
+		return self._auth_locks[loop]
+
+	async def _get_session(self) -> aiohttp.ClientSession:
+		if self._session is None or self._session.closed:
+			self._session = aiohttp.ClientSession(
+				connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+				timeout=aiohttp.ClientTimeout(total=self.timeout),
+			)
+		return self._session
+
+	async def close(self) -> None:
+		if self._session is not None and not self._session.closed:
+			await self._session.close()
+		self._session = None
+
+	async def __aenter__(self) -> 'DolphinApiClient':
+		return self
+
+	async def __aexit__(self, *exc_info) -> None:
+		await self.close()
+
+	def _record(self, endpoint: str, elapsed: float, error: bool, retry: bool) -> None:
+		stats = self.stats.setdefault(endpoint, EndpointStats())
+		stats.calls += 1
+		stats.errors += error
+		stats.retries += retry
+		stats.total_ms += elapsed * 1000
+		stats.max_ms = max(stats.max_ms, elapsed * 1000)
+
+	async def _request(
+		self, endpoint: str, method: str, path: str, authenticated: bool = True, **kwargs
+	) -> Any:
+		"""
+		Sends a request and returns the decoded JSON response.
+
+		@param endpoint: Name the latency is recorded under, e.g. 'start_profile'.
+		"""
+		if authenticated:
+			await self.authenticate()
+
+		session = await self._get_session()
+		reauthenticated = False
+		attempt = 0
+		while True:
+			headers = {'Authorization': f'Bearer {self.api_token}'} if authenticated else {}
+			start = time.perf_counter()
+			try:
+				async with session.request(
+					method, f'{self.api_url}{path}', headers=headers, **kwargs
+				) as response:
+					if response.status == 401 and authenticated and not reauthenticated:
+						# the app forgot our login (restarted), log in again once
+						self._record(endpoint, time.perf_counter() - start, error=True, retry=True)
+						self._token_expires_at = 0
+						await self.authenticate()
+						reauthenticated = True
+						continue
+
+					if response.status in RETRY_STATUSES and attempt < self.max_retries:
+						retry_after = response.headers.get('Retry-After')
+						delay = (
+							float(retry_after) if retry_after and retry_after.isdigit() else None
+						)
+						raise _Retry(f'{response.status} {await response.text()}', delay)
+
+					if not response.ok:
+						self._record(endpoint, time.perf_counter() - start, error=True, retry=False)
+						raise DolphinApiError(
+							f'Dolphin API {endpoint} failed: {await response.text()}',
+							status=response.status,
+						)
+
+					data = await response.json(content_type=None)
+					self._record(endpoint, time.perf_counter() - start, error=False, retry=False)
+					return data
+
+			except (_Retry, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+				self._record(endpoint, time.perf_counter() - start, error=True, retry=True)
+				if attempt >= self.max_retries:
+					raise DolphinApiError(
+						f'Dolphin API {endpoint} failed after {attempt + 1} attempts: {str(e)}'
+					) from e
+
+				delay = getattr(e, 'delay', None) or self.backoff * 2**attempt
+				attempt += 1
+				logger.debug(
+					f'Dolphin API {endpoint} failed ({str(e)}), retry {attempt} in {delay:.2f}s'
+				)
+				await asyncio.sleep(delay)
+
+	async def authenticate(self, force: bool = False) -> None:
+		"""Logs in with the API token, unless the last login has not expired yet"""
+		async with self._auth_lock():
+			if not force and time.monotonic() < self._token_expires_at:
+				return
+
+			if not self.api_token:
+				raise DolphinApiError('No Dolphin Anty API token set (DOLPHIN_API_TOKEN)')
+
+			data = await self._request(
+				'login',
+				'POST',
+				'/auth/login-with-token',
+				authenticated=False,
+				json={'token': self.api_token},
+			)
+			lifetime = token_lifetime(data)
+			if lifetime is None:
+				lifetime = self.token_ttl
+			# log in again a little before the app forgets us
+			self._token_expires_at = time.monotonic() + lifetime * 0.9
+
+	async def get_browser_profiles(self) -> list[dict]:
+		data = await self._request('list_profiles', 'GET', '/browser_profiles')
+		return data.get('data', [])
+
+	async def start_profile(self, profile_id: str, headless: bool = False) -> dict:
+		params = {'automation': 1}
+		if headless:
+			params['headless'] = 1
+		return await self._request(
+			'start_profile', 'GET', f'/browser_profiles/{profile_id}/start', params=params
+		)
+
+	async def stop_profile(self, profile_id: str) -> dict:
+		return await self._request('stop_profile', 'GET', f'/browser_profiles/{profile_id}/stop')
+
+	def latency_report(self) -> str:
+		"""One line per endpoint: calls, errors, retries, average and max latency"""
+		lines = []
+		for endpoint, stats in sorted(self.stats.items()):
+			lines.append(
+				f'{endpoint:<16} {stats.calls:>5} calls {stats.errors:>3} errors '
+				f'{stats.retries:>3} retries {stats.avg_ms:>8.1f}ms avg {stats.max_ms:>8.1f}ms max'
+			)
+		return '\n'.join(lines)
@@ -0,0 +1,230 @@
+"""
+Stand-in for the local API of the Dolphin Anty app.
+
+Implements the endpoints DolphinBrowser and DolphinProfilePool use, and starts a plain local
+Chromium with a CDP endpoint for every started profile, so the Dolphin code path can be tested
+and benchmarked without the app:
+
+	async with MockDolphinServer(profiles=3) as server:
+		os.environ['DOLPHIN_API_URL'] = server.api_url
+		os.environ['DOLPHIN_API_TOKEN'] = server.token
+
+or standalone:
+	python -m browser_use.browser.dolphin_mock [--port 3001] [--profiles 3] [--headed]
+"""
+
+import argparse
+import asyncio
+import logging
+import shutil
+import socket
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from subprocess import Popen
+from typing import Optional
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from browser_use.browser import reaper
+from browser_use.browser.daemon import launch_chromium, wait_for_cdp
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/v1.0'
+
+
+def free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+
+@dataclass
+class MockProfile:
+	id: int
+	name: str
+	process: Optional[Popen] = None
+	port: Optional[int] = None
+	ws_endpoint: Optional[str] = None
+
+
+class MockDolphinServer:
+	def __init__(
+		self,
+		port: int = 0,
+		profiles: int = 3,
+		token: str = 'mock-token',
+		headless: bool = True,
+		start_delay: float = 0,
+	):
+		"""
+		@param port: Port of the API, a free one by default.
+		@param profiles: Number of profiles the API lists, with ids 1..n.
+		@param headless: Start the profiles headless even if not asked to, the app itself
+		only does that for `headless=1`.
+		@param start_delay: Extra seconds a profile start takes, to mimic the real app.
+		"""
+		self.port = port
+		self.token = token
+		self.headless = headless
+		self.start_delay = start_delay
+		self.profiles = {
+			i: MockProfile(id=i, name=f'Mock profile {i}') for i in range(1, profiles + 1)
+		}
+		self.requests: list[str] = []
+
+		self._logged_in = False
+		self._runner: web.AppRunner | None = None
+		self._data_dir: Path | None = None
+
+	@property
+	def api_url(self) -> str:
+		return f'http://127.0.0.1:{self.port}{API_PREFIX}'
+
+	async def __aenter__(self) -> 'MockDolphinServer':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info) -> None:
+		await self.stop()
+
+	async def start(self) -> None:
+		app = web.Application(middlewares=[self._log_request])
+		app.router.add_post(f'{API_PREFIX}/auth/login-with-token', self._login)
+		app.router.add_get(f'{API_PREFIX}/browser_profiles', self._list_profiles)
+		app.router.add_get(f'{API_PREFIX}/browser_profiles/{{id}}/start', self._start_profile)
+		app.router.add_get(f'{API_PREFIX}/browser_profiles/{{id}}/stop', self._stop_profile)
+
+		self._data_dir = Path(tempfile.mkdtemp(prefix='browser_use_dolphin_mock_'))
+		self._runner = web.AppRunner(app)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+		await site.start()
+		self.port = self._runner.addresses[0][1]
+		logger.info(f'Mock Dolphin API listening on {self.api_url}')
+
+	async def stop(self) -> None:
+		await asyncio.gather(
+			*(asyncio.to_thread(self._kill, profile) for profile in self.profiles.values())
+		)
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
+		if self._data_dir is not None:
+			shutil.rmtree(self._data_dir, ignore_errors=True)
+			self._data_dir = None
+
+	@web.middleware
+	async def _log_request(self, request: web.Request, handler):
+		self.requests.append(f'{request.method} {request.path}')
+		return await handler(request)
+
+	def _profile(self, request: web.Request) -> MockProfile:
+		try:
+			return self.profiles[int(request.match_info['id'])]
+		except (KeyError, ValueError):
+			raise web.HTTPNotFound(
+				text='{"success": false, "error": "profile not found"}',
+				content_type='application/json',
+			)
+
+	def _require_login(self) -> None:
+		if not self._logged_in:
+			raise web.HTTPUnauthorized(
+				text='{"success": false, "error": "not logged in"}', content_type='application/json'
+			)
+
+	async def _login(self, request: web.Request) -> web.Response:
+		data = await request.json()
+		if data.get('token') != self.token:
+			return web.json_response({'success': False, 'error': 'invalid token'}, status=401)
+		self._logged_in = True
+		return web.json_response({'success': True})
+
+	async def _list_profiles(self, request: web.Request) -> web.Response:
+		self._require_login()
+		profiles = [{'id': p.id, 'name': p.name} for p in self.profiles.values()]
+		return web.json_response({'data': profiles, 'total': len(profiles)})
+
+	async def _start_profile(self, request: web.Request) -> web.Response:
+		self._require_login()
+		profile = self._profile(request)
+		if request.query.get('automation') != '1':
+			return web.json_response(
+				{'success': False, 'error': 'only automation starts are supported'}, status=400
+			)
+
+		if profile.process is None or profile.process.poll() is not None:
+			await asyncio.sleep(self.start_delay)
+			headless = self.headless or request.query.get('headless') == '1'
+			port = free_port()
+			# launching looks up the executable through sync playwright, which refuses to run
+			# inside an event loop, and it must not block the other requests anyway
+			try:
+				profile.process = await asyncio.to_thread(
+					launch_chromium, port, str(self._data_dir / str(profile.id)), headless=headless
+				)
+				reaper.register(profile.process.pid)
+				version = await asyncio.to_thread(wait_for_cdp, port)
+			except Exception as e:
+				await asyncio.to_thread(self._kill, profile)
+				return web.json_response({'success': False, 'error': str(e)}, status=500)
+			profile.port = port
+			profile.ws_endpoint = urlparse(version['webSocketDebuggerUrl']).path
+			logger.debug(f'Started mock profile {profile.id} on port {port}')
+
+		return web.json_response(
+			{
+				'success': True,
+				'automation': {'port': profile.port, 'wsEndpoint': profile.ws_endpoint},
+			}
+		)
+
+	async def _stop_profile(self, request: web.Request) -> web.Response:
+		self._require_login()
+		profile = self._profile(request)
+		await asyncio.to_thread(self._kill, profile)
+		return web.json_response({'success': True})
+
+	def _kill(self, profile: MockProfile) -> None:
+		if profile.process is not None:
+			reaper.kill(profile.process.pid)
+			profile.process.wait()
+		profile.process = profile.port = profile.ws_endpoint = None
+
+	def running_profiles(self) -> list[int]:
+		return [
+			p.id
+			for p in self.profiles.values()
+			if p.process is not None and p.process.poll() is None
+		]
+
+
+async def _serve(args: argparse.Namespace) -> None:
+	async with MockDolphinServer(
+		port=args.port, profiles=args.profiles, token=args.token, headless=not args.headed
+	) as server:
+		print(f'DOLPHIN_API_URL={server.api_url}')
+		print(f'DOLPHIN_API_TOKEN={server.token}')
+		await asyncio.Event().wait()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description='Stand-in for the Dolphin Anty local API')
+	parser.add_argument('--port', type=int, default=3001)
+	parser.add_argument('--profiles', type=int, default=3)
+	parser.add_argument('--token', default='mock-token')
+	parser.add_argument('--headed', action='store_true', help='Show the profile browser windows')
+	args = parser.parse_args(argv)
+
+	logging.basicConfig(level=logging.INFO)
+	try:
+		asyncio.run(_serve(args))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == '__main__':
+	main()
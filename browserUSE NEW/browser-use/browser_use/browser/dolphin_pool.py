@@ -0,0 +1,205 @@
+"""
+Pool of running Dolphin Anty profiles for agents that run in parallel.
+
+Profiles are started in parallel and attached to over CDP, every profile is used by at most one
+agent at a time:
+
+	async with DolphinProfilePool(profile_ids, size=4) as pool:
+		async with pool.lease() as browser:
+			controller.set_browser(browser)
+			...
+
+A profile is health checked before it's handed out and restarted if its browser is gone.
+Profiles that weren't leased for idle_ttl seconds are stopped, and started again on demand.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from browser_use.browser.dolphin_api import DolphinApiClient, automation_ws_url
+from browser_use.browser.service import Browser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledProfile:
+	profile_id: str
+	browser: Browser | None = None  # None while the profile is stopped
+	leased: bool = False
+	last_used: float = 0.0
+	restarts: int = 0
+
+
+class DolphinProfilePool:
+	def __init__(
+		self,
+		profile_ids: list[str],
+		api_client: Optional[DolphinApiClient] = None,
+		headless: bool = False,
+		idle_ttl: float = 300,
+		health_check_timeout: float = 5,
+		**browser_kwargs,
+	):
+		"""
+		@param profile_ids: Dolphin profiles the pool may run, one agent per profile at a time.
+		@param api_client: Client for the Dolphin API, by default one for DOLPHIN_API_URL.
+		@param idle_ttl: Seconds after which a profile that isn't leased is stopped.
+		@param browser_kwargs: Passed on to the Browser that attaches to each profile.
+		"""
+		if not profile_ids:
+			raise ValueError('A profile pool needs at least one profile id')
+
+		self._owns_api_client = api_client is None
+		self.api = api_client or DolphinApiClient(
+			os.getenv('DOLPHIN_API_URL', 'http://localhost:3001/v1.0'),
+			os.getenv('DOLPHIN_API_TOKEN'),
+		)
+		self.headless = headless
+		self.idle_ttl = idle_ttl
+		self.health_check_timeout = health_check_timeout
+		self.browser_kwargs = browser_kwargs
+
+		self.profiles = [PooledProfile(profile_id=str(profile_id)) for profile_id in profile_ids]
+		self._available = asyncio.Condition()
+		self._idle_task: asyncio.Task | None = None
+
+	async def __aenter__(self) -> 'DolphinProfilePool':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info) -> None:
+		await self.close()
+
+	async def start(self, count: Optional[int] = None) -> None:
+		"""Starts the first count profiles (all by default) in parallel"""
+		profiles = self.profiles[:count] if count is not None else self.profiles
+		results = await asyncio.gather(
+			*(self._start_profile(profile) for profile in profiles if profile.browser is None),
+			return_exceptions=True,
+		)
+		for result in results:
+			if isinstance(result, Exception):
+				logger.warning(f'Failed to start pooled profile: {str(result)}')
+
+		if self._idle_task is None and self.idle_ttl:
+			self._idle_task = asyncio.create_task(self._stop_idle_profiles())
+
+	async def _start_profile(self, profile: PooledProfile) -> None:
+		start_time = time.time()
+		profile_data = await self.api.start_profile(profile.profile_id, headless=self.headless)
+		try:
+			profile.browser = await self._connect(automation_ws_url(profile_data))
+		except Exception:
+			# don't leave the profile running in Dolphin without a browser attached to it
+			await self._stop_profile(profile)
+			raise
+		profile.last_used = time.time()
+		logger.debug(f'Started profile {profile.profile_id} in {time.time() - start_time:.2f}s')
+
+	async def _connect(self, cdp_url: str) -> Browser:
+		browser = Browser(cdp_url=cdp_url, headless=self.headless, **self.browser_kwargs)
+		await browser.get_session()
+		return browser
+
+	async def _stop_profile(self, profile: PooledProfile) -> None:
+		browser, profile.browser = profile.browser, None
+		if browser is not None:
+			await browser.close(force=True)
+		try:
+			await self.api.stop_profile(profile.profile_id)
+		except Exception as e:
+			logger.warning(f'Failed to stop profile {profile.profile_id}: {str(e)}')
+
+	async def _is_healthy(self, browser: Browser) -> bool:
+		try:
+			page = await browser.get_current_page()
+			await asyncio.wait_for(page.evaluate('1'), timeout=self.health_check_timeout)
+			return True
+		except Exception:
+			return False
+
+	async def _acquire(self) -> PooledProfile:
+		async with self._available:
+			while True:
+				free = [profile for profile in self.profiles if not profile.leased]
+				if free:
+					# prefer profiles that are already running
+					profile = min(free, key=lambda p: (p.browser is None, -p.last_used))
+					profile.leased = True
+					return profile
+				await self._available.wait()
+
+	async def _release(self, profile: PooledProfile) -> None:
+		async with self._available:
+			profile.leased = False
+			profile.last_used = time.time()
+			self._available.notify()
+
+	@asynccontextmanager
+	async def lease(self) -> AsyncIterator[Browser]:
+		"""Waits for a free profile and yields a healthy browser attached to it"""
+		profile = await self._acquire()
+		try:
+			if profile.browser is not None and not await self._is_healthy(profile.browser):
+				logger.warning(f'Profile {profile.profile_id} is unhealthy, restarting it')
+				profile.restarts += 1
+				await self._stop_profile(profile)
+			if profile.browser is None:
+				await self._start_profile(profile)
+			yield profile.browser
+		finally:
+			await self._release(profile)
+
+	async def _stop_idle_profiles(self) -> None:
+		while True:
+			await asyncio.sleep(self.idle_ttl / 2)
+			now = time.time()
+			async with self._available:
+				# leased under the lock, so nobody can lease them while they are stopped
+				idle = [
+					profile
+					for profile in self.profiles
+					if profile.browser is not None
+					and not profile.leased
+					and now - profile.last_used > self.idle_ttl
+				]
+				for profile in idle:
+					profile.leased = True
+			for profile in idle:
+				logger.debug(f'Stopping profile {profile.profile_id}, idle for {self.idle_ttl}s')
+				await self._stop_profile(profile)
+				await self._release(profile)
+
+	def status(self) -> list[dict]:
+		"""Per profile: whether it's running, leased and how often it was restarted"""
+		return [
+			{
+				'profile_id': profile.profile_id,
+				'running': profile.browser is not None,
+				'leased': profile.leased,
+				'restarts': profile.restarts,
+			}
+			for profile in self.profiles
+		]
+
+	async def close(self) -> None:
+		"""Stops all profiles, leased ones included"""
+		if self._idle_task is not None:
+			self._idle_task.cancel()
+			# it may be stopping a profile right now, let that finish before stopping the rest
+			with suppress(asyncio.CancelledError):
+				await self._idle_task
+			self._idle_task = None
+
+		await asyncio.gather(
+			*(self._stop_profile(profile) for profile in self.profiles if profile.browser),
+			return_exceptions=True,
+		)
+		if self._owns_api_client:
+			await self.api.close()
@@ -0,0 +1,92 @@
+"""
+Downloads triggered by the page, saved into a managed directory.
+
+Playwright streams a download to a temporary file on its side while the page keeps going, we
+only move it into place once it's finished. That happens in a background task, so agent steps
+are never blocked by a large file.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from playwright.async_api import Download, Page
+
+from browser_use.browser.views import DownloadInfo
+
+logger = logging.getLogger(__name__)
+
+
+def unique_path(directory: Path, filename: str, taken: Iterable[Path] = ()) -> Path:
+	"""Path in the directory that doesn't exist yet, `report (1).pdf` style"""
+	# the name comes from the server, never let it escape the directory
+	filename = os.path.basename(filename) or 'download'
+	path = directory / filename
+	stem, suffix = path.stem, path.suffix
+	taken = set(taken)
+	counter = 1
+	while path.exists() or path in taken:
+		path = directory / f'{stem} ({counter}){suffix}'
+		counter += 1
+	return path
+
+
+class DownloadManager:
+	"""Saves the downloads of every attached page and keeps track of them"""
+
+	def __init__(self, directory: Optional[str] = None):
+		self._directory = Path(directory) if directory else None
+		self.downloads: list[DownloadInfo] = []
+		self._pending: set[asyncio.Task] = set()
+		# paths handed out but not yet written, so two downloads never pick the same name
+		self._reserved: set[Path] = set()
+
+	@property
+	def directory(self) -> Path:
+		if self._directory is None:
+			self._directory = Path(tempfile.mkdtemp(prefix='browser_use_downloads_'))
+		self._directory.mkdir(parents=True, exist_ok=True)
+		return self._directory
+
+	def attach(self, page: Page) -> None:
+		page.on('download', self._on_download)
+
+	def _on_download(self, download: Download) -> None:
+		path = unique_path(self.directory, download.suggested_filename, taken=self._reserved)
+		self._reserved.add(path)
+
+		info = DownloadInfo(
+			url=download.url, suggested_filename=download.suggested_filename, path=str(path)
+		)
+		self.downloads.append(info)
+		logger.info(f'Downloading {download.suggested_filename} to {path}')
+
+		task = asyncio.ensure_future(self._save(download, info, path))
+		self._pending.add(task)
+		task.add_done_callback(self._pending.discard)
+
+	async def _save(self, download: Download, info: DownloadInfo, path: Path) -> None:
+		try:
+			await download.save_as(path)
+			info.size = path.stat().st_size
+			info.status = 'completed'
+			logger.info(f'Downloaded {info.suggested_filename} ({info.size / 1024:.0f} KB)')
+		except Exception as e:
+			info.status = 'failed'
+			info.error = str(e)
+			logger.warning(f'Download of {info.suggested_filename} failed: {str(e)}')
+		finally:
+			self._reserved.discard(path)
+
+	def snapshot(self) -> list[DownloadInfo]:
+		"""Copies of all downloads as they are now, later progress doesn't change them"""
+		return [info.model_copy() for info in self.downloads]
+
+	async def wait(self, timeout: Optional[float] = None) -> list[DownloadInfo]:
+		"""Waits until all running downloads are saved, returns all downloads"""
+		if self._pending:
+			await asyncio.wait(set(self._pending), timeout=timeout)
+		return list(self.downloads)
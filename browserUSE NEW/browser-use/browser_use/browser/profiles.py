@@ -0,0 +1,124 @@
+"""
+Persistent browser profile directories shared per site group.
+
+A profile directory keeps Chromium's HTTP disk cache (and cookies, service workers etc.)
+between runs, so sites that are visited over and over don't re-download their JS bundles and
+CSS. Profiles are grouped by name, e.g. one for all job boards and one for all shops, and the
+least recently used ones are removed once the total size goes over a limit.
+
+A profile directory can only be used by one browser at a time. Chromium marks the one it uses
+with a SingletonLock symlink to "<hostname>-<pid>", pruning leaves those alone.
+"""
+
+import logging
+import os
+import re
+import shutil
+import socket
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = Path.home() / '.cache' / 'browser_use' / 'profiles'
+
+
+def profile_path(group: str, directory: Optional[Path] = None) -> Path:
+	"""Directory of a profile group, marked as just used"""
+	if not re.fullmatch(r'[\w.-]+', group):
+		raise ValueError(f'Invalid profile group name: {group}')
+
+	path = (directory or PROFILES_DIR) / group
+	path.mkdir(parents=True, exist_ok=True)
+	# the directory mtime is what pruning uses to find the least recently used profiles
+	os.utime(path)
+	return path
+
+
+def profile_owner(path: Path) -> Optional[int]:
+	"""Pid of the browser on this host that has the profile directory open, None if unused"""
+	try:
+		target = os.readlink(path / 'SingletonLock')
+	except OSError:
+		return None
+
+	host, _, pid = target.rpartition('-')
+	if host != socket.gethostname() or not pid.isdigit():
+		return None
+	try:
+		os.kill(int(pid), 0)
+	except ProcessLookupError:
+		return None
+	except PermissionError:
+		pass
+	return int(pid)
+
+
+def is_locked(path: Path) -> bool:
+	"""Whether a running browser, on this or another host, has the profile directory open"""
+	try:
+		target = os.readlink(path / 'SingletonLock')
+	except OSError:
+		return False
+	# a lock of another host can't be checked, so it counts as in use
+	return not target.startswith(f'{socket.gethostname()}-') or profile_owner(path) is not None
+
+
+def directory_size(path: Path) -> int:
+	"""Total size of all files below a directory in bytes"""
+	total = 0
+	for root, _, files in os.walk(path):
+		for name in files:
+			try:
+				total += os.lstat(os.path.join(root, name)).st_size
+			except OSError:
+				# Chromium may delete cache entries while we walk
+				continue
+	return total
+
+
+def prune_profiles(
+	max_total_mb: Optional[int] = None,
+	max_age_days: Optional[float] = None,
+	directory: Optional[Path] = None,
+	keep: Iterable[str] = (),
+) -> list[str]:
+	"""
+	Removes profile groups that weren't used for max_age_days and then the least recently used
+	ones until all profiles together are below max_total_mb. Returns the removed groups.
+
+	Groups a running browser has open, e.g. in another worker process, are never removed.
+
+	@param keep: Groups that are never removed, e.g. the one about to be launched.
+	"""
+	directory = directory or PROFILES_DIR
+	if not directory.exists():
+		return []
+
+	keep = set(keep) | {
+		path.name for path in directory.iterdir() if path.is_dir() and is_locked(path)
+	}
+	profiles = sorted(
+		(path for path in directory.iterdir() if path.is_dir() and path.name not in keep),
+		key=lambda path: path.stat().st_mtime,
+	)
+	sizes = {path: directory_size(path) for path in profiles}
+	total = sum(sizes.values()) + sum(
+		directory_size(directory / name) for name in keep if (directory / name).exists()
+	)
+
+	removed = []
+	now = time.time()
+	for path in profiles:
+		too_old = max_age_days is not None and now - path.stat().st_mtime > max_age_days * 86400
+		too_big = max_total_mb is not None and total > max_total_mb * 1024 * 1024
+		if not (too_old or too_big):
+			continue
+
+		shutil.rmtree(path, ignore_errors=True)
+		total -= sizes[path]
+		removed.append(path.name)
+		logger.debug(f'Removed browser profile {path.name} ({sizes[path] / 1024 / 1024:.1f} MB)')
+
+	return removed
@@ -0,0 +1,113 @@
+"""
+Process-level registry of the Chromium processes launched by this process.
+
+Browsers are closed through `Browser.close()` / `async with Browser()`. Whatever is still
+registered when a Browser is garbage collected without being closed, or when the interpreter
+exits, is killed here so long-running workers don't accumulate orphaned browsers.
+"""
+
+import atexit
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# pid -> start time of the process, so a pid reused by another process is never signalled
+_launched: dict[int, Optional[str]] = {}
+
+
+def _start_time(pid: int) -> Optional[str]:
+	"""When the process started, None if it is gone"""
+	if Path('/proc').is_dir():
+		try:
+			# the command name in field 2 may contain spaces, the state is field 3 and the start
+			# time field 22
+			fields = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+		except (OSError, IndexError):
+			return None
+		# an exited process that was not waited for yet is gone as well
+		return fields[19] if len(fields) > 19 and fields[0] != 'Z' else None
+	try:
+		result = subprocess.run(
+			['ps', '-o', 'lstart=', '-p', str(pid)], capture_output=True, text=True, timeout=2
+		)
+	except (OSError, subprocess.TimeoutExpired):
+		return None
+	return result.stdout.strip() or None
+
+
+def register(pid: int) -> None:
+	start_time = _start_time(pid)
+	with _lock:
+		_launched[pid] = start_time
+
+
+def unregister(pid: int) -> None:
+	with _lock:
+		_launched.pop(pid, None)
+
+
+def tracked_pids() -> list[int]:
+	with _lock:
+		return sorted(_launched)
+
+
+def _is_launched(pid: int, start_time: Optional[str]) -> bool:
+	"""Whether the pid still belongs to the process that was registered"""
+	return start_time is not None and _start_time(pid) == start_time
+
+
+def kill(pid: int, timeout: float = 2) -> None:
+	"""SIGTERM, then SIGKILL if the process is still alive after the timeout"""
+	with _lock:
+		start_time = _launched.pop(pid, None)
+	if start_time is None:
+		start_time = _start_time(pid)
+	if not _is_launched(pid, start_time):
+		return
+
+	os.kill(pid, signal.SIGTERM)
+	deadline = time.time() + timeout
+	while _is_launched(pid, start_time) and time.time() < deadline:
+		time.sleep(0.05)
+
+	if _is_launched(pid, start_time):
+		try:
+			os.kill(pid, signal.SIGKILL)
+		except ProcessLookupError:
+			pass
+
+
+def terminate(pid: int) -> None:
+	"""
+	SIGTERM without waiting, safe to call from __del__ (which may run on the event loop).
+
+	The process stays registered, so reap() still kills it at exit if it ignored the signal.
+	Once it has exited its pid may be reused, reap() leaves a process that started later alone.
+	"""
+	with _lock:
+		start_time = _launched.get(pid)
+	if not _is_launched(pid, start_time):
+		unregister(pid)
+		return
+	try:
+		os.kill(pid, signal.SIGTERM)
+	except ProcessLookupError:
+		unregister(pid)
+
+
+def reap() -> None:
+	"""Kills every browser that was launched but never closed"""
+	for pid in tracked_pids():
+		logger.debug(f'Killing leftover browser process {pid}')
+		kill(pid)
+
+
+atexit.register(reap)
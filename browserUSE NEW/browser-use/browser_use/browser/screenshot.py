@@ -0,0 +1,121 @@
+"""
+Screenshot encoding and change detection for vision prompts.
+
+Viewport screenshots are encoded and downscaled by the browser itself (see Browser.get_cdp).
+Pillow is optional and only needed to do the same for full-page screenshots and for the
+perceptual hash - without it only byte-identical screenshots are detected as unchanged.
+"""
+
+import hashlib
+import io
+import logging
+from typing import Optional
+
+from browser_use.browser.views import ScreenshotConfig
+
+try:
+	from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+	Image = None
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 16
+
+
+def needs_reencode(config: ScreenshotConfig) -> bool:
+	"""Whether the raw Playwright output has to be post-processed to match the config"""
+	return config.format == 'webp' or config.max_dimension is not None
+
+
+def capture_type(config: ScreenshotConfig) -> str:
+	"""Image type to request from Playwright (it only supports png and jpeg)"""
+	if config.format == 'jpeg':
+		return 'jpeg'
+	# webp is re-encoded from a lossless capture to avoid compressing twice
+	return 'png'
+
+
+def encode_screenshot(data: bytes, config: ScreenshotConfig) -> tuple[bytes, str]:
+	"""
+	Downscale and re-encode a screenshot according to the config.
+
+	Returns the encoded bytes and the format they are in. If Pillow is not installed the
+	input is returned unchanged in the format it was captured in.
+	"""
+	if not needs_reencode(config):
+		return data, config.format
+
+	if Image is None:
+		logger.warning('Pillow is not installed, screenshots are sent without re-encoding')
+		return data, capture_type(config)
+
+	with Image.open(io.BytesIO(data)) as image:
+		if config.max_dimension and max(image.size) > config.max_dimension:
+			image.thumbnail((config.max_dimension, config.max_dimension), Image.Resampling.LANCZOS)
+
+		output = io.BytesIO()
+		if config.format == 'png':
+			image.save(output, format='PNG', optimize=True)
+		else:
+			if image.mode not in ('RGB', 'L'):
+				image = image.convert('RGB')
+			image.save(output, format=config.format.upper(), quality=config.quality)
+
+		return output.getvalue(), config.format
+
+
+def perceptual_hash(data: bytes) -> Optional[int]:
+	"""
+	Difference hash (dHash) of an image - similar images have hashes with a small hamming distance.
+
+	Returns None if Pillow is not installed.
+	"""
+	if Image is None:
+		return None
+
+	with Image.open(io.BytesIO(data)) as image:
+		small = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR)
+		pixels = list(small.getdata())
+
+	value = 0
+	for row in range(HASH_SIZE):
+		for col in range(HASH_SIZE):
+			left = pixels[row * (HASH_SIZE + 1) + col]
+			right = pixels[row * (HASH_SIZE + 1) + col + 1]
+			value = (value << 1) | (left > right)
+	return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+	return bin(a ^ b).count('1')
+
+
+class ScreenshotChangeDetector:
+	"""Remembers the last screenshot and tells whether a new one looks the same"""
+
+	def __init__(self, threshold: int = 2):
+		self.threshold = threshold
+		self._last_phash: Optional[int] = None
+		self._last_digest: Optional[str] = None
+
+	def is_unchanged(self, data: bytes) -> bool:
+		"""Compare with the previous screenshot and remember the new one"""
+		phash = perceptual_hash(data)
+		digest = hashlib.sha1(data).hexdigest() if phash is None else None
+
+		if phash is not None and self._last_phash is not None:
+			unchanged = hamming_distance(phash, self._last_phash) <= self.threshold
+		elif digest is not None and self._last_digest is not None:
+			# without Pillow we can only skip byte-identical screenshots
+			unchanged = digest == self._last_digest
+		else:
+			unchanged = False
+
+		self._last_phash = phash
+		self._last_digest = digest
+		return unchanged
+
+	def reset(self) -> None:
+		self._last_phash = None
+		self._last_digest = None
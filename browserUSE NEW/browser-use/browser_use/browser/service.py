@@ -5,24 +5,66 @@ Playwright browser on steroids.
 import asyncio
 import base64
 import logging
+import os
 import time
 from dataclasses import dataclass
+from pathlib import Path
 
 from playwright.async_api import Browser as PlaywrightBrowser
 from playwright.async_api import BrowserContext, ElementHandle, Page, Playwright, async_playwright
 
-from browser_use.browser.views import BrowserError, BrowserState, TabInfo
+from browser_use.browser import reaper
+from browser_use.browser.cdp import CDPCommands
+from browser_use.browser.daemon import start_daemon
+from browser_use.browser.diagnostics import LONG_TASK_OBSERVER, DiagnosticsCollector
+from browser_use.browser.downloads import DownloadManager
+from browser_use.browser.profiles import profile_owner, profile_path, prune_profiles
+from browser_use.browser.screenshot import (
+	ScreenshotChangeDetector,
+	capture_type,
+	encode_screenshot,
+)
+from browser_use.browser.settle import SETTLE_PROFILES_PATH, SettleProfiles
+from browser_use.browser.speculation import Speculator
+from browser_use.browser.storage_state import StorageStateCache
+from browser_use.browser.views import (
+	ActionTimeouts,
+	BrowserError,
+	BrowserState,
+	HarMode,
+	InputConfig,
+	InputStrategy,
+	ScreenshotConfig,
+	SpeculationStats,
+	TabInfo,
+)
 from browser_use.dom.service import DomService
 from browser_use.dom.views import SelectorMap
-from browser_use.utils import time_execution_sync
+from browser_use.utils import time_execution_async, time_execution_sync
 
 logger = logging.getLogger(__name__)
 
+CHROME_ARGS = [
+	'--no-sandbox',
+	'--disable-blink-features=AutomationControlled',
+	'--disable-extensions',
+	'--disable-infobars',
+	'--disable-background-timer-throttling',
+	'--disable-popup-blocking',
+	'--disable-backgrounding-occluded-windows',
+	'--disable-renderer-backgrounding',
+	'--disable-window-activation',
+	'--disable-focus-on-load',  # Prevents focus on navigation
+	'--no-first-run',
+	'--no-default-browser-check',
+	'--window-position=0,0',
+]
+
 
 @dataclass
 class BrowserSession:
 	playwright: Playwright
-	browser: PlaywrightBrowser
+	browser: PlaywrightBrowser | None  # None for persistent profile contexts
 	context: BrowserContext
 	current_page: Page
 	cached_state: BrowserState
@@ -33,20 +75,119 @@ class BrowserSession:
 class Browser:
 	MINIMUM_WAIT_TIME = 0.5
 	MAXIMUM_WAIT_TIME = 5
-
-	def __init__(self, headless: bool = False, keep_open: bool = False):
+	LOAD_TIMEOUT = 5
+	# how long close() waits for downloads that are still running
+	DOWNLOAD_CLOSE_TIMEOUT = 30
+
+	def __init__(
+		self,
+		headless: bool = False,
+		keep_open: bool = False,
+		screenshot_config: ScreenshotConfig | None = None,
+		cdp_url: str | None = None,
+		use_daemon: bool = False,
+		storage_profile: str | None = None,
+		storage_state_dir: str | None = None,
+		action_timeouts: ActionTimeouts | None = None,
+		input_config: InputConfig | None = None,
+		har_path: str | None = None,
+		har_mode: HarMode = 'replay',
+		speculation_top_k: int = 0,
+		speculation_origins: list[str] | None = None,
+		user_data_dir: str | None = None,
+		profile_group: str | None = None,
+		disk_cache_size_mb: int = 512,
+		profiles_size_limit_mb: int | None = None,
+		collect_diagnostics: bool = False,
+		downloads_dir: str | None = None,
+		upload_dir: str | None = None,
+		adaptive_wait: bool = False,
+	):
+		"""
+		@param cdp_url: Attach to an already running Chromium (http or ws CDP endpoint) instead
+		of launching a new one.
+		@param use_daemon: Attach to the local browser daemon, starting it if it is not running
+		(see browser_use.browser.daemon).
+		@param storage_profile: Name of a saved login profile. Its cookies and storage are restored
+		when the context is created and saved again on close.
+		@param storage_state_dir: Where storage profiles are kept, defaults to ~/.cache/browser_use.
+		@param action_timeouts: Time budgets for clicking and typing into elements.
+		@param input_config: Default strategy for entering text.
+		@param har_path: HAR file to record network traffic to or to replay it from.
+		@param har_mode: 'record' saves all traffic to har_path when the browser is closed,
+		'replay' serves every request from har_path and aborts requests that are not in it.
+		@param speculation_top_k: Prefetch the k most likely next links after every state
+		extraction, 0 disables it. Hit rates are in `speculation_stats`.
+		@param speculation_origins: Origins whose pages may prefetch their (same-origin, side
+		effect free) links, prefetching is off everywhere else.
+		@param user_data_dir: Launch with this persistent profile directory, which keeps the HTTP
+		disk cache between runs.
+		@param profile_group: Like user_data_dir, but uses a managed directory shared by all runs
+		with the same group name (see browser_use.browser.profiles).
+		@param disk_cache_size_mb: Size limit of the HTTP disk cache of a persistent profile.
+		@param profiles_size_limit_mb: Remove the least recently used profile groups before
+		launching until all of them together are below this size.
+		@param collect_diagnostics: Attach network timings, console errors and long tasks since
+		the previous step to every BrowserState.
+		@param downloads_dir: Where downloads are saved, a temporary directory by default.
+		@param upload_dir: The only directory files may be uploaded from, uploads are disabled
+		without one. Paths named by the model can come from a prompt injection, they must never
+		reach ~/.ssh, .env files or saved sessions.
+		@param adaptive_wait: Wait for pages until their meaningful requests are quiet, with a
+		budget learned per domain, instead of the load event plus a fixed minimum
+		(see browser_use.browser.settle).
+		"""
 		self.headless = headless
 		self.keep_open = keep_open
+		self.cdp_url = cdp_url
+		self.use_daemon = use_daemon
+		self.storage_state = (
+			StorageStateCache(storage_profile, storage_state_dir) if storage_profile else None
+		)
+		self.screenshot_config = screenshot_config or ScreenshotConfig()
+		self.action_timeouts = action_timeouts or ActionTimeouts()
+		self.input_config = input_config or InputConfig()
+		self.har_path = har_path
+		self.har_mode = har_mode
+		self._screenshot_changes = ScreenshotChangeDetector(self.screenshot_config.hash_threshold)
+		self._speculator = Speculator(speculation_top_k, speculation_origins)
+		self.user_data_dir = user_data_dir
+		self.profile_group = profile_group
+		self.disk_cache_size_mb = disk_cache_size_mb
+		self.profiles_size_limit_mb = profiles_size_limit_mb
+		self._diagnostics = DiagnosticsCollector() if collect_diagnostics else None
+		self.downloads = DownloadManager(downloads_dir)
+		self.upload_dir = upload_dir
+		self._settle = (
+			SettleProfiles(
+				SETTLE_PROFILES_PATH,
+				max_wait=self.MAXIMUM_WAIT_TIME,
+				fixed_wait=self.MINIMUM_WAIT_TIME,
+				load_timeout=self.LOAD_TIMEOUT,
+			)
+			if adaptive_wait
+			else None
+		)
 
 		# Initialize these as None - they'll be set up when needed
 		self.session: BrowserSession | None = None
+		# Pages that already existed in an attached browser, we leave those open on close
+		self._attached_pages: list[Page] = []
+		self._cdp_sessions: dict[Page, CDPCommands] = {}
+		self._browser_pid: int | None = None
 
 	async def _initialize_session(self):
 		"""Initialize the browser session"""
 		playwright = await async_playwright().start()
-		browser = await self._setup_browser(playwright)
-		context = await self._create_context(browser)
-		page = await context.new_page()
+		if self.user_data_dir or self.profile_group:
+			browser = None
+			context = await self._create_persistent_context(playwright)
+			# a persistent profile opens with a blank tab already
+			page = context.pages[0] if context.pages else await context.new_page()
+		else:
+			browser = await self._setup_browser(playwright)
+			context = await self._create_context(browser)
+			page = await self._first_page(context)
 
 		# Instead of calling _update_state(), create an empty initial state
 		initial_state = BrowserState(
@@ -68,6 +209,10 @@ class Browser:
 
 		return self.session
 
+	async def _first_page(self, context: BrowserContext) -> Page:
+		"""The page a new session starts on"""
+		return await context.new_page()
+
 	async def get_session(self) -> BrowserSession:
 		"""Lazy initialization of the browser and related components"""
 		if self.session is None:
@@ -81,43 +226,136 @@ class Browser:
 
 	async def _setup_browser(self, playwright: Playwright) -> PlaywrightBrowser:
 		"""Sets up and returns a Playwright Browser instance with anti-detection measures."""
+		if self.use_daemon and not self.cdp_url:
+			info = await asyncio.to_thread(start_daemon, headless=self.headless)
+			self.cdp_url = info.cdp_url
+
+		if self.cdp_url:
+			try:
+				return await playwright.chromium.connect_over_cdp(self.cdp_url)
+			except Exception as e:
+				logger.error(f'Failed to connect to browser at {self.cdp_url}: {str(e)}')
+				raise
+
 		try:
 			browser = await playwright.chromium.launch(
 				headless=self.headless,
 				ignore_default_args=['--enable-automation'],  # Helps with anti-detection
-				args=[
-					'--no-sandbox',
-					'--disable-blink-features=AutomationControlled',
-					'--disable-extensions',
-					'--disable-infobars',
-					'--disable-background-timer-throttling',
-					'--disable-popup-blocking',
-					'--disable-backgrounding-occluded-windows',
-					'--disable-renderer-backgrounding',
-					'--disable-window-activation',
-					'--disable-focus-on-load',  # Prevents focus on navigation
-					'--no-first-run',
-					'--no-default-browser-check',
-					'--no-startup-window',  # Prevents initial focus
-					'--window-position=0,0',
-				],
+				args=CHROME_ARGS + ['--no-startup-window'],  # Prevents initial focus
 			)
 
+			await self._register_browser_process(browser)
 			return browser
 		except Exception as e:
 			logger.error(f'Failed to initialize Playwright browser: {str(e)}')
 			raise
 
-	async def _create_context(self, browser: PlaywrightBrowser):
-		"""Creates a new browser context with anti-detection measures."""
-		context = await browser.new_context(
-			viewport={'width': 1280, 'height': 1024},
-			user_agent=(
+	async def _register_browser_process(self, browser: PlaywrightBrowser) -> None:
+		"""Remembers the pid of a launched browser so the reaper can kill it if it leaks"""
+		try:
+			cdp = await browser.new_browser_cdp_session()
+			info = await cdp.send('SystemInfo.getProcessInfo')
+			await cdp.detach()
+		except Exception as e:
+			logger.debug(f'Could not get browser process id: {str(e)}')
+			return
+
+		for process in info.get('processInfo', []):
+			if process.get('type') == 'browser':
+				self._browser_pid = process['id']
+				reaper.register(self._browser_pid)
+				return
+
+	def _context_options(self) -> dict:
+		return {
+			'viewport': {'width': 1280, 'height': 1024},
+			'user_agent': (
 				'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
 				'(KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36'
 			),
-			java_script_enabled=True,
+			'java_script_enabled': True,
+			'accept_downloads': True,
+		}
+
+	def _load_storage_state(self) -> dict | None:
+		storage_state = self.storage_state.load() if self.storage_state else None
+		if storage_state:
+			logger.info(
+				f'Restoring storage profile {self.storage_state.profile} '
+				f'({len(storage_state["cookies"])} cookies)'
+			)
+		return storage_state
+
+	async def _create_persistent_context(self, playwright: Playwright) -> BrowserContext:
+		"""Launches Chromium with a persistent profile directory, so its HTTP cache survives"""
+		if self.profile_group:
+			if self.profiles_size_limit_mb is not None:
+				prune_profiles(self.profiles_size_limit_mb, keep=[self.profile_group])
+			user_data_dir = str(profile_path(self.profile_group))
+		else:
+			user_data_dir = self.user_data_dir
+
+		logger.debug(f'Using persistent browser profile {user_data_dir}')
+		context = await playwright.chromium.launch_persistent_context(
+			user_data_dir,
+			headless=self.headless,
+			ignore_default_args=['--enable-automation'],
+			args=CHROME_ARGS + [f'--disk-cache-size={self.disk_cache_size_mb * 1024 * 1024}'],
+			**self._context_options(),
 		)
+		# there is no Browser to ask for the process info, but Chromium locks the profile
+		# directory with its pid
+		self._browser_pid = profile_owner(Path(user_data_dir))
+		if self._browser_pid:
+			reaper.register(self._browser_pid)
+
+		storage_state = self._load_storage_state()
+		if storage_state:
+			await context.add_cookies(storage_state['cookies'])
+
+		await self._setup_context(context)
+		return context
+
+	async def _create_context(self, browser: PlaywrightBrowser):
+		"""Creates a new browser context with anti-detection measures."""
+		storage_state = self._load_storage_state()
+
+		if self.cdp_url and browser.contexts:
+			# The default context of an attached browser shares its disk cache, cookies and
+			# DNS cache across runs - that is the whole point of attaching, so reuse it.
+			context = browser.contexts[0]
+			self._attached_pages = list(context.pages)
+			if storage_state:
+				# localStorage can only be restored for new contexts
+				await context.add_cookies(storage_state['cookies'])
+		else:
+			context = await browser.new_context(
+				**self._context_options(),
+				storage_state=storage_state,
+			)
+
+		await self._setup_context(context)
+		return context
+
+	async def _setup_context(self, context: BrowserContext) -> None:
+		"""Routing and anti-detection measures that every context gets"""
+		if self.har_path:
+			await self._route_from_har(context)
+
+		for page in context.pages:
+			self.downloads.attach(page)
+		context.on('page', self.downloads.attach)
+
+		if self._settle:
+			for page in context.pages:
+				self._settle.attach(page)
+			context.on('page', self._settle.attach)
+
+		if self._diagnostics:
+			await context.add_init_script(LONG_TASK_OBSERVER)
+			for page in context.pages:
+				self._diagnostics.attach(page)
+			context.on('page', self._diagnostics.attach)
 
 		# Expose anti-detection scripts
 		await context.add_init_script(
@@ -150,7 +388,38 @@ class Browser:
 			"""
 		)
 
-		return context
+	async def get_cdp(self, page: Page | None = None) -> CDPCommands:
+		"""
+		Raw CDP commands for a page (the current one by default).
+
+		One CDP session is kept per page and dropped when the page closes.
+		"""
+		page = page or await self.get_current_page()
+		if page not in self._cdp_sessions:
+			self._cdp_sessions[page] = await CDPCommands.for_page(page)
+			page.once('close', lambda closed_page: self._cdp_sessions.pop(closed_page, None))
+		return self._cdp_sessions[page]
+
+	@property
+	def speculation_stats(self) -> SpeculationStats:
+		"""Prefetch predictions and how many of them were hits"""
+		return self._speculator.stats
+
+	async def _route_from_har(self, context: BrowserContext) -> None:
+		"""Records traffic into or replays it from the HAR file"""
+		if self.har_mode == 'record':
+			if self.cdp_url:
+				# the default context of an attached browser can't be closed, so it never saves
+				raise BrowserError('HAR recording is not supported for CDP-attached browsers')
+			logger.info(f'Recording network traffic to {self.har_path}')
+			await context.route_from_har(
+				self.har_path, update=True, update_content='embed', update_mode='full'
+			)
+		else:
+			if not os.path.exists(self.har_path):
+				raise BrowserError(f'HAR file to replay not found: {self.har_path}')
+			logger.info(f'Replaying network traffic from {self.har_path}')
+			await context.route_from_har(self.har_path, not_found='abort')
 
 	async def wait_for_page_load(self, timeout_overwrite: float | None = None):
 		"""
@@ -159,12 +428,16 @@ class Browser:
 		"""
 		page = await self.get_current_page()
 
+		if self._settle:
+			await self._settle.wait(page)
+			return
+
 		# Start timing
 		start_time = time.time()
 
 		# Wait for page load
 		try:
-			await page.wait_for_load_state('load', timeout=5000)
+			await page.wait_for_load_state('load', timeout=self.LOAD_TIMEOUT * 1000)
 		except Exception:
 			pass
 
@@ -180,27 +453,159 @@ class Browser:
 		if remaining > 0:
 			await asyncio.sleep(remaining)
 
+	def settle_report(self) -> str:
+		"""Learned settle times per domain and the time saved by adaptive waiting"""
+		if not self._settle:
+			raise BrowserError('Browser was created without adaptive_wait')
+		return self._settle.report()
+
+	async def __aenter__(self) -> 'Browser':
+		await self.get_session()
+		return self
+
+	async def __aexit__(self, *exc_info) -> None:
+		await self.close(force=True)
+
 	async def close(self, force: bool = False):
-		"""Close the browser instance"""
-		if force and not self.keep_open:
-			session = await self.get_session()
-			await session.browser.close()
+		"""
+		Close the browser instance.
+
+		With keep_open the browser stays open unless force is set. The teardown is shielded, so
+		cancelling the caller doesn't leave a half closed browser behind.
+		"""
+		if self.session is None or (self.keep_open and not force):
+			return
+
+		await asyncio.shield(self._teardown())
+
+	async def _teardown(self) -> None:
+		session = self.session
+		if session is None:
+			return
+
+		if self.storage_state:
+			try:
+				await self.save_storage_state()
+			except Exception as e:
+				logger.warning(f'Failed to save storage profile: {str(e)}')
+
+		# downloads are saved through the context, so they have to finish before it closes
+		await self.downloads.wait(timeout=self.DOWNLOAD_CLOSE_TIMEOUT)
+
+		self.session = None
+		self._cdp_sessions.clear()
+
+		if self._settle:
+			try:
+				self._settle.save()
+			except OSError as e:
+				logger.warning(f'Failed to save settle profiles: {str(e)}')
+
+		try:
+			if self.cdp_url:
+				# Only close the tabs we opened, the attached browser keeps running
+				opened_pages = [p for p in session.context.pages if p not in self._attached_pages]
+				await asyncio.gather(*(p.close() for p in opened_pages), return_exceptions=True)
+			elif session.browser is None:
+				# persistent profile, closing its context closes the browser
+				await session.context.close()
+			else:
+				# Closing contexts also writes recorded HAR files
+				await asyncio.gather(
+					*(context.close() for context in session.browser.contexts),
+					return_exceptions=True,
+				)
+			if session.browser is not None:
+				# For attached browsers this only disconnects
+				await session.browser.close()
+		except Exception as e:
+			logger.warning(f'Error while closing browser: {str(e)}')
+		finally:
 			await session.playwright.stop()
+			if self._browser_pid:
+				reaper.unregister(self._browser_pid)
+				self._browser_pid = None
+
+	async def reset_context(self) -> None:
+		"""
+		Starts over without the cookies, storage and tabs of earlier runs, the browser process
+		keeps running. A launched browser gets a fresh context. A persistent profile keeps its
+		context (and HTTP cache), its cookies are cleared and its extra tabs closed instead. An
+		attached browser only loses the tabs we opened, sharing its cookies is why one attaches.
+		"""
+		session = self.session
+		if session is None:
+			return
+
+		if self.storage_state:
+			try:
+				await self.save_storage_state()
+			except Exception as e:
+				logger.warning(f'Failed to save storage profile: {str(e)}')
+		await self.downloads.wait(timeout=self.DOWNLOAD_CLOSE_TIMEOUT)
+
+		if session.browser is not None and not self.cdp_url:
+			old_context = session.context
+			session.context = await self._create_context(session.browser)
+			session.current_page = await session.context.new_page()
+			# Closing contexts also writes recorded HAR files
+			await old_context.close()
 		else:
-			# Note: input() is blocking - consider an async alternative if needed
-			# input('Press Enter to close Browser...')
-			self.keep_open = False
-			await self.close(force=True)
+			if not self.cdp_url:
+				await session.context.clear_cookies()
+			pages = [p for p in session.context.pages if p not in self._attached_pages]
+			keep = pages[0] if pages else await session.context.new_page()
+			await asyncio.gather(
+				*(p.close() for p in pages if p is not keep), return_exceptions=True
+			)
+			await keep.goto('about:blank')
+			session.current_page = keep
+
+		session.cached_state = BrowserState(
+			items=[],
+			selector_map={},
+			url=session.current_page.url,
+			title='',
+			screenshot=None,
+			tabs=[],
+		)
 
 	def __del__(self):
-		"""Async cleanup when object is destroyed"""
-		if self.session is not None:
-			asyncio.run(self.close(force=True))
+		"""Kill the browser process if the browser was never closed"""
+		if getattr(self, 'session', None) is not None and getattr(self, '_browser_pid', None):
+			logger.warning('Browser was not closed, use `async with Browser()` or `await close()`')
+			# never block here, garbage collection may run on the event loop
+			reaper.terminate(self._browser_pid)
+
+	async def save_storage_state(self) -> list[str]:
+		"""
+		Saves cookies, localStorage and (if supported by Playwright) IndexedDB of the current
+		context into the storage profile. Returns the sites that were saved.
+		"""
+		if not self.storage_state:
+			raise BrowserError('Browser was created without a storage_profile')
+
+		session = await self.get_session()
+		try:
+			state = await session.context.storage_state(indexed_db=True)
+		except TypeError:
+			# indexed_db was added in Playwright 1.51
+			state = await session.context.storage_state()
+
+		sites = self.storage_state.save(state)
+		logger.debug(f'Saved storage profile {self.storage_state.profile}: {", ".join(sites)}')
+		return sites
 
 	async def navigate_to(self, url: str):
 		"""Navigate to a URL"""
 		page = await self.get_current_page()
-		await page.goto(url)
+		try:
+			await page.goto(url)
+		except Exception as e:
+			# a URL that serves a file aborts the navigation, the download handler takes over
+			if 'Download is starting' not in str(e):
+				raise
+			logger.debug(f'{url} started a download')
 		await self.wait_for_page_load()
 
 	async def refresh_page(self):
@@ -256,9 +661,23 @@ class Browser:
 		dom_service = DomService(page)
 		content = await dom_service.get_clickable_elements()  # Assuming this is async
 
+		if self._speculator.top_k:
+			self._speculator.record_navigation(page.url)
+
 		screenshot_b64 = None
+		screenshot_format = self.screenshot_config.format
+		screenshot_unchanged = False
 		if use_vision:
-			screenshot_b64 = await self.take_screenshot(selector_map=content.selector_map)
+			screenshot, screenshot_format = await self._capture_screenshot(
+				selector_map=content.selector_map
+			)
+			if self.screenshot_config.skip_unchanged and self._screenshot_changes.is_unchanged(
+				screenshot
+			):
+				logger.debug('Screenshot unchanged since last step, not sending it again')
+				screenshot_unchanged = True
+			else:
+				screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
 
 		self.current_state = BrowserState(
 			items=content.items,
@@ -267,10 +686,49 @@ class Browser:
 			title=await page.title(),
 			tabs=await self.get_tabs_info(),
 			screenshot=screenshot_b64,
+			screenshot_format=screenshot_format,
+			screenshot_unchanged=screenshot_unchanged,
+			diagnostics=await self._diagnostics.collect(page) if self._diagnostics else None,
+			# copies, so the history keeps the status each step saw
+			downloads=self.downloads.snapshot(),
 		)
 
+		if self._speculator.top_k:
+			# after the screenshot, so the hints can't show up in it
+			await self._speculator.speculate(page, content.selector_map)
+
 		return self.current_state
 
+	async def get_tabs_state(self, page_ids: list[int] | None = None) -> dict[int, BrowserState]:
+		"""
+		Extracts the state of several tabs (all by default) concurrently.
+
+		Each tab gets its own DomService, the current tab and its cached state are not changed.
+		No screenshots are taken since background tabs aren't rendered.
+		"""
+		session = await self.get_session()
+		pages = list(session.context.pages)
+		page_ids = list(range(len(pages))) if page_ids is None else page_ids
+
+		for page_id in page_ids:
+			if not -len(pages) <= page_id < len(pages):
+				raise BrowserError(f'No tab found with page_id: {page_id}')
+
+		tabs = await self.get_tabs_info()
+
+		async def extract(page: Page) -> BrowserState:
+			content = await DomService(page).get_clickable_elements()
+			return BrowserState(
+				items=content.items,
+				selector_map=content.selector_map,
+				url=page.url,
+				title=await page.title(),
+				tabs=tabs,
+			)
+
+		states = await asyncio.gather(*(extract(pages[page_id]) for page_id in page_ids))
+		return dict(zip(page_ids, states))
+
 	# region - Browser Actions
 
 	async def take_screenshot(
@@ -279,125 +737,278 @@ class Browser:
 		"""
 		Returns a base64 encoded screenshot of the current page.
 		"""
-		page = await self.get_current_page()
-
-		if selector_map:
-			await self.highlight_selector_map_elements(selector_map)
+		screenshot, _ = await self._capture_screenshot(selector_map, full_page=full_page)
+		return base64.b64encode(screenshot).decode('utf-8')
 
-		screenshot = await page.screenshot(
-			full_page=full_page,
-			animations='disabled',
-		)
+	@time_execution_async('--capture_screenshot')
+	async def _capture_screenshot(
+		self, selector_map: SelectorMap | None, full_page: bool = False
+	) -> tuple[bytes, str]:
+		"""
+		Captures a screenshot encoded according to the screenshot config.
 
-		screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
+		Returns the image bytes and their format.
+		"""
+		page = await self.get_current_page()
+		config = self.screenshot_config
 
 		if selector_map:
-			await self.remove_highlights()
+			await self.highlight_selector_map_elements(selector_map)
 
-		return screenshot_b64
+		try:
+			if full_page and not config.clip_to_viewport:
+				screenshot_type = capture_type(config)
+				screenshot = await page.screenshot(
+					full_page=True,
+					animations='disabled',
+					type=screenshot_type,
+					quality=config.quality if screenshot_type == 'jpeg' else None,
+					# device pixels are thrown away anyway when we downscale
+					scale='css' if config.max_dimension else 'device',
+				)
+				return encode_screenshot(screenshot, config)
+
+			# Viewport screenshots skip Playwright: the browser encodes (webp too) and
+			# downscales itself, so no re-encoding is needed afterwards
+			cdp = await self.get_cdp(page)
+			metrics = await cdp.layout_metrics()
+			viewport = metrics['cssVisualViewport']
+			device_pixel_ratio = (
+				metrics.get('visualViewport', viewport)['clientWidth'] / viewport['clientWidth']
+			)
+			scale = 1.0
+			if config.max_dimension:
+				longest_side = max(viewport['clientWidth'], viewport['clientHeight'])
+				scale = min(1.0, config.max_dimension / (longest_side * device_pixel_ratio))
+			# like animations='disabled' of the Playwright path, otherwise two screenshots of an
+			# unchanged page differ and the change detection never skips one
+			await cdp.freeze_animations()
+			try:
+				screenshot = await cdp.screenshot(
+					format=config.format,
+					quality=config.quality,
+					clip={
+						'x': viewport['pageX'],
+						'y': viewport['pageY'],
+						'width': viewport['clientWidth'],
+						'height': viewport['clientHeight'],
+						'scale': scale,
+					},
+				)
+			finally:
+				await cdp.resume_animations()
+			return screenshot, config.format
+		finally:
+			if selector_map:
+				await self.remove_highlights()
 
 	async def highlight_selector_map_elements(self, selector_map: SelectorMap):
-		page = await self.get_current_page()
-		await self.remove_highlights()
-
-		script = """
-		const highlights = {
-		"""
-
-		# Build the highlights object with all selectors and indices
-		for index, selector in selector_map.items():
-			# Adjusting the JavaScript code to accept variables
-			script += f'"{index}": "{selector}",\n'
-
-		script += """
-		};
-		
-		for (const [index, selector] of Object.entries(highlights)) {
-			const el = document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-			if (!el) continue;  // Skip if element not found
-			el.style.outline = "2px solid red";
-			el.setAttribute('browser-user-highlight-id', 'playwright-highlight');
-			
-			const label = document.createElement("div");
-			label.className = 'playwright-highlight-label';
-			label.style.position = "fixed";
-			label.style.background = "red";
-			label.style.color = "white";
-			label.style.padding = "2px 6px";
-			label.style.borderRadius = "10px";
-			label.style.fontSize = "12px";
-			label.style.zIndex = "9999999";
-			label.textContent = index;
-			const rect = el.getBoundingClientRect();
-			label.style.top = (rect.top - 20) + "px";
-			label.style.left = rect.left + "px";
-			document.body.appendChild(label);
-		}
-		"""
-
-		await page.evaluate(script)
-
-	async def remove_highlights(self):
 		"""
-		Removes all highlight outlines and labels created by highlight_selector_map_elements
+		Draws a box and index label for every element of the selector map.
 
+		Everything is painted onto a single canvas overlay in one evaluate call, all element
+		rects are read before anything is written so the page is laid out only once, and the
+		page's own elements are never touched.
 		"""
 		page = await self.get_current_page()
 		await page.evaluate(
 			"""
-			// Remove all highlight outlines
-			const highlightedElements = document.querySelectorAll('[browser-user-highlight-id="playwright-highlight"]');
-			highlightedElements.forEach(el => {
-				el.style.outline = '';
-				el.removeAttribute('browser-user-highlight-id');
-			});
-			
-
-			// Remove all labels
-			const labels = document.querySelectorAll('.playwright-highlight-label');
-			labels.forEach(label => label.remove());
-			"""
+			(highlights) => {
+				const overlayId = 'browser-use-highlight-overlay';
+				document.getElementById(overlayId)?.remove();
+
+				const width = window.innerWidth;
+				const height = window.innerHeight;
+
+				// Read all rects first - no DOM writes in between, so no forced relayouts
+				const rects = [];
+				for (const [index, xpath] of Object.entries(highlights)) {
+					let el = null;
+					try {
+						el = document.evaluate(
+							xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+						).singleNodeValue;
+					} catch (e) {
+						continue;
+					}
+					if (!el || !el.getBoundingClientRect) continue;
+					const rect = el.getBoundingClientRect();
+					if (rect.width === 0 || rect.height === 0) continue;
+					if (rect.bottom < 0 || rect.right < 0 || rect.top > height || rect.left > width) continue;
+					rects.push([index, rect.left, rect.top, rect.width, rect.height]);
+				}
+
+				const ratio = window.devicePixelRatio || 1;
+				const canvas = document.createElement('canvas');
+				canvas.id = overlayId;
+				canvas.width = width * ratio;
+				canvas.height = height * ratio;
+				canvas.style.cssText =
+					`position:fixed;top:0;left:0;width:${width}px;height:${height}px;` +
+					'pointer-events:none;z-index:2147483647;';
+
+				const ctx = canvas.getContext('2d');
+				ctx.scale(ratio, ratio);
+				ctx.lineWidth = 2;
+				ctx.strokeStyle = 'red';
+				ctx.font = '12px sans-serif';
+				ctx.textBaseline = 'middle';
+				for (const [index, left, top, w, h] of rects) {
+					ctx.strokeRect(left, top, w, h);
+
+					const labelWidth = ctx.measureText(index).width + 12;
+					const labelTop = Math.max(top - 18, 0);
+					ctx.fillStyle = 'red';
+					ctx.beginPath();
+					ctx.roundRect(left, labelTop, labelWidth, 16, 8);
+					ctx.fill();
+					ctx.fillStyle = 'white';
+					ctx.fillText(index, left + 6, labelTop + 8);
+				}
+
+				document.documentElement.appendChild(canvas);
+				return rects.length;
+			}
+			""",
+			{str(index): xpath for index, xpath in selector_map.items()},
 		)
 
+	async def remove_highlights(self):
+		"""
+		Removes the overlay created by highlight_selector_map_elements
+		"""
+		page = await self.get_current_page()
+		await page.evaluate("document.getElementById('browser-use-highlight-overlay')?.remove()")
+
 	# endregion
 
 	# region - User Actions
 
-	async def _input_text_by_xpath(self, xpath: str, text: str):
+	async def _get_element_by_xpath(self, xpath: str) -> ElementHandle:
+		"""
+		Resolves an element from the last extracted state without polling.
+
+		Only if the element is missing while the document is still loading do we wait for it,
+		a missing element on a loaded page is a stale index and fails immediately.
+		"""
 		page = await self.get_current_page()
+		element = await page.query_selector(f'xpath={xpath}')
 
-		try:
-			element = await page.wait_for_selector(f'xpath={xpath}', timeout=5000, state='visible')
+		if element is None and await page.evaluate("document.readyState !== 'complete'"):
+			logger.debug(f'Page still loading, waiting for element {xpath}')
+			element = await page.wait_for_selector(
+				f'xpath={xpath}', timeout=self.action_timeouts.wait_for_element, state='visible'
+			)
 
-			if element is None:
-				raise Exception(f'Element with xpath: {xpath} not found')
+		if element is None:
+			raise BrowserError(f'Element with xpath: {xpath} not found')
 
-			await element.scroll_into_view_if_needed(timeout=2500)
-			await element.fill('')
-			await element.type(text)
+		return element
+
+	async def _input_text_by_xpath(
+		self,
+		xpath: str,
+		text: str,
+		strategy: InputStrategy | None = None,
+		type_delay: int | None = None,
+	) -> float:
+		"""
+		Enters text into an element and returns the seconds spent entering it.
+
+		@param strategy: How to enter the text, defaults to the browser's input config.
+		@param type_delay: Milliseconds between key presses for 'type' and 'hybrid'.
+		"""
+		strategy = strategy or self.input_config.strategy
+		delay = self.input_config.type_delay if type_delay is None else type_delay
+
+		try:
+			element = await self._get_element_by_xpath(xpath)
+			await element.scroll_into_view_if_needed(timeout=self.action_timeouts.input)
+
+			start_time = time.time()
+			if strategy == 'fill':
+				strategy = await self._fill_or_type(element, text, delay)
+			elif strategy == 'insert_text':
+				await element.fill('')
+				await element.focus()
+				cdp = await self.get_cdp()
+				await cdp.insert_text(text)
+			elif strategy == 'hybrid':
+				# fill the bulk, type the tail so key listeners (autocomplete etc.) still fire
+				split = max(len(text) - self.input_config.hybrid_typed_chars, 0)
+				await element.fill(text[:split])
+				await element.press('End')
+				await element.type(text[split:], delay=delay)
+			else:
+				await element.fill('')
+				await element.type(text, delay=delay)
+			elapsed = time.time() - start_time
+
+			logger.debug(
+				f'--Entered {len(text)} characters via {strategy} in {elapsed:.2f} seconds'
+			)
 			await self.wait_for_page_load()
+			return elapsed
 
 		except Exception as e:
 			raise Exception(
 				f'Failed to input text into element with xpath: {xpath}. Error: {str(e)}'
 			)
 
+	async def _fill_or_type(self, element: ElementHandle, text: str, delay: int) -> InputStrategy:
+		"""
+		Fills the element, or types the text if it can't be filled (custom widgets) or the value
+		doesn't stick (inputs that reset programmatic changes). Returns the strategy used.
+		"""
+		try:
+			await element.fill(text)
+			if await element.evaluate("(el, text) => !('value' in el) || el.value === text", text):
+				return 'fill'
+			logger.debug('--Value did not stick after fill, typing it instead')
+		except Exception as e:
+			logger.debug(f'--Fill failed, typing instead: {str(e)}')
+
+		try:
+			await element.fill('')
+		except Exception:
+			pass
+		await element.focus()
+		await element.type(text, delay=delay)
+		return 'type'
+
 	async def _click_element_by_xpath(self, xpath: str):
 		"""
 		Optimized method to click an element using xpath.
+
+		Clicks the element's center directly if it is on screen and not covered, otherwise falls
+		back to a Playwright click with a short budget and finally to a js click.
 		"""
 		page = await self.get_current_page()
 
 		try:
-			element = await page.wait_for_selector(f'xpath={xpath}', timeout=5000, state='visible')
-
-			if element is None:
-				raise Exception(f'Element with xpath: {xpath} not found')
-
-			# await element.scroll_into_view_if_needed()
+			element = await self._get_element_by_xpath(xpath)
+
+			# Center of the element if it's in the viewport and the topmost element there
+			point = await page.evaluate(
+				"""(el) => {
+					const rect = el.getBoundingClientRect();
+					if (rect.width === 0 || rect.height === 0) return null;
+					const x = rect.left + rect.width / 2;
+					const y = rect.top + rect.height / 2;
+					if (x < 0 || y < 0 || x > window.innerWidth || y > window.innerHeight) return null;
+					const top = document.elementFromPoint(x, y);
+					return top && (top === el || el.contains(top)) ? {x, y} : null;
+				}""",
+				element,
+			)
+			if point:
+				cdp = await self.get_cdp(page)
+				await cdp.click(point['x'], point['y'])
+				await self.wait_for_page_load()
+				return
 
 			try:
-				await element.click(timeout=2500)
+				await element.click(timeout=self.action_timeouts.click)
 				await self.wait_for_page_load()
 				return
 			except Exception:
@@ -413,6 +1024,46 @@ class Browser:
 		except Exception as e:
 			raise Exception(f'Failed to click element with xpath: {xpath}. Error: {str(e)}')
 
+	def _resolve_upload_path(self, path: str) -> str:
+		"""
+		Real path of a file in upload_dir, relative paths are relative to it. Symlinks are
+		resolved first, so a link inside upload_dir can't point outside of it.
+		"""
+		if self.upload_dir is None:
+			raise BrowserError('File uploads are disabled, create the Browser with an upload_dir')
+
+		upload_dir = Path(self.upload_dir).expanduser().resolve()
+		resolved = (upload_dir / Path(path).expanduser()).resolve()
+		if not resolved.is_relative_to(upload_dir):
+			raise BrowserError(f'Only files in {upload_dir} may be uploaded, not {path}')
+		if not resolved.is_file():
+			raise BrowserError(f'File to upload not found: {path}')
+		return str(resolved)
+
+	async def _upload_file_by_xpath(self, xpath: str, path: str) -> None:
+		"""
+		Uploads a file from disk through a file input, or through the file chooser the element
+		opens when clicked (custom upload buttons).
+
+		Only the path is handed to Playwright, which lets a local browser read the file itself
+		and streams it in chunks to a remote one, it is never read into memory here.
+		"""
+		path = self._resolve_upload_path(path)
+		page = await self.get_current_page()
+		element = await self._get_element_by_xpath(xpath)
+
+		is_file_input = await element.evaluate(
+			"(el) => el.tagName === 'INPUT' && el.type === 'file'"
+		)
+		if is_file_input:
+			await element.set_input_files(path)
+		else:
+			async with page.expect_file_chooser(timeout=self.action_timeouts.click) as chooser:
+				await element.click(timeout=self.action_timeouts.click)
+			await (await chooser.value).set_files(path)
+
+		await self.wait_for_page_load()
+
 	async def get_tabs_info(self) -> list[TabInfo]:
 		"""Get information about all tabs"""
 		session = await self.get_session()
@@ -467,9 +1118,6 @@ class Browser:
 		return selector_map[index]
 
 	async def get_element_by_index(self, index: int) -> ElementHandle | None:
-		page = await self.get_current_page()
-		return await page.wait_for_selector(
-			await self.get_xpath(index), timeout=2500, state='visible'
-		)
+		return await self._get_element_by_xpath(await self.get_xpath(index))
 
 	# endregion
@@ -0,0 +1,283 @@
+"""
+Adaptive waiting for pages to settle, learned per domain.
+
+Waiting for `networkidle` never ends early on pages with analytics beacons, websockets or
+long-polling requests, it always runs into its timeout. Instead we wait until the requests
+that matter (documents, scripts, xhr, ...) were quiet for a short window and ignore the rest:
+
+- beacons, websockets, event streams and known analytics hosts are never waited for
+- a request that stays open longer than long_poll_after is a long-poll, it's remembered for
+  the domain and ignored from the start next time
+- the wait budget of a domain follows its recent settle times instead of a fixed timeout
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page, Request
+
+from browser_use.browser.views import SettleProfile
+
+logger = logging.getLogger(__name__)
+
+SETTLE_PROFILES_PATH = Path.home() / '.cache' / 'browser_use' / 'settle_profiles.json'
+
+IGNORED_RESOURCE_TYPES = {'websocket', 'eventsource', 'ping', 'beacon'}
+IGNORED_HOSTS = (
+	'google-analytics.com',
+	'googletagmanager.com',
+	'doubleclick.net',
+	'googlesyndication.com',
+	'connect.facebook.net',
+	'hotjar.com',
+	'segment.io',
+	'mixpanel.com',
+	'sentry.io',
+	'clarity.ms',
+	'newrelic.com',
+	'nr-data.net',
+)
+MAX_SAMPLES = 20
+
+
+def request_key(url: str) -> str:
+	"""URL without query and fragment, long-polls usually differ only in their query"""
+	parts = urlsplit(url)
+	return f'{parts.netloc}{parts.path}'
+
+
+def domain_of(url: str) -> str:
+	return urlsplit(url).hostname or ''
+
+
+def merge_profiles(
+	on_disk: SettleProfile, base: SettleProfile, ours: SettleProfile
+) -> SettleProfile:
+	"""
+	Adds what we learned since loading `base` to what is on disk now, which may include what
+	other runs learned in the meantime.
+	"""
+	new_waits = ours.waits - base.waits
+	new_samples = ours.samples[-new_waits:] if new_waits > 0 else []
+	return SettleProfile(
+		samples=(on_disk.samples + new_samples)[-MAX_SAMPLES:],
+		long_poll_urls=on_disk.long_poll_urls
+		+ [url for url in ours.long_poll_urls if url not in on_disk.long_poll_urls],
+		waits=on_disk.waits + new_waits,
+		timeouts=on_disk.timeouts + ours.timeouts - base.timeouts,
+		waited_s=on_disk.waited_s + ours.waited_s - base.waited_s,
+		saved_s=on_disk.saved_s + ours.saved_s - base.saved_s,
+	)
+
+
+class SettleProfiles:
+	"""Per-domain settle times and long-poll URLs, optionally persisted as JSON"""
+
+	def __init__(
+		self,
+		path: Optional[Path] = None,
+		quiet_window: float = 0.3,
+		long_poll_after: float = 2,
+		max_wait: float = 5,
+		fixed_wait: float = 0.5,
+		load_timeout: float = 5,
+	):
+		"""
+		@param quiet_window: Seconds without meaningful requests after which a page is settled.
+		@param long_poll_after: Seconds after which an open request is treated as a long-poll.
+		@param max_wait: Budget for domains we know nothing about, and the upper bound for all.
+		@param fixed_wait, load_timeout: The wait we are compared against in `saved_s`: the load
+		event, for at most load_timeout seconds, but at least fixed_wait seconds.
+		"""
+		self.path = path
+		self.quiet_window = quiet_window
+		self.long_poll_after = long_poll_after
+		self.max_wait = max_wait
+		self.fixed_wait = fixed_wait
+		self.load_timeout = load_timeout
+		self.profiles: dict[str, SettleProfile] = self._load()
+		# as loaded, so save() can tell what we added
+		self._loaded = {domain: p.model_copy(deep=True) for domain, p in self.profiles.items()}
+
+		# per page: open meaningful requests with their start time, and the last activity
+		self._in_flight: dict[Page, dict[Request, float]] = {}
+		self._ignored_in_flight: dict[Page, set[Request]] = {}
+		self._last_activity: dict[Page, float] = {}
+
+	def _load(self) -> dict[str, SettleProfile]:
+		if self.path is None or not self.path.exists():
+			return {}
+		try:
+			data = json.loads(self.path.read_text())
+			return {domain: SettleProfile.model_validate(p) for domain, p in data.items()}
+		except Exception as e:
+			logger.warning(f'Failed to load settle profiles from {self.path}: {str(e)}')
+			return {}
+
+	def save(self) -> None:
+		"""Merges what was learned since loading into the file, other runs may have saved too"""
+		if self.path is None:
+			return
+		profiles = self._load()
+		for domain, profile in self.profiles.items():
+			base = self._loaded.get(domain, SettleProfile())
+			if profile != base:
+				profiles[domain] = merge_profiles(
+					profiles.get(domain, SettleProfile()), base, profile
+				)
+
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		# per process, so two runs saving at once don't write into the same temporary file
+		tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+		tmp_path.write_text(
+			json.dumps({domain: p.model_dump() for domain, p in profiles.items()}, indent=1)
+		)
+		# atomic, readers never see a half written file
+		os.replace(tmp_path, self.path)
+
+		self.profiles = profiles
+		self._loaded = {domain: p.model_copy(deep=True) for domain, p in profiles.items()}
+
+	def profile(self, domain: str) -> SettleProfile:
+		return self.profiles.setdefault(domain, SettleProfile())
+
+	def is_ignored(self, request: Request, domain: str) -> bool:
+		"""Whether a request is never worth waiting for on pages of this domain"""
+		if request.resource_type in IGNORED_RESOURCE_TYPES:
+			return True
+		host = domain_of(request.url)
+		if any(host == h or host.endswith(f'.{h}') for h in IGNORED_HOSTS):
+			return True
+		profile = self.profiles.get(domain)
+		return profile is not None and request_key(request.url) in profile.long_poll_urls
+
+	def budget(self, domain: str) -> float:
+		"""How long to wait at most: 1.5x the recent 90th percentile settle time"""
+		profile = self.profiles.get(domain)
+		if profile is None or len(profile.samples) < 3:
+			return self.max_wait
+		samples = sorted(profile.samples)
+		p90 = samples[min(int(len(samples) * 0.9), len(samples) - 1)]
+		return min(max(p90 * 1.5, self.quiet_window * 2), self.max_wait)
+
+	def attach(self, page: Page) -> None:
+		self._in_flight[page] = {}
+		self._ignored_in_flight[page] = set()
+		self._last_activity[page] = time.monotonic()
+		page.on('request', lambda request: self._on_request(page, request))
+		page.on('requestfinished', lambda request: self._on_request_done(page, request))
+		page.on('requestfailed', lambda request: self._on_request_done(page, request))
+		page.once('close', self._detach)
+
+	def _detach(self, page: Page) -> None:
+		self._in_flight.pop(page, None)
+		self._ignored_in_flight.pop(page, None)
+		self._last_activity.pop(page, None)
+
+	def _on_request(self, page: Page, request: Request) -> None:
+		if page not in self._in_flight:
+			return
+		if self.is_ignored(request, domain_of(page.url)):
+			self._ignored_in_flight[page].add(request)
+			return
+		self._in_flight[page][request] = time.monotonic()
+		self._last_activity[page] = time.monotonic()
+
+	def _on_request_done(self, page: Page, request: Request) -> None:
+		if page not in self._in_flight:
+			return
+		self._ignored_in_flight[page].discard(request)
+		if self._in_flight[page].pop(request, None) is not None:
+			self._last_activity[page] = time.monotonic()
+
+	async def wait(self, page: Page, max_wait: Optional[float] = None) -> float:
+		"""
+		Waits until the page's meaningful requests are quiet, returns the seconds waited.
+
+		@param max_wait: Overrides the learned budget of the page's domain.
+		"""
+		domain = domain_of(page.url)
+		budget = max_wait if max_wait is not None else self.budget(domain)
+		start = time.monotonic()
+		load_event = asyncio.create_task(self._wait_for_load(page, start))
+
+		try:
+			await page.wait_for_load_state('domcontentloaded', timeout=budget * 1000)
+		except Exception:
+			pass
+
+		timed_out = False
+		long_polls: set[str] = set()
+		while page in self._in_flight:
+			now = time.monotonic()
+			pending = []
+			for request, started in self._in_flight[page].items():
+				if now - started > self.long_poll_after:
+					long_polls.add(request_key(request.url))
+				else:
+					pending.append(request)
+
+			if not pending and now - self._last_activity[page] >= self.quiet_window:
+				break
+			if now - start >= budget:
+				timed_out = True
+				break
+			await asyncio.sleep(0.05)
+
+		elapsed = time.monotonic() - start
+		# one turn for the load task, in case the event fired before it got to run
+		await asyncio.sleep(0)
+		if load_event.done():
+			fixed_wait = max(load_event.result(), self.fixed_wait)
+		else:
+			# the fixed wait would still be waiting for the load event, so at least this long
+			load_event.cancel()
+			fixed_wait = max(elapsed, self.fixed_wait)
+		self._record(domain, elapsed, timed_out, long_polls, fixed_wait)
+		return elapsed
+
+	async def _wait_for_load(self, page: Page, start: float) -> float:
+		"""Seconds until the load event, as the fixed wait sees it"""
+		try:
+			await page.wait_for_load_state('load', timeout=self.load_timeout * 1000)
+		except Exception:
+			pass
+		return time.monotonic() - start
+
+	def _record(
+		self, domain: str, elapsed: float, timed_out: bool, long_polls: set[str], fixed_wait: float
+	) -> None:
+		profile = self.profile(domain)
+		profile.waits += 1
+		profile.timeouts += timed_out
+		profile.waited_s += elapsed
+		# negative when waiting for the requests took longer than the load event
+		profile.saved_s += fixed_wait - elapsed
+		profile.samples = (profile.samples + [elapsed])[-MAX_SAMPLES:]
+		for url in long_polls - set(profile.long_poll_urls):
+			logger.debug(f'Ignoring long-poll request {url} on {domain} from now on')
+			profile.long_poll_urls.append(url)
+
+		logger.debug(
+			f'--Page settled in {elapsed:.2f}s on {domain}'
+			+ (' (budget exhausted)' if timed_out else '')
+		)
+
+	def report(self) -> str:
+		"""Per domain: waits, average wait, timeouts and time saved vs the fixed wait"""
+		lines = []
+		for domain, profile in sorted(self.profiles.items(), key=lambda item: -item[1].saved_s):
+			average = profile.waited_s / profile.waits if profile.waits else 0
+			lines.append(
+				f'{domain:<40} {profile.waits:>4} waits {average:>6.2f}s avg '
+				f'{profile.timeouts:>3} timeouts {profile.saved_s:>8.1f}s saved'
+			)
+		total = sum(profile.saved_s for profile in self.profiles.values())
+		lines.append(f'Time saved compared to the fixed wait after the load event: {total:.1f}s')
+		return '\n'.join(lines)
@@ -0,0 +1,147 @@
+"""
+Speculative prefetching of the links the agent is most likely to follow next.
+
+While the LLM decides on the next action the browser is idle. After each state extraction the
+link targets of the selector map are ranked (visible, large and early on the page first) and
+`<link rel=prefetch>` hints are injected for the top-k, so the document download of the eventual
+navigation is already done.
+
+A prefetch is a GET with the user's cookies, so it is opt-in per origin and only same-origin
+links are prefetched that can't have side effects: no logout, delete or unsubscribe links, no
+`?action=` URLs, no downloads and nothing the site marked rel=nofollow.
+"""
+
+import logging
+import re
+from urllib.parse import urldefrag, urlsplit
+
+from playwright.async_api import Page
+
+from browser_use.browser.views import SpeculationStats
+from browser_use.dom.views import SelectorMap
+
+logger = logging.getLogger(__name__)
+
+# matched against the url and the link text
+UNSAFE_LINK = re.compile(
+	r'log[-_ ]?(out|off)|sign[-_ ]?out|delete|remove|unsubscribe|cancel|[?&]action=',
+	re.IGNORECASE,
+)
+
+CANDIDATES_SCRIPT = """
+(xpaths) => {
+	const current = location.href.split('#')[0];
+	const candidates = new Map();
+	xpaths.forEach((xpath, order) => {
+		let el = null;
+		try {
+			el = document.evaluate(
+				xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+			).singleNodeValue;
+		} catch (e) {
+			return;
+		}
+		const anchor = el && el.closest && el.closest('a[href]');
+		if (!anchor || anchor.target === '_blank') return;
+
+		const url = anchor.href.split('#')[0];
+		if (!/^https?:/.test(url) || url === current || candidates.has(url)) return;
+
+		const rect = anchor.getBoundingClientRect();
+		const inViewport = rect.bottom > 0 && rect.top < window.innerHeight && rect.width > 0;
+		const score =
+			(inViewport ? 10 : 0) +
+			Math.log1p(rect.width * rect.height) -
+			order / Math.max(xpaths.length, 1);
+		candidates.set(url, {
+			url,
+			score,
+			rel: anchor.rel,
+			text: (anchor.innerText || anchor.title || '').trim().slice(0, 100),
+			download: anchor.hasAttribute('download'),
+		});
+	});
+
+	return [...candidates.values()].sort((a, b) => b.score - a.score);
+}
+"""
+
+PREFETCH_SCRIPT = """
+(urls) => {
+	document.querySelectorAll('link[data-browser-use-speculation]').forEach(link => link.remove());
+	urls.forEach(url => {
+		const link = document.createElement('link');
+		link.rel = 'prefetch';
+		link.href = url;
+		link.setAttribute('data-browser-use-speculation', '');
+		document.head.appendChild(link);
+	});
+}
+"""
+
+
+def normalize_url(url: str) -> str:
+	return urldefrag(url).url.rstrip('/')
+
+
+def origin_of(url: str) -> str:
+	parts = urlsplit(url)
+	return f'{parts.scheme}://{parts.netloc}'.lower()
+
+
+def is_safe_to_prefetch(candidate: dict, page_url: str) -> bool:
+	"""Whether fetching a link ahead of time can't change anything for the user"""
+	url = candidate['url']
+	if origin_of(url) != origin_of(page_url):
+		return False
+	if candidate.get('download') or 'nofollow' in candidate.get('rel', '').lower().split():
+		return False
+	return not (UNSAFE_LINK.search(url) or UNSAFE_LINK.search(candidate.get('text', '')))
+
+
+class Speculator:
+	"""Prefetches likely next navigations and keeps track of how often it guessed right"""
+
+	def __init__(self, top_k: int = 3, origins: list[str] | None = None):
+		"""
+		@param origins: Origins (e.g. 'https://example.com') whose pages may prefetch their links,
+		nothing is prefetched anywhere else.
+		"""
+		self.top_k = top_k
+		self.origins = {origin_of(origin) for origin in origins or []}
+		if top_k and not self.origins:
+			logger.warning('Speculation is enabled for no origin, nothing will be prefetched')
+		self.stats = SpeculationStats()
+		self._predicted: set[str] = set()
+		self._last_url: str | None = None
+
+	def record_navigation(self, url: str) -> None:
+		"""Called with the page url of every new state to count hits"""
+		url = normalize_url(url)
+		if self._last_url is not None and url != self._last_url:
+			self.stats.navigations += 1
+			if url in self._predicted:
+				self.stats.hits += 1
+				logger.debug(f'Speculation hit: {url}')
+		self._last_url = url
+
+	async def speculate(self, page: Page, selector_map: SelectorMap) -> list[str]:
+		"""Injects prefetch hints for the top-k safe links of the selector map"""
+		if not self.top_k or origin_of(page.url) not in self.origins:
+			self._predicted = set()
+			return []
+
+		try:
+			candidates: list[dict] = await page.evaluate(
+				CANDIDATES_SCRIPT, list(selector_map.values())
+			)
+			urls = [c['url'] for c in candidates if is_safe_to_prefetch(c, page.url)][: self.top_k]
+			await page.evaluate(PREFETCH_SCRIPT, urls)
+		except Exception as e:
+			# the page may navigate away while we are evaluating
+			logger.debug(f'Speculation failed: {str(e)}')
+			urls = []
+
+		self._predicted = {normalize_url(url) for url in urls}
+		self.stats.predictions += len(urls)
+		return urls
@@ -0,0 +1,138 @@
+"""
+On-disk cache of Playwright storage state (cookies, localStorage, IndexedDB) per named profile.
+
+Each profile is a directory with one JSON file per site, so logging into one site never
+overwrites the saved session of another and single sites can be dropped without touching the
+rest of the profile.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+from urllib.parse import urlparse
+
+try:
+	import tldextract
+
+	# the snapshot of the public suffix list shipped with the package, never fetched
+	_extract = tldextract.TLDExtract(suffix_list_urls=())
+except ImportError:  # pragma: no cover - depends on the environment
+	_extract = None
+
+logger = logging.getLogger(__name__)
+
+STORAGE_STATE_DIR = Path.home() / '.cache' / 'browser_use' / 'storage_state'
+
+StorageState = dict[str, Any]
+
+
+def site_for_host(host: str) -> str:
+	"""
+	Registrable part of a host name, e.g. 'news.bbc.co.uk' -> 'bbc.co.uk'.
+
+	Uses the public suffix list of tldextract (the public-suffix extra). Without it sessions are
+	kept per full host name, guessing would merge unrelated sites under suffixes like 'co.uk'.
+	"""
+	host = host.lstrip('.').lower()
+	if _extract is None or re.fullmatch(r'[\d.]+', host):
+		return host
+	parts = _extract(host)
+	if not parts.domain or not parts.suffix:
+		return host
+	return f'{parts.domain}.{parts.suffix}'
+
+
+def split_by_site(state: StorageState) -> dict[str, StorageState]:
+	"""Splits one storage state into one state per site"""
+	sites: dict[str, StorageState] = {}
+
+	def site_state(site: str) -> StorageState:
+		return sites.setdefault(site, {'cookies': [], 'origins': []})
+
+	for cookie in state.get('cookies', []):
+		site_state(site_for_host(cookie['domain']))['cookies'].append(cookie)
+
+	for origin in state.get('origins', []):
+		host = urlparse(origin['origin']).hostname
+		if host:
+			site_state(site_for_host(host))['origins'].append(origin)
+
+	return sites
+
+
+def merge_states(states: Iterable[StorageState]) -> StorageState:
+	"""Combines per-site states into one that can be passed to new_context(storage_state=...)"""
+	now = time.time()
+	merged: StorageState = {'cookies': [], 'origins': []}
+	for state in states:
+		merged['cookies'].extend(
+			cookie
+			for cookie in state.get('cookies', [])
+			# -1 means session cookie
+			if cookie.get('expires', -1) == -1 or cookie['expires'] > now
+		)
+		merged['origins'].extend(state.get('origins', []))
+	return merged
+
+
+class StorageStateCache:
+	"""Saved storage state of one named profile"""
+
+	def __init__(self, profile: str, directory: Optional[str] = None):
+		if not re.fullmatch(r'[\w.-]+', profile):
+			raise ValueError(f'Invalid storage profile name: {profile}')
+		self.profile = profile
+		self.directory = Path(directory) if directory else STORAGE_STATE_DIR
+		self.profile_dir = self.directory / profile
+
+	def path_for(self, site: str) -> Path:
+		return self.profile_dir / f'{site}.json'
+
+	def sites(self) -> list[str]:
+		"""Sites that have a saved state in this profile"""
+		if not self.profile_dir.exists():
+			return []
+		return sorted(path.stem for path in self.profile_dir.glob('*.json'))
+
+	def load(self, sites: Optional[Iterable[str]] = None) -> Optional[StorageState]:
+		"""Saved state for the given sites (all by default), or None if nothing is saved"""
+		states = []
+		for site in sites if sites is not None else self.sites():
+			try:
+				states.append(json.loads(self.path_for(site).read_text()))
+			except FileNotFoundError:
+				continue
+			except ValueError as e:
+				logger.warning(f'Ignoring corrupt storage state for {site}: {e}')
+
+		if not states:
+			return None
+		return merge_states(states)
+
+	def save(self, state: StorageState) -> list[str]:
+		"""Saves the state split by site and returns the sites that were written"""
+		# sessions are as good as passwords, only the user may read them
+		self.profile_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+		written = []
+		for site, site_state in split_by_site(state).items():
+			path = self.path_for(site)
+			tmp_path = path.with_suffix('.json.tmp')
+			fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+			with os.fdopen(fd, 'w') as f:
+				json.dump(site_state, f)
+				f.flush()
+				os.fsync(f.fileno())
+			# atomic, so a crash mid-write never leaves a half written session behind
+			os.replace(tmp_path, path)
+			written.append(site)
+		return written
+
+	def clear(self, site: Optional[str] = None) -> None:
+		"""Removes the saved state of one site or of the whole profile"""
+		paths = [self.path_for(site)] if site else list(self.profile_dir.glob('*.json'))
+		for path in paths:
+			path.unlink(missing_ok=True)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from browser_use.browser.service import Browser
+
+N_RUNS = 50
+
+
+@pytest.fixture
+async def browser():
+	browser_service = Browser(headless=True)
+	yield browser_service
+	await browser_service.close(force=True)
+
+
+async def measure(command) -> float:
+	"""Average latency of an async command in milliseconds"""
+	await command()  # warm up
+	start = time.perf_counter()
+	for _ in range(N_RUNS):
+		await command()
+	return (time.perf_counter() - start) / N_RUNS * 1000
+
+
+async def test_cdp_vs_playwright_latency(browser):
+	page = await browser.get_current_page()
+	await page.set_content(
+		'<html><body style="height: 5000px">'
+		'<input id="field"><button onclick="window.clicks = (window.clicks || 0) + 1">Go</button>'
+		'</body></html>'
+	)
+	cdp = await browser.get_cdp(page)
+	box = await page.locator('button').bounding_box()
+	x, y = box['x'] + box['width'] / 2, box['y'] + box['height'] / 2
+
+	results = {
+		'evaluate': (
+			await measure(lambda: page.evaluate('document.title')),
+			await measure(lambda: cdp.evaluate('document.title')),
+		),
+		'click': (
+			await measure(lambda: page.mouse.click(x, y)),
+			await measure(lambda: cdp.click(x, y)),
+		),
+		'scroll': (
+			await measure(lambda: page.mouse.wheel(0, 10)),
+			await measure(lambda: cdp.scroll(10, x=x, y=y)),
+		),
+		'screenshot': (
+			await measure(lambda: page.screenshot(type='jpeg', quality=80)),
+			await measure(lambda: cdp.screenshot(format='jpeg', quality=80)),
+		),
+		'layout_metrics': (
+			await measure(lambda: page.evaluate('[window.innerWidth, window.innerHeight]')),
+			await measure(cdp.layout_metrics),
+		),
+	}
+
+	print(f'\n{"command":<16}{"playwright ms":>15}{"cdp ms":>10}')
+	for name, (playwright_ms, cdp_ms) in results.items():
+		print(f'{name:<16}{playwright_ms:>15.2f}{cdp_ms:>10.2f}')
+
+	# every click went through, from both paths
+	assert await page.evaluate('window.clicks') == 2 * (N_RUNS + 1)
@@ -0,0 +1,36 @@
+import time
+
+from browser_use.browser.dolphin_api import DolphinApiClient
+from browser_use.browser.dolphin_mock import MockDolphinServer
+from browser_use.browser.dolphin_pool import DolphinProfilePool
+
+N_PROFILES = 4
+
+
+async def test_dolphin_connect_latency():
+	"""Profile start, CDP attach and close through the Dolphin code path, against the mock API"""
+	async with MockDolphinServer(profiles=N_PROFILES) as server:
+		async with DolphinApiClient(server.api_url, server.token) as client:
+			pool = DolphinProfilePool(
+				[str(i) for i in range(1, N_PROFILES + 1)], api_client=client, headless=True
+			)
+
+			start = time.perf_counter()
+			await pool.start()
+			started = time.perf_counter() - start
+
+			start = time.perf_counter()
+			async with pool.lease() as browser:
+				await browser.navigate_to('data:text/html,<title>bench</title>')
+			leased = time.perf_counter() - start
+
+			start = time.perf_counter()
+			await pool.close()
+			closed = time.perf_counter() - start
+
+			print(f'\nstarted {N_PROFILES} profiles in parallel: {started * 1000:.0f}ms')
+			print(f'lease + navigation: {leased * 1000:.0f}ms')
+			print(f'stopped all profiles: {closed * 1000:.0f}ms')
+			print(client.latency_report())
+
+		assert server.running_profiles() == []
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from browser_use.browser.service import Browser
+
+N_ELEMENTS = 1500
+
+# The previous implementation: one outline + one label div per index, removed in a second pass
+LEGACY_HIGHLIGHT = """
+(highlights) => {
+	for (const [index, selector] of Object.entries(highlights)) {
+		const el = document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+		if (!el) continue;
+		el.style.outline = "2px solid red";
+		el.setAttribute('browser-user-highlight-id', 'playwright-highlight');
+
+		const label = document.createElement("div");
+		label.className = 'playwright-highlight-label';
+		label.style.position = "fixed";
+		label.style.background = "red";
+		label.style.color = "white";
+		label.style.padding = "2px 6px";
+		label.style.borderRadius = "10px";
+		label.style.fontSize = "12px";
+		label.style.zIndex = "9999999";
+		label.textContent = index;
+		const rect = el.getBoundingClientRect();
+		label.style.top = (rect.top - 20) + "px";
+		label.style.left = rect.left + "px";
+		document.body.appendChild(label);
+	}
+}
+"""
+
+LEGACY_REMOVE = """
+document.querySelectorAll('[browser-user-highlight-id="playwright-highlight"]').forEach(el => {
+	el.style.outline = '';
+	el.removeAttribute('browser-user-highlight-id');
+});
+document.querySelectorAll('.playwright-highlight-label').forEach(label => label.remove());
+"""
+
+
+@pytest.fixture
+async def browser():
+	browser_service = Browser(headless=True)
+	yield browser_service
+	await browser_service.close(force=True)
+
+
+async def test_highlight_overlay_vs_legacy(browser):
+	page = await browser.get_current_page()
+	buttons = ''.join(f'<button>Button {i}</button>' for i in range(N_ELEMENTS))
+	await page.set_content(f'<html><body>{buttons}</body></html>')
+	selector_map = {i: f'//html[1]/body[1]/button[{i + 1}]' for i in range(N_ELEMENTS)}
+
+	start = time.perf_counter()
+	await browser.highlight_selector_map_elements(selector_map)
+	await browser.remove_highlights()
+	overlay_time = time.perf_counter() - start
+
+	# The page itself must be left untouched
+	mutated = await page.evaluate(
+		"document.querySelectorAll('[style], #browser-use-highlight-overlay').length"
+	)
+	assert mutated == 0
+
+	start = time.perf_counter()
+	await page.evaluate(LEGACY_HIGHLIGHT, {str(i): x for i, x in selector_map.items()})
+	await page.evaluate(LEGACY_REMOVE)
+	legacy_time = time.perf_counter() - start
+
+	print(f'Legacy highlight: {legacy_time * 1000:.1f} ms, overlay: {overlay_time * 1000:.1f} ms')
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
@@ -14,11 +14,118 @@ class TabInfo(BaseModel):
 	title: str
 
 
+class ScreenshotConfig(BaseModel):
+	"""Controls how screenshots for vision models are captured and encoded"""
+
+	format: Literal['png', 'jpeg', 'webp'] = 'png'
+	quality: int = 80  # 0-100, ignored for png
+	max_dimension: Optional[int] = None  # longest side in pixels, None keeps the original size
+	clip_to_viewport: bool = False  # never capture beyond the viewport, even for full_page
+	skip_unchanged: bool = False  # don't resend an image if the viewport looks the same
+	hash_threshold: int = 2  # max differing perceptual hash bits to count as unchanged
+
+
+class ActionTimeouts(BaseModel):
+	"""Time budgets in milliseconds for element actions"""
+
+	click: int = 1000  # playwright click with actionability checks, before falling back to js
+	input: int = 1000  # scrolling the element into view before typing
+	wait_for_element: int = 5000  # only spent if the element is missing while the page loads
+
+
+HarMode = Literal['record', 'replay']
+
+InputStrategy = Literal['fill', 'insert_text', 'type', 'hybrid']
+
+
+class InputConfig(BaseModel):
+	"""How text is entered into input elements"""
+
+	# fill: set the value at once (typed instead if the element can't be filled or the value
+	# doesn't stick), insert_text: one CDP Input.insertText call, type: one key event per
+	# character, hybrid: fill all but the last few characters and type those
+	strategy: InputStrategy = 'fill'
+	type_delay: int = 0  # ms between key presses when typing
+	hybrid_typed_chars: int = 3
+
+
+class SpeculationStats(BaseModel):
+	"""How often the prefetched links were the ones the agent navigated to"""
+
+	predictions: int = 0
+	navigations: int = 0
+	hits: int = 0
+
+	@property
+	def hit_rate(self) -> float:
+		return self.hits / self.navigations if self.navigations else 0.0
+
+
+class EndpointStats(BaseModel):
+	"""Latency of the calls to one API endpoint"""
+
+	calls: int = 0
+	errors: int = 0
+	retries: int = 0
+	total_ms: float = 0
+	max_ms: float = 0
+
+	@property
+	def avg_ms(self) -> float:
+		return self.total_ms / self.calls if self.calls else 0.0
+
+
+class SettleProfile(BaseModel):
+	"""What was learned about how long the pages of one domain take to settle"""
+
+	samples: list[float] = []  # recent settle times in seconds
+	long_poll_urls: list[str] = []  # requests that never finish, ignored from the start
+	waits: int = 0
+	timeouts: int = 0
+	waited_s: float = 0
+	saved_s: float = 0  # compared to the fixed wait after the load event, negative if slower
+
+
+class RequestTiming(BaseModel):
+	url: str
+	method: str
+	resource_type: str
+	duration_ms: float  # from start until the response finished
+	blocked_ms: float  # from start until the request was sent (queueing, dns, connect)
+	bytes: int = 0
+
+
+class StepDiagnostics(BaseModel):
+	"""Network, console and main thread activity since the previous step"""
+
+	request_count: int = 0
+	failed_requests: list[str] = []
+	bytes_received: int = 0
+	blocked_ms: float = 0
+	slowest_requests: list[RequestTiming] = []
+	console_errors: list[str] = []
+	long_tasks: int = 0
+	long_task_ms: float = 0
+
+
+class DownloadInfo(BaseModel):
+	url: str
+	suggested_filename: str
+	path: str  # where the file is (or will be) saved
+	status: Literal['in_progress', 'completed', 'failed'] = 'in_progress'
+	size: int = 0
+	error: Optional[str] = None
+
+
 class BrowserState(ProcessedDomContent):
 	url: str
 	title: str
 	tabs: list[TabInfo]
 	screenshot: Optional[str] = None
+	screenshot_format: Literal['png', 'jpeg', 'webp'] = 'png'
+	screenshot_unchanged: bool = False
+	diagnostics: Optional[StepDiagnostics] = None
+	downloads: list[DownloadInfo] = []
 
 	def model_dump(self) -> dict:
 		dump = super().model_dump()
@@ -30,5 +137,20 @@ class BrowserState(ProcessedDomContent):
 		return dump
 
 
+class DaemonInfo(BaseModel):
+	"""A long-lived local browser process that Browser instances can attach to"""
+
+	pid: int
+	port: int
+	user_data_dir: str
+	headless: bool
+	# webSocketDebuggerUrl of the launched browser, unique per browser run
+	browser_id: str
+
+	@property
+	def cdp_url(self) -> str:
+		return f'http://127.0.0.1:{self.port}'
+
+
 class BrowserError(Exception):
 	"""Base class for all browser errors"""
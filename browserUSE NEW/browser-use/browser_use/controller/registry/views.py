@@ -45,5 +45,5 @@ class ActionRegistry(BaseModel):
 	actions: Dict[str, RegisteredAction] = {}
 
 	def get_prompt_description(self) -> str:
-		"""Get a description of all actions for the prompt"""
-		return '\n'.join([action.prompt_description() for action in self.actions.values()])
+		"""Get a description of all actions for the prompt, in a stable order"""
+		return '\n'.join([self.actions[name].prompt_description() for name in sorted(self.actions)])
@@ -1,35 +1,123 @@
 import logging
+import re
+from collections import Counter
+from typing import Awaitable, Callable, Hashable, Optional
 
 from main_content_extractor import MainContentExtractor
+from playwright.async_api import Page
 
 from browser_use.agent.views import ActionModel, ActionResult
-from browser_use.browser.dolphin_service import DolphinBrowser
+from browser_use.browser.service import Browser
 from browser_use.controller.registry.service import Registry
 from browser_use.controller.views import (
 	ClickElementAction,
 	DoneAction,
 	ExtractPageContentAction,
+	GetTabsContentAction,
 	GoToUrlAction,
 	InputTextAction,
 	OpenTabAction,
 	ScrollAction,
+	ScrollAndHarvestAction,
 	SearchGoogleAction,
 	SwitchTabAction,
+	UploadFileAction,
 )
+from browser_use.dom.service import DomService
 from browser_use.utils import time_execution_sync
 
 logger = logging.getLogger(__name__)
 
+# attributes of an element as rendered by DomService that identify what it shows
+_STABLE_ATTRIBUTE = re.compile(r'\b(data-id|href)="([^"]*)"')
+
+
+def harvest_key(text: str) -> str:
+	"""
+	Identifies an item across scrolls by its data-id or link, otherwise by its text with
+	whitespace collapsed. Never by position: virtualized feeds recycle and shift their rows.
+	"""
+	attributes = dict(_STABLE_ATTRIBUTE.findall(text))
+	for name in ('data-id', 'href'):
+		if attributes.get(name):
+			return f'{name}:{attributes[name]}'
+	return ' '.join(text.split())
+
+
+async def harvest(
+	page: Page,
+	snapshot: Callable[[], Awaitable[list[tuple[Hashable, str]]]],
+	max_scrolls: int,
+	max_items: int,
+	stop_text: Optional[str] = None,
+) -> tuple[list[str], int]:
+	"""
+	Scrolls down until no new content loads and collects the items seen on the way.
+
+	@param snapshot: Returns a (key, text) pair for every item currently on the page. Items with
+	the same key are counted, not dropped: two 'Reply' buttons are two items, seeing them again
+	after a scroll adds nothing.
+	@return: The items in page order and the number of scrolls.
+	"""
+	harvested: list[str] = []
+	seen: Counter = Counter()
+	scrolls = 0
+	idle_scrolls = 0
+
+	while True:
+		counts: Counter = Counter()
+		new_items = []
+		for key, text in await snapshot():
+			counts[key] += 1
+			if counts[key] > seen[key]:
+				new_items.append(text)
+		seen |= counts
+		harvested.extend(new_items)
+
+		if stop_text and any(stop_text in text for text in new_items):
+			break
+		if len(harvested) >= max_items or scrolls >= max_scrolls:
+			break
+
+		# Two scrolls in a row without anything new means we reached the end
+		idle_scrolls = idle_scrolls + 1 if not new_items else 0
+		if idle_scrolls >= 2:
+			break
+
+		height = await page.evaluate('document.documentElement.scrollHeight')
+		await page.evaluate('window.scrollBy(0, window.innerHeight)')
+		scrolls += 1
+		try:
+			# lazy loaded feeds grow the page once they render the next batch
+			await page.wait_for_function(
+				'(height) => document.documentElement.scrollHeight > height',
+				arg=height,
+				timeout=2000,
+			)
+		except Exception:
+			pass
+
+	return harvested[:max_items], scrolls
+
 
 class Controller:
 	def __init__(self, headless: bool = False, keep_open: bool = False):
-		self.browser = None
+		self.headless = headless
+		self.keep_open = keep_open
+		# created on first use, so a browser passed to set_browser() is the only one ever built
+		self._browser: Optional[Browser] = None
 		self.registry = Registry()
 		self._register_default_actions()
 
-	def set_browser(self, browser: DolphinBrowser):
+	@property
+	def browser(self) -> Browser:
+		if self._browser is None:
+			self._browser = Browser(headless=self.headless, keep_open=self.keep_open)
+		return self._browser
+
+	def set_browser(self, browser: Browser):
 		"""Set the browser instance"""
-		self.browser = browser
+		self._browser = browser
 
 	def _register_default_actions(self):
 		"""Register all default browser actions"""
@@ -38,28 +126,22 @@ class Controller:
 		@self.registry.action(
 			'Search Google', param_model=SearchGoogleAction, requires_browser=True
 		)
-		async def search_google(params: SearchGoogleAction, browser: DolphinBrowser):
-			page = browser.page
-			await page.goto(f'https://www.google.com/search?q={params.query}')
-			await browser.wait_for_page_load()
+		async def search_google(params: SearchGoogleAction, browser: Browser):
+			await browser.navigate_to(f'https://www.google.com/search?q={params.query}')
 
 		@self.registry.action('Navigate to URL', param_model=GoToUrlAction, requires_browser=True)
-		async def go_to_url(params: GoToUrlAction, browser: DolphinBrowser):
-			page = browser.page
-			await page.goto(params.url)
-			await browser.wait_for_page_load()
+		async def go_to_url(params: GoToUrlAction, browser: Browser):
+			await browser.navigate_to(params.url)
 
 		@self.registry.action('Go back', requires_browser=True)
-		async def go_back(browser: DolphinBrowser):
-			page = browser.page
-			await page.go_back()
-			await browser.wait_for_page_load()
+		async def go_back(browser: Browser):
+			await browser.go_back()
 
 		# Element Interaction Actions
 		@self.registry.action(
 			'Click element', param_model=ClickElementAction, requires_browser=True
 		)
-		async def click_element(params: ClickElementAction, browser: DolphinBrowser):
+		async def click_element(params: ClickElementAction, browser: Browser):
 			session = await browser.get_session()
 			state = session.cached_state
 
@@ -90,7 +172,7 @@ class Controller:
 			return ActionResult(extracted_content=f'{msg}')
 
 		@self.registry.action('Input text', param_model=InputTextAction, requires_browser=True)
-		async def input_text(params: InputTextAction, browser: DolphinBrowser):
+		async def input_text(params: InputTextAction, browser: Browser):
 			session = await browser.get_session()
 			state = session.cached_state
 
@@ -100,29 +182,60 @@ class Controller:
 				)
 
 			xpath = state.selector_map[params.index]
-			await browser._input_text_by_xpath(xpath, params.text)
-			msg = f'⌨️  Input "{params.text}" into {params.index}: {xpath}'
+			elapsed = await browser._input_text_by_xpath(xpath, params.text)
+			msg = f'⌨️  Input "{params.text}" into {params.index}: {xpath} ({elapsed:.2f}s)'
 			return ActionResult(extracted_content=msg)
 
+		@self.registry.action(
+			'Upload a file from the upload directory through a file input or upload button',
+			param_model=UploadFileAction,
+			requires_browser=True,
+		)
+		async def upload_file(params: UploadFileAction, browser: Browser):
+			session = await browser.get_session()
+			state = session.cached_state
+
+			if params.index not in state.selector_map:
+				raise Exception(
+					f'Element index {params.index} does not exist - retry or use alternative actions'
+				)
+
+			xpath = state.selector_map[params.index]
+			await browser._upload_file_by_xpath(xpath, params.path)
+			return ActionResult(extracted_content=f'📁  Uploaded {params.path} via {params.index}')
+
 		# Tab Management Actions
 		@self.registry.action('Switch tab', param_model=SwitchTabAction, requires_browser=True)
-		async def switch_tab(params: SwitchTabAction, browser: DolphinBrowser):
+		async def switch_tab(params: SwitchTabAction, browser: Browser):
 			await browser.switch_to_tab(params.page_id)
 			# Wait for tab to be ready
 			await browser.wait_for_page_load()
 
 		@self.registry.action('Open new tab', param_model=OpenTabAction, requires_browser=True)
-		async def open_tab(params: OpenTabAction, browser: DolphinBrowser):
+		async def open_tab(params: OpenTabAction, browser: Browser):
 			await browser.create_new_tab(params.url)
 
+		@self.registry.action(
+			'Get the text content of several open tabs at once - if no page_ids are specified, of all tabs',
+			param_model=GetTabsContentAction,
+			requires_browser=True,
+		)
+		async def get_tabs_content(params: GetTabsContentAction, browser: Browser):
+			states = await browser.get_tabs_state(params.page_ids)
+			contents = []
+			for page_id, state in states.items():
+				text = '\n'.join(item.text for item in state.items)
+				contents.append(f'Tab {page_id}: {state.title} ({state.url})\n{text}')
+			return ActionResult(extracted_content='\n\n'.join(contents))
+
 		# Content Actions
 		@self.registry.action(
 			'Extract page content to get the text or markdown ',
 			param_model=ExtractPageContentAction,
 			requires_browser=True,
 		)
-		async def extract_content(params: ExtractPageContentAction, browser: DolphinBrowser):
-			page = browser.page
+		async def extract_content(params: ExtractPageContentAction, browser: Browser):
+			page = await browser.get_current_page()
 
 			content = MainContentExtractor.extract(  # type: ignore
 				html=await page.content(),
@@ -131,7 +244,7 @@ class Controller:
 			return ActionResult(extracted_content=content)
 
 		@self.registry.action('Complete task', param_model=DoneAction, requires_browser=True)
-		async def done(params: DoneAction, browser: DolphinBrowser):
+		async def done(params: DoneAction, browser: Browser):
 			session = await browser.get_session()
 			state = session.cached_state
 			return ActionResult(is_done=True, extracted_content=params.text)
@@ -141,10 +254,11 @@ class Controller:
 			param_model=ScrollAction,
 			requires_browser=True,
 		)
-		async def scroll_down(params: ScrollAction, browser: DolphinBrowser):
-			page = browser.page
+		async def scroll_down(params: ScrollAction, browser: Browser):
+			page = await browser.get_current_page()
 			if params.amount is not None:
-				await page.evaluate(f'window.scrollBy(0, {params.amount});')
+				cdp = await browser.get_cdp(page)
+				await cdp.evaluate(f'window.scrollBy(0, {params.amount});')
 			else:
 				await page.keyboard.press('PageDown')
 
@@ -154,13 +268,32 @@ class Controller:
 			param_model=ScrollAction,
 			requires_browser=True,
 		)
-		async def scroll_up(params: ScrollAction, browser: DolphinBrowser):
-			page = browser.page
+		async def scroll_up(params: ScrollAction, browser: Browser):
+			page = await browser.get_current_page()
 			if params.amount is not None:
-				await page.evaluate(f'window.scrollBy(0, -{params.amount});')
+				cdp = await browser.get_cdp(page)
+				await cdp.evaluate(f'window.scrollBy(0, -{params.amount});')
 			else:
 					await page.keyboard.press('PageUp')
 
+		@self.registry.action(
+			'Scroll down until no new content loads and collect all items on the way - use for feeds, search results and infinite scroll pages instead of scrolling page by page',
+			param_model=ScrollAndHarvestAction,
+			requires_browser=True,
+		)
+		async def scroll_and_harvest(params: ScrollAndHarvestAction, browser: Browser):
+			page = await browser.get_current_page()
+
+			async def snapshot() -> list[tuple[str, str]]:
+				content = await DomService(page).get_clickable_elements()
+				return [(harvest_key(item.text), item.text) for item in content.items]
+
+			items, scrolls = await harvest(
+				page, snapshot, params.max_scrolls, params.max_items, params.stop_text
+			)
+			msg = f'📜  Harvested {len(items)} items in {scrolls} scrolls:\n' + '\n'.join(items)
+			return ActionResult(extracted_content=msg)
+
 	def action(self, description: str, **kwargs):
 		"""Decorator for registering custom actions
 
@@ -22,6 +22,11 @@ class InputTextAction(BaseModel):
 	text: str
 
 
+class UploadFileAction(BaseModel):
+	index: int
+	path: str  # relative to the upload directory of the browser
+
+
 class DoneAction(BaseModel):
 	text: str
 
@@ -34,9 +39,19 @@ class OpenTabAction(BaseModel):
 	url: str
 
 
+class GetTabsContentAction(BaseModel):
+	page_ids: Optional[list[int]] = None  # None means all open tabs
+
+
 class ExtractPageContentAction(BaseModel):
 	value: Literal['text', 'markdown', 'html'] = 'text'
 
 
+class ScrollAndHarvestAction(BaseModel):
+	max_scrolls: int = 20
+	max_items: int = 200
+	stop_text: Optional[str] = None  # stop as soon as an item containing this text shows up
+
+
 class ScrollAction(BaseModel):
 	amount: Optional[int] = None  # The number of pixels to scroll. If None, scroll down/up one page
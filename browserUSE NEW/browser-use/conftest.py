@@ -1,6 +1,9 @@
 import os
 import sys
 
+import pytest
+from aiohttp import web
+
 from browser_use.logging_config import setup_logging
 
 # Get the absolute path to the project root
@@ -8,3 +11,28 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
 setup_logging()
+
+
+@pytest.fixture
+async def fake_server():
+	"""
+	Serves aiohttp routes on a free local port, for stand-ins of HTTP APIs.
+
+	Call it with the routes, it returns the base url. The servers are shut down after the test.
+	"""
+	runners: list[web.AppRunner] = []
+
+	async def serve(routes: list[web.RouteDef]) -> str:
+		app = web.Application()
+		app.add_routes(routes)
+		runner = web.AppRunner(app)
+		await runner.setup()
+		runners.append(runner)
+		await web.TCPSite(runner, '127.0.0.1', 0).start()
+		host, port = runner.addresses[0][:2]
+		return f'http://{host}:{port}'
+
+	yield serve
+
+	for runner in runners:
+		await runner.cleanup()
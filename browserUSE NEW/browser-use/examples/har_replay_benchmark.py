@@ -0,0 +1,63 @@
+"""
+Record a page once, then benchmark DOM extraction and page loads against the frozen copy.
+
+The first run (or --record) saves all network traffic to a HAR file. Every following run
+replays it with requests that are not in the HAR aborted, so timings don't depend on the
+network and the same pages can be measured over and over.
+
+python examples/har_replay_benchmark.py https://kayak.com --record
+python examples/har_replay_benchmark.py https://kayak.com --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from browser_use import Browser
+
+HAR_PATH = 'tmp/benchmark.har'
+
+
+async def record(url: str):
+	os.makedirs(os.path.dirname(HAR_PATH), exist_ok=True)
+	browser = Browser(headless=True, har_path=HAR_PATH, har_mode='record')
+	await browser.navigate_to(url)
+	await browser.get_state()
+	await browser.close(force=True)
+	print(f'Recorded {url} to {HAR_PATH}')
+
+
+async def replay(url: str, runs: int):
+	load_times, state_times = [], []
+	for _ in range(runs):
+		browser = Browser(headless=True, har_path=HAR_PATH, har_mode='replay')
+		# launching Chromium is not part of what is measured
+		await browser.get_session()
+
+		start = time.perf_counter()
+		await browser.navigate_to(url)
+		load_times.append(time.perf_counter() - start)
+
+		start = time.perf_counter()
+		state = await browser.get_state()
+		state_times.append(time.perf_counter() - start)
+
+		await browser.close(force=True)
+
+	print(f'{len(state.selector_map)} interactive elements on {url}')
+	print(f'navigate_to: median {statistics.median(load_times):.3f}s over {runs} runs')
+	print(f'get_state:   median {statistics.median(state_times):.3f}s over {runs} runs')
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('url')
+	parser.add_argument('--record', action='store_true')
+	parser.add_argument('--runs', type=int, default=3)
+	args = parser.parse_args()
+
+	if args.record or not os.path.exists(HAR_PATH):
+		asyncio.run(record(args.url))
+	asyncio.run(replay(args.url, args.runs))
@@ -0,0 +1,75 @@
+"""
+Measure what a persistent profile saves on repeat visits.
+
+Visits the page a few times with a fresh browser each time, once with ephemeral contexts and
+once with a profile group whose HTTP disk cache survives between runs. Prints the bytes
+transferred and the time until the document was interactive per visit. The first visit with
+the profile starts from an empty cache.
+
+python examples/profile_cache_benchmark.py https://www.python.org --runs 3
+"""
+
+import argparse
+import asyncio
+import shutil
+import statistics
+
+from browser_use import Browser
+from browser_use.browser.profiles import PROFILES_DIR
+
+PROFILE_GROUP = 'benchmark'
+
+
+async def visit(browser: Browser, url: str) -> tuple[int, float]:
+	"""Bytes transferred and ms until the document was interactive, for one page load"""
+	page = await browser.get_current_page()
+	cdp = await page.context.new_cdp_session(page)
+	transferred = 0
+
+	def on_loading_finished(event):
+		nonlocal transferred
+		transferred += event['encodedDataLength']
+
+	cdp.on('Network.loadingFinished', on_loading_finished)
+	await cdp.send('Network.enable')
+	await browser.navigate_to(url)
+	interactive = await page.evaluate(
+		'performance.getEntriesByType("navigation")[0].domInteractive'
+	)
+	await cdp.detach()
+	return transferred, interactive
+
+
+async def run(url: str, runs: int, profile_group: str | None) -> list[tuple[int, float]]:
+	results = []
+	for _ in range(runs):
+		async with Browser(headless=True, profile_group=profile_group) as browser:
+			results.append(await visit(browser, url))
+	return results
+
+
+def report(name: str, results: list[tuple[int, float]]):
+	for i, (transferred, interactive) in enumerate(results, 1):
+		print(
+			f'{name} visit {i}: {transferred / 1024:.0f} KB, interactive after {interactive:.0f}ms'
+		)
+	repeat = results[1:] or results
+	print(
+		f'{name} repeat visits: median {statistics.median(t for t, _ in repeat) / 1024:.0f} KB, '
+		f'{statistics.median(i for _, i in repeat):.0f}ms'
+	)
+
+
+async def main(url: str, runs: int):
+	shutil.rmtree(PROFILES_DIR / PROFILE_GROUP, ignore_errors=True)
+	report('ephemeral', await run(url, runs, None))
+	report('profile  ', await run(url, runs, PROFILE_GROUP))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('url')
+	parser.add_argument('--runs', type=int, default=3)
+	args = parser.parse_args()
+
+	asyncio.run(main(args.url, args.runs))
@@ -0,0 +1,167 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from langchain_core.messages import AIMessage
+
+from browser_use.agent.rate_limit import TokenBudget, rate_limiter_for
+from browser_use.agent.runner import AgentRunner, LocalBrowserPool
+
+
+class FakePool:
+	def __init__(self):
+		self.leased = 0
+		self.max_leased = 0
+
+	@asynccontextmanager
+	async def lease(self):
+		self.leased += 1
+		self.max_leased = max(self.max_leased, self.leased)
+		try:
+			yield object()
+		finally:
+			self.leased -= 1
+
+
+class FakeAgentRunner(AgentRunner):
+	"""Runs tasks without an LLM: 'fail' raises, everything else takes 50ms and 10 tokens"""
+
+	async def _run_agent(self, task, browser):
+		await asyncio.sleep(0.05)
+		if task == 'fail':
+			raise Exception('boom')
+		if self.token_budget:
+			self.token_budget.record(10)
+		return None
+
+
+async def test_tasks_run_concurrently_with_bounded_workers():
+	pool = FakePool()
+	runner = FakeAgentRunner(llm=None, max_workers=3, browser_pool=pool)
+
+	results = await runner.run_all([f'task {i}' for i in range(7)] + ['fail'])
+
+	assert [result.task_id for result in results] == list(range(8))
+	assert pool.max_leased == 3
+	assert results[-1].error == 'boom'
+	assert all(result.error is None for result in results[:-1])
+
+
+async def test_results_are_streamed_and_budget_stops_new_tasks():
+	runner = FakeAgentRunner(
+		llm=None, max_workers=1, browser_pool=FakePool(), token_budget=TokenBudget(20)
+	)
+
+	results = [result async for result in runner.run(['a', 'b', 'c', 'd'])]
+
+	assert [result.task for result in results] == ['a', 'b', 'c', 'd']
+	assert [result.error for result in results] == [None, None] + ['Token budget exhausted'] * 2
+
+
+def test_runner_limits_do_not_change_the_shared_limiter():
+	llm = ScriptedLLM({})
+	shared = rate_limiter_for(llm)
+
+	runner = FakeAgentRunner(llm=llm, requests_per_minute=10, tokens_per_minute=1000)
+
+	assert runner.rate_limiter is not shared
+	assert runner.rate_limiter.requests_per_minute == 10
+	assert shared.requests_per_minute is None
+	assert FakeAgentRunner(llm=llm).rate_limiter is shared
+
+
+class ScriptedLLM:
+	"""Answers with the next actions of the task's script, which is the task text itself"""
+
+	model_name = 'scripted'
+
+	def __init__(self, scripts: dict[str, list[dict]]):
+		self.scripts = {task: list(actions) for task, actions in scripts.items()}
+
+	def with_structured_output(self, schema, include_raw=False):
+		llm = self
+
+		class Structured:
+			async def ainvoke(self, messages):
+				task = next(task for task in llm.scripts if task in str(messages[1].content))
+				parsed = schema.model_validate(
+					{
+						'current_state': {
+							'valuation_previous_goal': '',
+							'memory': '',
+							'next_goal': '',
+						},
+						'action': llm.scripts[task].pop(0),
+					}
+				)
+				return {'raw': AIMessage(content=''), 'parsed': parsed}
+
+		return Structured()
+
+
+async def test_consecutive_tasks_on_a_pooled_browser_are_isolated(fake_server):
+	async def set_state(request):
+		response = web.Response(
+			text='<script>localStorage.setItem("seen", "yes")</script>', content_type='text/html'
+		)
+		response.set_cookie('session', 'first-task')
+		return response
+
+	async def read_state(request):
+		return web.Response(
+			text='<script>document.title = '
+			'`cookie=${document.cookie} storage=${localStorage.getItem("seen")}`</script>',
+			content_type='text/html',
+		)
+
+	url = await fake_server([web.get('/set', set_state), web.get('/read', read_state)])
+	llm = ScriptedLLM(
+		{
+			'leave state behind': [
+				{'go_to_url': {'url': f'{url}/set'}},
+				{'open_tab': {'url': f'{url}/set'}},
+				{'done': {'text': 'done'}},
+			],
+			'look for state': [
+				{'go_to_url': {'url': f'{url}/read'}},
+				{'done': {'text': 'done'}},
+			],
+		}
+	)
+	pool = LocalBrowserPool()
+	runner = AgentRunner(llm=llm, max_workers=1, browser_pool=pool, use_vision=False)
+
+	try:
+		first, second = await runner.run_all(['leave state behind', 'look for state'])
+	finally:
+		await pool.close()
+
+	assert first.success and second.success
+	# the state the second task saw before it was done
+	state = second.history.history[-1].state
+	assert state.title == 'cookie= storage=null'
+	assert len(state.tabs) == 1
+
+
+class UnresettableBrowser:
+	def __init__(self):
+		self.closed = False
+
+	async def reset_context(self):
+		raise Exception('browser crashed')
+
+	async def close(self, force: bool = False):
+		self.closed = True
+
+
+async def test_pooled_browser_that_cannot_be_reset_is_closed(monkeypatch):
+	monkeypatch.setattr('browser_use.agent.runner.Browser', lambda **kwargs: UnresettableBrowser())
+	pool = LocalBrowserPool()
+
+	async with pool.lease() as first:
+		pass
+	async with pool.lease() as second:
+		pass
+
+	assert first.closed
+	assert second is not first
@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from browser_use.browser import daemon
+from browser_use.browser.views import BrowserError, DaemonInfo
+
+BROWSER_ID = 'ws://127.0.0.1/devtools/browser/1234'
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+	path = tmp_path / 'daemon.json'
+	monkeypatch.setattr(daemon, 'STATE_PATH', path)
+	return path
+
+
+def free_port() -> int:
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		return s.getsockname()[1]
+
+
+def write_state(path, pid: int, port: int, browser_id: str = BROWSER_ID) -> DaemonInfo:
+	info = DaemonInfo(
+		pid=pid, port=port, user_data_dir='/tmp/profile', headless=True, browser_id=browser_id
+	)
+	path.write_text(info.model_dump_json())
+	return info
+
+
+@pytest.fixture
+def cdp_endpoint():
+	"""A fake CDP version endpoint answering with the given browser id, returns its port"""
+	servers = []
+
+	def serve(browser_id: str) -> int:
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				body = json.dumps({'webSocketDebuggerUrl': browser_id}).encode()
+				self.send_response(200)
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		threading.Thread(target=server.serve_forever, daemon=True).start()
+		servers.append(server)
+		return server.server_address[1]
+
+	yield serve
+	for server in servers:
+		server.shutdown()
+		server.server_close()
+
+
+@pytest.fixture
+def fake_browser():
+	"""A process whose command line looks like a browser with the given CDP port"""
+	processes = []
+
+	def start(port: int) -> subprocess.Popen:
+		command = [sys.executable, '-c', 'import time; time.sleep(30)']
+		process = subprocess.Popen([*command, f'--remote-debugging-port={port}'])
+		processes.append(process)
+		# the command line is empty until the exec has finished
+		deadline = time.time() + 5
+		while not Path(f'/proc/{process.pid}/cmdline').read_bytes() and time.time() < deadline:
+			time.sleep(0.01)
+		return process
+
+	yield start
+	for process in processes:
+		process.kill()
+		process.wait()
+
+
+def test_state_file_round_trip(state_path):
+	info = write_state(state_path, pid=1234, port=9333)
+
+	assert daemon._read_state() == info
+	assert daemon._read_state().cdp_url == 'http://127.0.0.1:9333'
+
+
+def test_missing_or_broken_state_file(state_path):
+	assert daemon._read_state() is None
+	state_path.write_text('not json')
+	assert daemon._read_state() is None
+
+
+def test_dead_pid_is_stale(state_path):
+	process = subprocess.Popen(['true'])
+	process.wait()
+	write_state(state_path, pid=process.pid, port=free_port())
+
+	assert daemon.daemon_status() is None
+	assert not state_path.exists()
+
+
+def test_live_pid_without_cdp_endpoint_is_stale(state_path):
+	# e.g. the pid was reused by an unrelated process after a reboot
+	write_state(state_path, pid=os.getpid(), port=free_port())
+
+	assert daemon.daemon_status() is None
+	assert not state_path.exists()
+
+
+def test_stop_without_daemon(state_path):
+	assert daemon.stop_daemon() is False
+
+
+def test_stop_does_not_signal_a_reused_pid(state_path, cdp_endpoint):
+	# the daemon browser is gone, its pid now belongs to an unrelated process
+	process = subprocess.Popen(['sleep', '30'])
+	try:
+		write_state(state_path, pid=process.pid, port=cdp_endpoint(BROWSER_ID))
+
+		assert daemon.stop_daemon() is False
+		assert process.poll() is None
+		assert not state_path.exists()
+	finally:
+		process.kill()
+		process.wait()
+
+
+def test_another_browser_on_the_port_is_not_the_daemon(state_path, cdp_endpoint, fake_browser):
+	port = cdp_endpoint('ws://127.0.0.1/devtools/browser/other')
+	process = fake_browser(port)
+	write_state(state_path, pid=process.pid, port=port)
+
+	assert daemon.daemon_status() is None
+	assert daemon.stop_daemon() is False
+	assert process.poll() is None
+
+
+def test_stop_daemon_signals_the_launched_browser(state_path, cdp_endpoint, fake_browser):
+	port = cdp_endpoint(BROWSER_ID)
+	process = fake_browser(port)
+	info = write_state(state_path, pid=process.pid, port=port)
+
+	assert daemon.daemon_status() == info
+	assert daemon.stop_daemon(timeout=0) is True
+	assert process.wait(timeout=5) != 0
+	assert not state_path.exists()
+
+
+def test_start_refuses_a_port_used_by_another_browser(state_path, cdp_endpoint, monkeypatch):
+	def launch_chromium(*args, **kwargs):
+		raise AssertionError('should not launch')
+
+	monkeypatch.setattr(daemon, 'launch_chromium', launch_chromium)
+
+	with pytest.raises(BrowserError, match='already used'):
+		daemon.start_daemon(port=cdp_endpoint('ws://127.0.0.1/devtools/browser/other'))
+	assert not state_path.exists()
@@ -0,0 +1,48 @@
+from browser_use.browser.diagnostics import DiagnosticsCollector
+
+
+class FakeRequest:
+	def __init__(self, url: str, duration: float, size: int):
+		self.url = url
+		self.method = 'GET'
+		self.resource_type = 'script'
+		self.timing = {'requestStart': 5, 'responseEnd': duration}
+		self.failure = 'net::ERR_FAILED'
+		self._size = size
+
+	async def sizes(self):
+		return {'responseBodySize': self._size, 'responseHeadersSize': 0}
+
+
+class FakeMessage:
+	def __init__(self, type: str, text: str):
+		self.type = type
+		self.text = text
+
+
+class FakePage:
+	async def evaluate(self, expression):
+		return [60.0, 120.0]
+
+
+async def test_collect_summarizes_and_resets():
+	collector = DiagnosticsCollector()
+	collector._on_request_finished(FakeRequest('https://a.test/slow.js', 900, 1000))
+	collector._on_request_finished(FakeRequest('https://a.test/fast.js', 20, 500))
+	collector._on_request_failed(FakeRequest('https://a.test/missing.js', 0, 0))
+	collector._on_console(FakeMessage('error', 'boom'))
+	collector._on_console(FakeMessage('log', 'ignored'))
+
+	diagnostics = await collector.collect(FakePage())
+
+	assert diagnostics.request_count == 3
+	assert diagnostics.bytes_received == 1500
+	assert diagnostics.slowest_requests[0].url == 'https://a.test/slow.js'
+	assert len(diagnostics.failed_requests) == 1
+	assert diagnostics.console_errors == ['boom']
+	assert diagnostics.long_tasks == 2
+	assert diagnostics.long_task_ms == 180
+
+	empty = await collector.collect(FakePage())
+	assert empty.request_count == 0
+	assert empty.console_errors == []
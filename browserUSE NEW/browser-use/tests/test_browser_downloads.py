@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+import pytest
+
+from browser_use.browser.downloads import DownloadManager, unique_path
+from browser_use.browser.service import Browser
+from browser_use.browser.views import BrowserError
+
+
+class FakeDownload:
+	def __init__(self, filename: str, content: bytes, fail: bool = False):
+		self.url = f'https://example.com/{filename}'
+		self.suggested_filename = filename
+		self._content = content
+		self._fail = fail
+
+	async def save_as(self, path):
+		await asyncio.sleep(0.01)
+		if self._fail:
+			raise Exception('canceled')
+		with open(path, 'wb') as f:
+			f.write(self._content)
+
+
+def test_unique_path_never_overwrites_or_escapes(tmp_path):
+	(tmp_path / 'report.pdf').write_bytes(b'')
+
+	assert unique_path(tmp_path, 'report.pdf') == tmp_path / 'report (1).pdf'
+	assert unique_path(tmp_path, '../../etc/passwd') == tmp_path / 'passwd'
+	assert unique_path(tmp_path, 'a.txt', taken=[tmp_path / 'a.txt']) == tmp_path / 'a (1).txt'
+
+
+async def test_downloads_are_saved_in_the_background(tmp_path):
+	manager = DownloadManager(str(tmp_path))
+	manager._on_download(FakeDownload('invoice.pdf', b'x' * 100))
+	manager._on_download(FakeDownload('invoice.pdf', b'y' * 50))
+	manager._on_download(FakeDownload('broken.zip', b'', fail=True))
+
+	# registered right away, before anything is written
+	assert [d.status for d in manager.downloads] == ['in_progress'] * 3
+
+	downloads = await manager.wait()
+
+	assert [d.status for d in downloads] == ['completed', 'completed', 'failed']
+	assert [d.size for d in downloads[:2]] == [100, 50]
+	assert downloads[0].path != downloads[1].path
+	assert downloads[2].error == 'canceled'
+
+
+async def test_snapshot_is_not_changed_by_later_progress(tmp_path):
+	manager = DownloadManager(str(tmp_path))
+	manager._on_download(FakeDownload('invoice.pdf', b'x'))
+
+	step = manager.snapshot()
+	await manager.wait()
+
+	assert step[0].status == 'in_progress'
+	assert manager.snapshot()[0].status == 'completed'
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+	uploads = tmp_path / 'uploads'
+	uploads.mkdir()
+	(uploads / 'cv.pdf').write_bytes(b'%PDF')
+	(tmp_path / '.env').write_text('API_KEY=secret')
+	return uploads
+
+
+def test_uploads_are_disabled_without_upload_dir(upload_dir):
+	with pytest.raises(BrowserError, match='disabled'):
+		Browser()._resolve_upload_path(str(upload_dir / 'cv.pdf'))
+
+
+def test_uploads_come_only_from_upload_dir(upload_dir):
+	browser = Browser(upload_dir=str(upload_dir))
+
+	assert browser._resolve_upload_path('cv.pdf') == str(upload_dir / 'cv.pdf')
+	assert browser._resolve_upload_path(str(upload_dir / 'cv.pdf')) == str(upload_dir / 'cv.pdf')
+	for path in ['../.env', str(upload_dir.parent / '.env'), '~/.ssh/id_rsa']:
+		with pytest.raises(BrowserError, match='Only files in'):
+			browser._resolve_upload_path(path)
+	with pytest.raises(BrowserError, match='not found'):
+		browser._resolve_upload_path('missing.pdf')
+
+
+def test_symlinks_out_of_upload_dir_are_rejected(upload_dir):
+	os.symlink(upload_dir.parent / '.env', upload_dir / 'notes.txt')
+	browser = Browser(upload_dir=str(upload_dir))
+
+	with pytest.raises(BrowserError, match='Only files in'):
+		browser._resolve_upload_path('notes.txt')
@@ -0,0 +1,100 @@
+import os
+import socket
+import subprocess
+import time
+
+import pytest
+from aiohttp import web
+
+from browser_use.browser import reaper
+from browser_use.browser.profiles import (
+	directory_size,
+	profile_owner,
+	profile_path,
+	prune_profiles,
+)
+from browser_use.browser.service import Browser
+
+
+def write_file(path, size: int):
+	path.parent.mkdir(parents=True, exist_ok=True)
+	path.write_bytes(b'x' * size)
+
+
+def test_profile_path(tmp_path):
+	path = profile_path('job-boards', tmp_path)
+	assert path == tmp_path / 'job-boards'
+	assert path.is_dir()
+
+	with pytest.raises(ValueError):
+		profile_path('../escape', tmp_path)
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+	for age, group in enumerate(['newest', 'middle', 'oldest']):
+		write_file(tmp_path / group / 'Default' / 'Cache' / 'data', 1024 * 1024)
+		past = time.time() - age * 3600
+		os.utime(tmp_path / group, (past, past))
+
+	removed = prune_profiles(max_total_mb=2, directory=tmp_path)
+
+	assert removed == ['oldest']
+	assert directory_size(tmp_path) == 2 * 1024 * 1024
+
+
+def test_prune_keeps_groups_in_use(tmp_path):
+	write_file(tmp_path / 'in-use' / 'data', 1024)
+	past = time.time() - 10 * 86400
+	os.utime(tmp_path / 'in-use', (past, past))
+
+	assert prune_profiles(max_age_days=1, directory=tmp_path, keep=['in-use']) == []
+	assert prune_profiles(max_age_days=1, directory=tmp_path) == ['in-use']
+
+
+def lock(path, host: str, pid: int):
+	path.mkdir(parents=True, exist_ok=True)
+	os.symlink(f'{host}-{pid}', path / 'SingletonLock')
+
+
+def test_prune_keeps_groups_locked_by_a_running_browser(tmp_path):
+	past = time.time() - 10 * 86400
+	exited = subprocess.Popen(['true'])
+	exited.wait()
+
+	lock(tmp_path / 'other-worker', socket.gethostname(), os.getpid())
+	lock(tmp_path / 'other-host', 'build-server-2', 1)
+	lock(tmp_path / 'crashed', socket.gethostname(), exited.pid)
+	for group in ['other-worker', 'other-host', 'crashed']:
+		os.utime(tmp_path / group, (past, past))
+
+	assert profile_owner(tmp_path / 'other-worker') == os.getpid()
+	assert profile_owner(tmp_path / 'crashed') is None
+	assert prune_profiles(max_age_days=1, directory=tmp_path) == ['crashed']
+
+
+async def test_persistent_profile_serves_repeat_visits_from_disk_cache(tmp_path, fake_server):
+	hits = []
+
+	async def index(request):
+		return web.Response(text='<script src="/app.js"></script>', content_type='text/html')
+
+	async def script(request):
+		hits.append(request.path)
+		return web.Response(
+			text='window.loaded = true',
+			content_type='application/javascript',
+			headers={'Cache-Control': 'max-age=3600'},
+		)
+
+	url = await fake_server([web.get('/', index), web.get('/app.js', script)])
+
+	for _ in range(2):
+		async with Browser(headless=True, user_data_dir=str(tmp_path / 'profile')) as browser:
+			await browser.navigate_to(url)
+			assert browser._browser_pid in reaper.tracked_pids()
+	assert hits == ['/app.js']
+
+	for _ in range(2):
+		async with Browser(headless=True) as browser:
+			await browser.navigate_to(url)
+	assert hits == ['/app.js'] * 3
@@ -0,0 +1,82 @@
+import subprocess
+import sys
+import time
+
+from browser_use.browser import reaper
+
+
+def test_reap_kills_tracked_processes():
+	process = subprocess.Popen(['sleep', '60'])
+	reaper.register(process.pid)
+	assert process.pid in reaper.tracked_pids()
+
+	reaper.reap()
+
+	assert process.wait(timeout=5) is not None
+	assert process.pid not in reaper.tracked_pids()
+
+
+def test_unregister_leaves_process_alone():
+	process = subprocess.Popen(['sleep', '60'])
+	reaper.register(process.pid)
+	reaper.unregister(process.pid)
+
+	reaper.reap()
+
+	assert process.poll() is None
+	process.kill()
+	process.wait()
+
+
+IGNORE_SIGTERM = (
+	'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(flush=True); '
+	'time.sleep(60)'
+)
+
+
+def test_terminate_does_not_wait_and_reap_finishes_the_job():
+	# ignores SIGTERM, like a browser that hangs while shutting down
+	process = subprocess.Popen(
+		[sys.executable, '-c', IGNORE_SIGTERM],
+		stdout=subprocess.PIPE,
+	)
+	process.stdout.readline()  # the handler is installed
+	reaper.register(process.pid)
+
+	start = time.time()
+	reaper.terminate(process.pid)
+	assert time.time() - start < 0.5
+	assert process.poll() is None
+	assert process.pid in reaper.tracked_pids()
+
+	reaper.reap()
+	assert process.wait(timeout=5) is not None
+
+
+def test_terminated_pid_reused_by_another_process_is_left_alone():
+	process = subprocess.Popen(['sleep', '60'])
+	reaper.register(process.pid)
+	reaper.terminate(process.pid)
+	process.wait(timeout=5)
+
+	# stands in for an unrelated process that got the same pid after the browser exited: the
+	# pid is registered, but with the start time of the process that was launched
+	other = subprocess.Popen(['sleep', '60'])
+	reaper._launched[other.pid] = '0'
+
+	reaper.reap()
+
+	assert other.poll() is None
+	assert other.pid not in reaper.tracked_pids()
+	other.kill()
+	other.wait()
+
+
+def test_terminate_unregisters_an_exited_process():
+	process = subprocess.Popen(['true'])
+	reaper.register(process.pid)
+	process.wait()
+
+	reaper.terminate(process.pid)
+
+	assert process.pid not in reaper.tracked_pids()
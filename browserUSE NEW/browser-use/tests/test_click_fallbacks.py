@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from browser_use.browser.service import Browser
+from browser_use.browser.views import ActionTimeouts
+
+RECORD_CLICK = '(window.clicks = window.clicks || []).push([this.id, event.isTrusted])'
+
+
+@pytest.fixture
+async def browser():
+	# a short click budget, so the occluded case falls through to the js click quickly
+	async with Browser(headless=True, action_timeouts=ActionTimeouts(click=300)) as browser:
+		yield browser
+
+
+async def open_page(browser: Browser, html: str):
+	page = await browser.get_current_page()
+	await page.set_content(html)
+	return page
+
+
+async def test_visible_element_gets_a_real_click(browser):
+	page = await open_page(browser, f'<button id="target" onclick="{RECORD_CLICK}">Apply</button>')
+
+	await browser._click_element_by_xpath('//button[@id="target"]')
+
+	# dispatched through CDP input events, like a user's click
+	assert await page.evaluate('window.clicks') == [['target', True]]
+
+
+async def test_occluded_element_falls_back_to_js_click(browser):
+	page = await open_page(
+		browser,
+		f'<button id="target" onclick="{RECORD_CLICK}">Apply</button>'
+		f'<div id="overlay" onclick="{RECORD_CLICK}" style="position:fixed;inset:0"></div>',
+	)
+
+	await browser._click_element_by_xpath('//button[@id="target"]')
+
+	# the overlay on top never receives the click
+	assert await page.evaluate('window.clicks') == [['target', False]]
+
+
+async def test_detached_element_falls_back_to_js_click(browser, monkeypatch):
+	page = await open_page(browser, '<button id="target">Apply</button>')
+	element = await page.query_selector('#target')
+	await element.evaluate(
+		"(el) => { el.addEventListener('click', () => window.clicked = true); el.remove(); }"
+	)
+
+	async def stale_element(xpath):
+		return element
+
+	monkeypatch.setattr(browser, '_get_element_by_xpath', stale_element)
+
+	await browser._click_element_by_xpath('//button[@id="target"]')
+
+	assert await page.evaluate('window.clicked') is True
+
+
+async def test_missing_element_on_loaded_page_fails_without_waiting(browser):
+	await open_page(browser, '<button>Apply</button>')
+
+	start = time.time()
+	with pytest.raises(Exception, match='not found'):
+		await browser._click_element_by_xpath('//button[@id="gone"]')
+
+	assert time.time() - start < browser.action_timeouts.wait_for_element / 1000
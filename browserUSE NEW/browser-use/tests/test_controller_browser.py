@@ -0,0 +1,21 @@
+from browser_use.browser.service import Browser
+from browser_use.controller.service import Controller
+
+
+def test_browser_is_created_on_first_use():
+	controller = Controller(headless=True, keep_open=True)
+	assert controller._browser is None
+
+	browser = controller.browser
+
+	assert controller.browser is browser
+	assert browser.headless and browser.keep_open
+
+
+def test_set_browser_replaces_the_default():
+	browser = Browser(headless=True)
+	controller = Controller()
+
+	controller.set_browser(browser)
+
+	assert controller.browser is browser
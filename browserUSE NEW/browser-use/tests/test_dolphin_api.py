@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from browser_use.browser.dolphin_api import DolphinApiClient, DolphinApiError, token_lifetime
+
+
+@pytest.fixture
+async def api(fake_server):
+	"""Dolphin API stand-in that fails the first profile list call and counts logins"""
+	calls = {'login': 0, 'list': 0}
+
+	async def login(request):
+		calls['login'] += 1
+		return web.json_response({'success': True})
+
+	async def list_profiles(request):
+		calls['list'] += 1
+		if calls['list'] == 1:
+			return web.json_response({'error': 'busy'}, status=503)
+		return web.json_response({'data': [{'id': 1}]})
+
+	async def stop_profile(request):
+		return web.json_response({'error': 'unknown profile'}, status=404)
+
+	url = await fake_server(
+		[
+			web.post('/v1.0/auth/login-with-token', login),
+			web.get('/v1.0/browser_profiles', list_profiles),
+			web.get('/v1.0/browser_profiles/{id}/stop', stop_profile),
+		]
+	)
+
+	client = DolphinApiClient(f'{url}/v1.0', 'token', backoff=0.01)
+	yield client, calls
+
+	await client.close()
+
+
+async def test_logs_in_once_and_retries(api):
+	client, calls = api
+
+	assert await client.get_browser_profiles() == [{'id': 1}]
+	assert await client.get_browser_profiles() == [{'id': 1}]
+
+	assert calls['login'] == 1
+	stats = client.stats['list_profiles']
+	assert stats.calls == 3
+	assert stats.retries == 1
+	assert 'list_profiles' in client.latency_report()
+
+
+async def test_client_errors_are_not_retried(api):
+	client, _ = api
+
+	with pytest.raises(DolphinApiError) as error:
+		await client.stop_profile('42')
+
+	assert error.value.status == 404
+	assert client.stats['stop_profile'].calls == 1
+
+
+@pytest.fixture
+async def login_api(fake_server):
+	"""Dolphin API stand-in whose login expires as configured and that can forget logins"""
+	state = {'logins': 0, 'expires_in': 3600, 'logged_in': False}
+
+	async def login(request):
+		state['logins'] += 1
+		state['logged_in'] = True
+		return web.json_response({'success': True, 'expires_in': state['expires_in']})
+
+	async def list_profiles(request):
+		if not state['logged_in']:
+			return web.json_response({'success': False}, status=401)
+		return web.json_response({'data': []})
+
+	url = await fake_server(
+		[
+			web.post('/v1.0/auth/login-with-token', login),
+			web.get('/v1.0/browser_profiles', list_profiles),
+		]
+	)
+	client = DolphinApiClient(f'{url}/v1.0', 'token', backoff=0.01)
+	yield client, state
+
+	await client.close()
+
+
+async def test_logs_in_again_when_the_login_expires(login_api):
+	client, state = login_api
+	state['expires_in'] = 0
+
+	await client.get_browser_profiles()
+	await client.get_browser_profiles()
+
+	assert state['logins'] == 2
+
+
+async def test_logs_in_again_after_401(login_api):
+	client, state = login_api
+
+	await client.get_browser_profiles()
+	# the app was restarted and forgot the login
+	state['logged_in'] = False
+	assert await client.get_browser_profiles() == []
+
+	assert state['logins'] == 2
+	assert client.stats['list_profiles'].retries == 1
+
+
+def test_token_lifetime():
+	assert token_lifetime({'success': True}) is None
+	assert token_lifetime({'expires_in': 600}) == 600
+	assert token_lifetime({'data': {'expiresIn': 60}}) == 60
+	assert 590 < token_lifetime({'expires_at': time.time() + 600}) <= 600
+	assert 0 < token_lifetime({'expiresAt': '2999-01-01T00:00:00Z'})
+	assert token_lifetime({'expires_at': 'soon'}) is None
+
+
+def test_client_can_be_used_from_several_event_loops():
+	# created outside of any loop, then used by one asyncio.run after another
+	client = DolphinApiClient('http://127.0.0.1:1/v1.0', 'token')
+
+	async def use_lock():
+		async with client._auth_lock():
+			return client._auth_lock()
+
+	assert asyncio.run(use_lock()) is not asyncio.run(use_lock())
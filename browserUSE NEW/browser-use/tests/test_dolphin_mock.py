@@ -0,0 +1,75 @@
+import pytest
+
+from browser_use.browser.dolphin_api import DolphinApiClient
+from browser_use.browser.dolphin_mock import MockDolphinServer
+from browser_use.browser.dolphin_pool import DolphinProfilePool
+from browser_use.browser.dolphin_service import DolphinBrowser
+
+
+@pytest.fixture
+async def server(monkeypatch):
+	async with MockDolphinServer(profiles=2) as server:
+		monkeypatch.setenv('DOLPHIN_API_URL', server.api_url)
+		monkeypatch.setenv('DOLPHIN_API_TOKEN', server.token)
+		yield server
+
+
+async def test_dolphin_browser_connects_handles_tabs_and_closes(server):
+	browser = DolphinBrowser()
+	profiles = await browser.get_browser_profiles()
+	assert [profile['id'] for profile in profiles] == [1, 2]
+
+	await browser.connect(str(profiles[0]['id']))
+	assert server.running_profiles() == [1]
+	# the profile's own tab is reused instead of opening another one
+	assert len(await browser.get_tabs_info()) == 1
+
+	await browser.create_new_tab('data:text/html,<title>second</title>')
+	tabs = await browser.get_tabs_info()
+	assert tabs[-1].title == 'second'
+
+	await browser.switch_to_tab(0)
+	await browser.close(force=True)
+
+	assert server.running_profiles() == []
+	# a single login for the whole session
+	assert server.requests.count('POST /v1.0/auth/login-with-token') == 1
+
+
+async def test_profile_pool_against_mock(server):
+	async with DolphinApiClient(server.api_url, server.token) as client:
+		async with DolphinProfilePool(['1', '2'], api_client=client, headless=True) as pool:
+			assert server.running_profiles() == [1, 2]
+
+			async with pool.lease() as browser:
+				await browser.navigate_to('data:text/html,<title>pooled</title>')
+				page = await browser.get_current_page()
+				assert await page.title() == 'pooled'
+
+	assert server.running_profiles() == []
+
+
+async def test_wrong_token_is_rejected(server):
+	async with DolphinApiClient(server.api_url, 'wrong') as client:
+		with pytest.raises(Exception, match='invalid token'):
+			await client.get_browser_profiles()
+
+
+async def test_dolphin_browser_closes_the_api_client_it_created(server):
+	browser = DolphinBrowser()
+	await browser.get_browser_profiles()
+
+	await browser.close()
+	assert browser.api._session is None
+
+
+async def test_dolphin_browser_closes_a_shared_api_client_only_on_force(server):
+	client = DolphinApiClient(server.api_url, server.token)
+	browser = DolphinBrowser(api_client=client)
+	await browser.get_browser_profiles()
+
+	await browser.close()
+	assert not client._session.closed
+
+	await browser.close(force=True)
+	assert client._session is None
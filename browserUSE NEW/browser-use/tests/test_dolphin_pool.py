@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from browser_use.browser.dolphin_api import DolphinApiClient
+from browser_use.browser.dolphin_pool import DolphinProfilePool
+
+START_DELAY = 0.2
+
+
+class FakeBrowser:
+	def __init__(self, cdp_url: str):
+		self.cdp_url = cdp_url
+		self.healthy = True
+		self.closed = False
+
+	async def close(self, force: bool = False):
+		self.closed = True
+
+
+class FakeBrowserPool(DolphinProfilePool):
+	"""Talks to the mock API for real, but doesn't attach a Chromium to the profiles"""
+
+	async def _connect(self, cdp_url: str):
+		return FakeBrowser(cdp_url)
+
+	async def _is_healthy(self, browser) -> bool:
+		return browser.healthy
+
+
+@pytest.fixture
+async def api(fake_server):
+	running: set[str] = set()
+
+	async def login(request):
+		return web.json_response({'success': True})
+
+	async def start(request):
+		await asyncio.sleep(START_DELAY)
+		profile_id = request.match_info['id']
+		running.add(profile_id)
+		return web.json_response(
+			{'success': True, 'automation': {'port': 9000, 'wsEndpoint': f'/devtools/{profile_id}'}}
+		)
+
+	async def stop(request):
+		running.discard(request.match_info['id'])
+		return web.json_response({'success': True})
+
+	url = await fake_server(
+		[
+			web.post('/v1.0/auth/login-with-token', login),
+			web.get('/v1.0/browser_profiles/{id}/start', start),
+			web.get('/v1.0/browser_profiles/{id}/stop', stop),
+		]
+	)
+
+	client = DolphinApiClient(f'{url}/v1.0', 'token')
+	yield client, running
+
+	await client.close()
+
+
+async def test_profiles_start_in_parallel_and_are_leased_exclusively(api):
+	client, running = api
+	pool = FakeBrowserPool(['1', '2', '3'], api_client=client, idle_ttl=0)
+
+	start = time.time()
+	await pool.start()
+	assert time.time() - start < 3 * START_DELAY
+	assert running == {'1', '2', '3'}
+
+	async with pool.lease() as first, pool.lease() as second:
+		assert first is not second
+		assert sum(profile['leased'] for profile in pool.status()) == 2
+
+	await pool.close()
+	assert running == set()
+
+
+async def test_lease_waits_for_a_free_profile(api):
+	client, _ = api
+	pool = FakeBrowserPool(['1'], api_client=client, idle_ttl=0)
+	await pool.start()
+	order = []
+
+	async def agent(name: str):
+		async with pool.lease():
+			order.append(f'{name} start')
+			await asyncio.sleep(0.05)
+			order.append(f'{name} end')
+
+	await asyncio.gather(agent('a'), agent('b'))
+
+	assert order == ['a start', 'a end', 'b start', 'b end']
+	await pool.close()
+
+
+async def test_unhealthy_profile_is_restarted(api):
+	client, running = api
+	pool = FakeBrowserPool(['1'], api_client=client, idle_ttl=0)
+	await pool.start()
+	broken = pool.profiles[0].browser
+	broken.healthy = False
+
+	async with pool.lease() as browser:
+		assert browser is not broken
+		assert broken.closed
+
+	assert pool.status()[0]['restarts'] == 1
+	assert running == {'1'}
+	await pool.close()
+
+
+async def test_idle_profiles_are_stopped_and_restarted_on_demand(api):
+	client, running = api
+	pool = FakeBrowserPool(['1'], api_client=client, idle_ttl=0.1)
+	await pool.start()
+
+	await asyncio.sleep(0.3)
+	assert running == set()
+	assert not pool.status()[0]['running']
+
+	async with pool.lease() as browser:
+		assert browser is not None
+		assert running == {'1'}
+
+	await pool.close()
+
+
+async def test_profile_is_stopped_when_attaching_fails(api):
+	client, running = api
+
+	class UnreachablePool(FakeBrowserPool):
+		async def _connect(self, cdp_url: str):
+			raise ConnectionError('no CDP endpoint')
+
+	pool = UnreachablePool(['1'], api_client=client, idle_ttl=0)
+	await pool.start()
+
+	assert running == set()
+	assert not pool.status()[0]['running']
+	await pool.close()
+
+
+async def test_close_waits_for_the_idle_stopper(api):
+	client, _ = api
+	pool = FakeBrowserPool(['1'], api_client=client, idle_ttl=0.1)
+	await pool.start()
+	idle_task = pool._idle_task
+
+	await pool.close()
+
+	assert idle_task.done()
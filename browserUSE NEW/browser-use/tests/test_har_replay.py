@@ -0,0 +1,51 @@
+import pytest
+from aiohttp import test_utils, web
+
+from browser_use.browser.service import Browser
+from browser_use.browser.views import BrowserError
+
+
+async def index(request):
+	return web.Response(
+		text='<title>Frozen</title><script src="/app.js"></script><p id="out">waiting</p>',
+		content_type='text/html',
+	)
+
+
+async def script(request):
+	return web.Response(
+		text='document.getElementById("out").textContent = "loaded"',
+		content_type='application/javascript',
+	)
+
+
+async def test_replay_serves_recorded_pages_without_the_server(tmp_path):
+	har_path = str(tmp_path / 'site.har')
+	app = web.Application()
+	app.add_routes([web.get('/', index), web.get('/app.js', script)])
+	server = test_utils.TestServer(app, host='127.0.0.1')
+	await server.start_server()
+	url = str(server.make_url('/'))
+
+	try:
+		async with Browser(headless=True, har_path=har_path, har_mode='record') as browser:
+			await browser.navigate_to(url)
+	finally:
+		await server.close()
+
+	async with Browser(headless=True, har_path=har_path, har_mode='replay') as browser:
+		await browser.navigate_to(url)
+		page = await browser.get_current_page()
+
+		assert await page.title() == 'Frozen'
+		assert await page.text_content('#out') == 'loaded'
+		# requests that were not recorded are aborted instead of going to the network
+		response = await page.evaluate(f'fetch("{url}missing").then(() => "ok", () => "aborted")')
+		assert response == 'aborted'
+
+
+async def test_replay_without_har_file(tmp_path):
+	browser = Browser(headless=True, har_path=str(tmp_path / 'missing.har'))
+
+	with pytest.raises(BrowserError, match='not found'):
+		await browser._route_from_har(None)
@@ -0,0 +1,69 @@
+import pytest
+
+from browser_use.browser.service import Browser
+from browser_use.browser.views import InputConfig
+
+TEXT = 'hello world'
+COUNT_KEYS = 'window.keys = (window.keys || 0) + 1'
+
+
+@pytest.fixture
+async def browser():
+	async with Browser(headless=True) as browser:
+		yield browser
+
+
+async def open_page(browser: Browser, html: str):
+	page = await browser.get_current_page()
+	await page.set_content(html)
+	return page
+
+
+def test_fill_is_the_default():
+	assert InputConfig().strategy == 'fill'
+
+
+@pytest.mark.parametrize(
+	'strategy, key_events',
+	[
+		('fill', 0),
+		('insert_text', 0),
+		('type', len(TEXT)),
+		# the typed tail, plus the End key that moves the cursor behind the filled part
+		('hybrid', InputConfig().hybrid_typed_chars + 1),
+	],
+)
+async def test_strategies_enter_the_text(browser, strategy, key_events):
+	page = await open_page(browser, f'<input id="field" value="old" onkeydown="{COUNT_KEYS}">')
+
+	await browser._input_text_by_xpath('//input[@id="field"]', TEXT, strategy=strategy)
+
+	assert await page.eval_on_selector('#field', 'el => el.value') == TEXT
+	assert await page.evaluate('window.keys || 0') == key_events
+
+
+async def test_fill_falls_back_to_typing_into_custom_widgets(browser):
+	# not an input, fill() refuses it, but it listens to key presses
+	page = await open_page(
+		browser,
+		'<div id="widget" tabindex="0" '
+		'onkeydown="if (event.key.length === 1) this.textContent += event.key"></div>',
+	)
+
+	await browser._input_text_by_xpath('//div[@id="widget"]', TEXT, strategy='fill')
+
+	assert await page.eval_on_selector('#widget', 'el => el.textContent') == TEXT
+
+
+async def test_fill_falls_back_to_typing_when_the_value_does_not_stick(browser):
+	# rejects a value that appears at once, like inputs that validate per keystroke
+	page = await open_page(
+		browser,
+		'<input id="field" '
+		"oninput=\"if (this.value.length > Number(this.dataset.len || 0) + 1) this.value = '';"
+		' this.dataset.len = this.value.length">',
+	)
+
+	await browser._input_text_by_xpath('//input[@id="field"]', TEXT, strategy='fill')
+
+	assert await page.eval_on_selector('#field', 'el => el.value') == TEXT
@@ -0,0 +1,233 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from browser_use.agent.message_manager import (
+	MessageManager,
+	estimate_tokens,
+	has_image,
+	strip_stack_trace,
+)
+from browser_use.agent.service import Agent
+from browser_use.browser.views import BrowserState
+from browser_use.controller.service import Controller
+
+
+def make_manager(max_input_tokens: int) -> MessageManager:
+	manager = MessageManager(SystemMessage(content='system prompt'), max_input_tokens)
+	manager.add_task('find the cheapest flight')
+	return manager
+
+
+def add_step(manager: MessageManager, step: int, result: str) -> None:
+	output = {'current_state': {}, 'action': {'click_element': {'index': step}}}
+	manager.add_model_output(step, json.dumps(output))
+	manager.add_result(step, extracted_content=result)
+
+
+def test_stack_traces_are_stripped():
+	error = (
+		'Unexpected error: boom\nStacktrace:\nTraceback (most recent call last):\n'
+		'  File "service.py", line 1, in step\nException: boom\n'
+	)
+	assert strip_stack_trace(error) == 'Unexpected error: boom'
+
+
+def test_everything_is_sent_while_it_fits():
+	manager = make_manager(10_000)
+	for step in range(1, 4):
+		add_step(manager, step, f'clicked {step}')
+
+	messages = manager.get_messages(HumanMessage(content='state'), step=4)
+
+	assert len(messages) == 2 + 3 * 2 + 1
+	assert manager.step_tokens[-1].summarized_steps == 0
+
+
+def test_old_steps_are_summarized_and_pins_kept():
+	manager = make_manager(300)
+	for step in range(1, 11):
+		add_step(manager, step, f'clicked {step} ' + 'x' * 200)
+
+	state = HumanMessage(content='state')
+	messages = manager.get_messages(state, step=11)
+
+	assert messages[0].content == 'system prompt'
+	assert messages[1].content == 'Your task is: find the cheapest flight'
+	assert messages[-1] is state
+	assert messages[2].content.startswith('Summary of earlier steps:')
+	assert 'click_element' in messages[2].content
+
+	tokens = manager.step_tokens[-1]
+	assert tokens.summarized_steps > 0
+	assert sum(estimate_tokens(message) for message in messages) <= 300
+	# nothing is lost from the full conversation
+	assert len(manager.messages) == 2 + 10 * 2
+
+
+def test_cache_breakpoints_for_anthropic():
+	manager = MessageManager(SystemMessage(content='system prompt'), cache_control=True)
+	manager.add_task('find the cheapest flight')
+	add_step(manager, 1, 'clicked 1')
+
+	state = HumanMessage(content='state')
+	messages = manager.get_messages(state, step=2)
+
+	breakpoints = [
+		i
+		for i, message in enumerate(messages)
+		if isinstance(message.content, list)
+		and any('cache_control' in item for item in message.content)
+	]
+	# system prompt, task and the last history message, never the changing state
+	assert breakpoints == [0, 1, 3]
+	assert messages[0].content[0]['text'] == 'system prompt'
+	assert messages[-1] is state
+	# the stored conversation is left untouched
+	assert manager.messages[0].content == 'system prompt'
+
+
+def contents(messages) -> list:
+	return [message.content for message in messages]
+
+
+def test_history_stays_a_cache_prefix_between_summaries():
+	manager = make_manager(2000)
+	state = HumanMessage(content='state')
+	previous = None
+	hits = misses = 0
+	for step in range(1, 61):
+		messages = manager.get_messages(state, step=step)
+		if manager.step_tokens[-1].summarized_steps:
+			# everything but the state message of the previous step is sent again unchanged
+			if contents(messages[: len(previous) - 1]) == contents(previous[:-1]):
+				hits += 1
+			else:
+				misses += 1
+		previous = messages
+		add_step(manager, step, f'clicked {step} ' + 'x' * 200)
+
+	# the summary only changes every few steps, not on every step
+	assert hits > 3 * misses
+
+
+def test_summary_is_appended_to():
+	manager = make_manager(2000)
+	state = HumanMessage(content='state')
+	summaries = []
+	for step in range(1, 31):
+		add_step(manager, step, f'clicked {step} ' + 'x' * 200)
+		messages = manager.get_messages(state, step=step + 1)
+		if messages[2].content.startswith('Summary of earlier steps:'):
+			summaries.append(messages[2].content)
+
+	assert len(set(summaries)) < len(summaries)
+	for older, newer in zip(summaries, summaries[1:]):
+		assert newer.startswith(older)
+
+
+def test_summary_gets_a_cache_breakpoint():
+	manager = MessageManager(SystemMessage(content='system prompt'), 600, cache_control=True)
+	manager.add_task('find the cheapest flight')
+	for step in range(1, 11):
+		add_step(manager, step, f'clicked {step} ' + 'x' * 200)
+
+	messages = manager.get_messages(HumanMessage(content='state'), step=11)
+
+	breakpoints = [
+		i
+		for i, message in enumerate(messages)
+		if isinstance(message.content, list)
+		and any('cache_control' in item for item in message.content)
+	]
+	assert breakpoints == [0, 1, 2, len(messages) - 2]
+	assert messages[2].content[0]['text'].startswith('Summary of earlier steps:')
+
+
+class RecordingLLM:
+	"""Navigates on every step and keeps the messages of every call"""
+
+	model_name = 'recording'
+
+	def __init__(self):
+		self.calls = []
+
+	def with_structured_output(self, schema, include_raw=False):
+		llm = self
+
+		class Structured:
+			async def ainvoke(self, messages):
+				llm.calls.append(messages)
+				parsed = schema.model_validate(
+					{
+						'current_state': {
+							'valuation_previous_goal': '',
+							'memory': '',
+							'next_goal': '',
+						},
+						'action': {'go_to_url': {'url': 'https://a.test/'}},
+					}
+				)
+				return {'raw': AIMessage(content=''), 'parsed': parsed}
+
+		return Structured()
+
+
+class UnchangedPageBrowser:
+	"""Has a screenshot on the first step, after that the page looks the same"""
+
+	def __init__(self):
+		self.steps = 0
+
+	async def get_state(self, use_vision: bool = False) -> BrowserState:
+		self.steps += 1
+		first = self.steps == 1
+		return BrowserState(
+			items=[],
+			selector_map={},
+			url='https://a.test/',
+			title='a',
+			tabs=[],
+			screenshot='aW1hZ2U=' if first else None,
+			screenshot_unchanged=not first,
+		)
+
+	async def navigate_to(self, url: str):
+		pass
+
+	async def close(self, force: bool = False):
+		pass
+
+
+async def test_unchanged_page_still_shows_the_model_a_screenshot():
+	llm = RecordingLLM()
+	controller = Controller()
+	controller.set_browser(UnchangedPageBrowser())
+	agent = Agent(task='find the cheapest flight', llm=llm, controller=controller)
+
+	for _ in range(3):
+		await agent.step()
+
+	first, second, third = llm.calls
+	assert has_image(first[-1])
+	# the state message has no image of its own, the latest screenshot is in the history
+	assert not has_image(second[-1])
+	assert 'same as in the latest screenshot' in str(second[-1].content)
+	assert any(has_image(message) for message in second[:-1])
+	# at the same place, so it is part of the cached prefix
+	assert contents(third[: len(second) - 1]) == contents(second[:-1])
+
+
+def test_screenshot_of_a_summarized_step_is_still_sent():
+	manager = make_manager(600)
+	screenshot = HumanMessage(
+		content=[{'type': 'text', 'text': 'state'}, {'type': 'image_url', 'image_url': {}}]
+	)
+	manager.get_messages(screenshot, step=1)
+	for step in range(1, 11):
+		add_step(manager, step, f'clicked {step} ' + 'x' * 200)
+
+	messages = manager.get_messages(HumanMessage(content='state'), 11, screenshot_unchanged=True)
+
+	assert manager.step_tokens[-1].summarized_steps > 0
+	assert sum(has_image(message) for message in messages) == 1
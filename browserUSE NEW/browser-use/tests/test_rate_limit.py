@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from browser_use.agent import rate_limit
+from browser_use.agent.rate_limit import RateLimiter, TokenBudget
+
+
+async def test_requests_beyond_the_limit_wait_for_the_window(monkeypatch):
+	monkeypatch.setattr(rate_limit, 'WINDOW', 0.2)
+	limiter = RateLimiter(requests_per_minute=2)
+
+	start = time.monotonic()
+	await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+	assert time.monotonic() - start >= 0.2
+	assert limiter.total_requests == 3
+	assert limiter.total_wait > 0
+
+
+async def test_token_limit(monkeypatch):
+	monkeypatch.setattr(rate_limit, 'WINDOW', 0.2)
+	limiter = RateLimiter(tokens_per_minute=1000)
+
+	assert await limiter.acquire() < 0.05
+	limiter.record_tokens(1500)
+	assert await limiter.acquire() >= 0.15
+
+
+def test_limiter_is_shared_across_event_loops(monkeypatch):
+	monkeypatch.setattr(rate_limit, 'WINDOW', 0.05)
+	limiter = RateLimiter(requests_per_minute=1)
+
+	async def two_requests():
+		await asyncio.gather(limiter.acquire(), limiter.acquire())
+
+	# e.g. a script that calls asyncio.run once per batch of agents
+	asyncio.run(two_requests())
+	asyncio.run(two_requests())
+
+	assert limiter.total_requests == 4
+
+
+def test_token_budget():
+	budget = TokenBudget(max_tokens=100)
+	budget.record(60)
+	assert budget.remaining == 40 and not budget.exhausted
+
+	budget.record(60)
+	assert budget.remaining == 0 and budget.exhausted
+
+
+class FakeResponse:
+	def __init__(self, headers: dict, status_code: int = 429):
+		self.headers = headers
+		self.status_code = status_code
+
+
+class FakeRateLimitError(Exception):
+	def __init__(self, headers: dict):
+		super().__init__('rate limited')
+		self.response = FakeResponse(headers)
+
+
+class FakeChatModel:
+	def __init__(self, model_name: str):
+		self.model_name = model_name
+
+
+def test_retry_after_headers():
+	assert rate_limit.retry_after(FakeRateLimitError({'retry-after': '7'})) == 7
+	assert rate_limit.retry_after(FakeRateLimitError({'retry-after-ms': '1500'})) == 1.5
+	assert rate_limit.retry_after(FakeRateLimitError({})) is None
+	assert rate_limit.retry_after(Exception()) is None
+
+
+def test_rate_limit_errors_are_detected_by_status():
+	assert rate_limit.is_rate_limit_error(FakeRateLimitError({}))
+	assert not rate_limit.is_rate_limit_error(ValueError('invalid output'))
+
+
+def test_backoff_grows_with_jitter_and_is_capped():
+	for attempt, expected in [(0, 10), (1, 20), (2, 40), (5, 60)]:
+		delay = rate_limit.backoff_delay(attempt, base=10, maximum=60)
+		assert expected / 2 <= delay <= expected
+
+
+async def test_a_429_holds_back_everyone_on_the_same_model():
+	limiter = rate_limit.rate_limiter_for(FakeChatModel('model-a'))
+	assert rate_limit.rate_limiter_for(FakeChatModel('model-a')) is limiter
+	assert rate_limit.rate_limiter_for(FakeChatModel('model-b')) is not limiter
+
+	limiter.block_for(0.1)
+	assert await limiter.acquire() >= 0.09
+	assert rate_limit.throttle_stats()['FakeChatModel:model-a']['rate_limit_errors'] == 1
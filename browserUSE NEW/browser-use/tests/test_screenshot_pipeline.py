@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from browser_use.browser.screenshot import (
+	ScreenshotChangeDetector,
+	capture_type,
+	encode_screenshot,
+	hamming_distance,
+	needs_reencode,
+)
+from browser_use.browser.service import Browser
+from browser_use.browser.views import ScreenshotConfig
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def make_png(block: tuple[int, int, int, int], size: tuple[int, int] = (1280, 1024)) -> bytes:
+	output = io.BytesIO()
+	image = Image.new('RGB', size, (10, 20, 30))
+	# a white block so the hash has some structure to it
+	image.paste((255, 255, 255), block)
+	image.save(output, format='PNG')
+	return output.getvalue()
+
+
+def test_default_config_keeps_png():
+	config = ScreenshotConfig()
+	data = make_png((0, 0, 640, 340))
+
+	assert not needs_reencode(config)
+	assert capture_type(config) == 'png'
+	assert encode_screenshot(data, config) == (data, 'png')
+
+
+def test_downscale_and_webp():
+	config = ScreenshotConfig(format='webp', quality=50, max_dimension=640)
+	encoded, image_format = encode_screenshot(make_png((0, 0, 640, 340)), config)
+
+	assert image_format == 'webp'
+	with Image.open(io.BytesIO(encoded)) as image:
+		assert image.format == 'WEBP'
+		assert max(image.size) == 640
+
+
+def test_change_detector_skips_identical_viewport():
+	detector = ScreenshotChangeDetector(threshold=2)
+	first = make_png((0, 0, 640, 340))
+	other = make_png((640, 680, 1280, 1024))
+
+	assert not detector.is_unchanged(first)
+	assert detector.is_unchanged(first)
+	assert not detector.is_unchanged(other)
+
+
+def test_hamming_distance():
+	assert hamming_distance(0b1010, 0b1010) == 0
+	assert hamming_distance(0b1010, 0b0101) == 4
+
+
+async def test_viewport_screenshots_of_animated_page_are_identical():
+	spinner = (
+		'<style>@keyframes spin { to { transform: rotate(360deg) } }</style>'
+		'<div style="width:100px;height:100px;background:red;animation:spin 1s linear infinite">'
+		'</div><input autofocus>'
+	)
+	async with Browser(headless=True) as browser:
+		page = await browser.get_current_page()
+		await page.set_content(spinner)
+
+		first, _ = await browser._capture_screenshot(None)
+		await page.wait_for_timeout(300)
+		second, _ = await browser._capture_screenshot(None)
+
+		assert first == second
+		# the animation runs again afterwards
+		assert await page.evaluate('document.getAnimations()[0].playState') == 'running'
@@ -0,0 +1,92 @@
+from browser_use.controller.service import harvest, harvest_key
+
+
+class FakePage:
+	"""A feed that never grows, so every wait for new content runs into its timeout"""
+
+	def __init__(self):
+		self.scrolls = 0
+
+	async def evaluate(self, script):
+		if script.startswith('window.scrollBy'):
+			self.scrolls += 1
+		return 1000
+
+	async def wait_for_function(self, *args, **kwargs):
+		raise TimeoutError()
+
+
+def snapshots(*pages: list[tuple[str, str]]):
+	"""Returns the given (xpath, text) lists one after the other, then the last one forever"""
+	pages_left = list(pages)
+
+	async def snapshot():
+		items = pages_left.pop(0) if len(pages_left) > 1 else pages_left[0]
+		return [((xpath, text), text) for xpath, text in items]
+
+	return snapshot
+
+
+async def test_repeated_rows_are_kept_and_seen_rows_are_not_counted_again():
+	first = [('//li[1]/a', 'Reply'), ('//li[2]/a', 'Reply'), ('', '$5'), ('', '$5')]
+	second = first + [('//li[3]/a', 'Reply'), ('', '$7')]
+
+	items, scrolls = await harvest(FakePage(), snapshots(first, second), 20, 200)
+
+	assert items == ['Reply', 'Reply', '$5', '$5', 'Reply', '$7']
+	# one scroll brought new items, the two after it didn't
+	assert scrolls == 3
+
+
+async def test_stops_at_stop_text():
+	page = FakePage()
+	items, scrolls = await harvest(
+		page,
+		snapshots([('//a[1]', 'post 1')], [('//a[1]', 'post 1'), ('//a[2]', 'the end')]),
+		20,
+		200,
+		stop_text='the end',
+	)
+
+	assert items == ['post 1', 'the end']
+	assert scrolls == page.scrolls == 1
+
+
+async def test_stops_at_max_items():
+	feed = [(f'//a[{i}]', f'post {i}') for i in range(10)]
+
+	items, scrolls = await harvest(FakePage(), snapshots(feed), 20, max_items=3)
+
+	assert items == ['post 0', 'post 1', 'post 2']
+	assert scrolls == 0
+
+
+async def test_stops_at_max_scrolls():
+	feeds = [[(f'//a[{i}]', f'post {i}')] for i in range(10)]
+
+	items, scrolls = await harvest(FakePage(), snapshots(*feeds), max_scrolls=2, max_items=200)
+
+	assert items == ['post 0', 'post 1', 'post 2']
+	assert scrolls == 2
+
+
+def test_harvest_key_prefers_data_id_and_link_over_text():
+	assert harvest_key('<a href="/post/1" data-id="p1">Reply</a>') == 'data-id:p1'
+	assert harvest_key('<a class="title" href="/post/1">Post  1</a>') == 'href:/post/1'
+	assert harvest_key('<a href="">Post\n 1</a>') == '<a href="">Post 1</a>'
+	assert harvest_key('  $5 \n') == '$5'
+
+
+async def test_rows_that_moved_are_not_counted_again():
+	# a virtualized feed recycles its rows, so the same posts show up at other positions
+	first = ['<a href="/post/1">Post</a>', '<a href="/post/2">Post</a>']
+	second = ['<a href="/post/2">Post</a>', '<a href="/post/3">Post</a>']
+	page = FakePage()
+
+	async def snapshot():
+		rows = first if not page.scrolls else second
+		return [(harvest_key(text), text) for text in rows]
+
+	items, _ = await harvest(page, snapshot, 20, 200)
+
+	assert items == first + second[1:]
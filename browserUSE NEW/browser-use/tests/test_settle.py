@@ -0,0 +1,121 @@
+import asyncio
+
+from browser_use.browser.settle import SettleProfiles
+
+
+class FakeRequest:
+	def __init__(self, url: str, resource_type: str = 'xhr'):
+		self.url = url
+		self.resource_type = resource_type
+
+
+class FakePage:
+	def __init__(self, url: str):
+		self.url = url
+		self.handlers = {}
+
+	def on(self, event, handler):
+		self.handlers[event] = handler
+
+	def once(self, event, handler):
+		self.handlers[event] = handler
+
+	async def wait_for_load_state(self, state, timeout=None):
+		pass
+
+
+def test_beacons_and_analytics_are_ignored():
+	settle = SettleProfiles()
+
+	assert settle.is_ignored(FakeRequest('https://a.test/collect', 'ping'), 'a.test')
+	assert settle.is_ignored(FakeRequest('https://www.google-analytics.com/g/collect'), 'a.test')
+	assert not settle.is_ignored(FakeRequest('https://a.test/api/items'), 'a.test')
+
+
+def test_budget_follows_recent_settle_times():
+	settle = SettleProfiles(max_wait=5)
+	assert settle.budget('a.test') == 5
+
+	settle.profile('a.test').samples = [0.4, 0.5, 0.6, 0.5]
+	assert settle.budget('a.test') == 0.6 * 1.5
+
+
+async def test_long_polls_end_the_wait_and_are_remembered(tmp_path):
+	settle = SettleProfiles(tmp_path / 'settle.json', quiet_window=0.05, long_poll_after=0.2)
+	page = FakePage('https://a.test/inbox')
+	settle.attach(page)
+
+	page.handlers['request'](FakeRequest('https://a.test/poll?cursor=1'))
+	waited = await settle.wait(page)
+
+	# not the full budget, the poll was dropped once it was open for long_poll_after
+	assert 0.2 <= waited < 1
+	assert settle.profile('a.test').long_poll_urls == ['a.test/poll']
+	assert settle.profile('a.test').saved_s > 0
+
+	# next time the same poll is ignored right away
+	page.handlers['request'](FakeRequest('https://a.test/poll?cursor=2'))
+	await asyncio.sleep(0.06)
+	assert await settle.wait(page) < 0.2
+
+	settle.save()
+	assert SettleProfiles(tmp_path / 'settle.json').profile('a.test').waits == 2
+	assert 'a.test' in settle.report()
+
+
+class SlowLoadPage(FakePage):
+	def __init__(self, url: str, load_after: float):
+		super().__init__(url)
+		self.load_after = load_after
+
+	async def wait_for_load_state(self, state, timeout=None):
+		if state == 'load':
+			await asyncio.sleep(self.load_after)
+
+
+async def test_savings_are_measured_against_the_fixed_wait():
+	settle = SettleProfiles(quiet_window=0.05, fixed_wait=0.5)
+
+	# loads at once, the fixed wait would still have slept its 0.5s
+	fast = FakePage('https://fast.test/')
+	settle.attach(fast)
+	waited = await settle.wait(fast)
+	assert abs(settle.profile('fast.test').saved_s - (0.5 - waited)) < 0.05
+
+	# the load event comes late, the fixed wait would have waited for it
+	slow = SlowLoadPage('https://slow.test/', load_after=0.3)
+	settle.attach(slow)
+	waited = await settle.wait(slow)
+	assert abs(settle.profile('slow.test').saved_s - (0.5 - waited)) < 0.05
+
+	# a request keeps us waiting longer than the fixed wait would have
+	busy = FakePage('https://busy.test/')
+	settle.attach(busy)
+	busy.handlers['request'](FakeRequest('https://busy.test/api/items'))
+	asyncio.get_running_loop().call_later(
+		0.8, busy.handlers['requestfinished'], FakeRequest('https://busy.test/api/items')
+	)
+	await settle.wait(busy)
+	assert settle.profile('busy.test').saved_s < 0
+
+
+async def test_saves_merge_with_other_runs(tmp_path):
+	path = tmp_path / 'settle.json'
+	first = SettleProfiles(path)
+	second = SettleProfiles(path)
+
+	first._record('a.test', 0.4, False, {'a.test/poll'}, 0.5)
+	first.save()
+	second._record('a.test', 0.6, True, set(), 0.5)
+	second._record('b.test', 1.0, False, set(), 0.5)
+	second.save()
+	# saving again doesn't count the same waits twice
+	second.save()
+
+	merged = SettleProfiles(path).profiles
+	assert merged['a.test'].waits == 2
+	assert merged['a.test'].timeouts == 1
+	assert merged['a.test'].samples == [0.4, 0.6]
+	assert merged['a.test'].long_poll_urls == ['a.test/poll']
+	assert merged['b.test'].waits == 1
+	assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,83 @@
+from browser_use.browser.speculation import (
+	CANDIDATES_SCRIPT,
+	Speculator,
+	is_safe_to_prefetch,
+	normalize_url,
+)
+
+
+def test_normalize_url():
+	assert normalize_url('https://example.com/a/#top') == 'https://example.com/a'
+	assert normalize_url('https://example.com/') == 'https://example.com'
+
+
+def test_hit_rate():
+	speculator = Speculator(top_k=2)
+	speculator.record_navigation('https://example.com')
+	speculator._predicted = {'https://example.com/docs', 'https://example.com/blog'}
+
+	# same page, no navigation
+	speculator.record_navigation('https://example.com/#section')
+	assert speculator.stats.navigations == 0
+
+	speculator.record_navigation('https://example.com/docs/')
+	speculator._predicted = {'https://example.com/pricing'}
+	speculator.record_navigation('https://other.com')
+
+	assert speculator.stats.navigations == 2
+	assert speculator.stats.hits == 1
+	assert speculator.stats.hit_rate == 0.5
+
+
+class FakePage:
+	def __init__(self, url: str, candidates: list[dict]):
+		self.url = url
+		self.candidates = candidates
+		self.prefetched: list[str] = []
+
+	async def evaluate(self, script, arg):
+		if script == CANDIDATES_SCRIPT:
+			return self.candidates
+		self.prefetched = arg
+
+
+def link(url: str, text: str = '', rel: str = '', download: bool = False) -> dict:
+	return {'url': url, 'score': 1, 'text': text, 'rel': rel, 'download': download}
+
+
+async def test_logout_link_is_never_prefetched():
+	speculator = Speculator(top_k=3, origins=['https://shop.test'])
+	page = FakePage(
+		'https://shop.test/account',
+		[
+			# ranked first: large and on screen
+			link('https://shop.test/logout', 'Log out'),
+			link('https://shop.test/session/end', 'Sign out'),
+			link('https://shop.test/cart?action=add&id=1', 'Add to cart'),
+			link('https://shop.test/list/1/delete'),
+			link('https://shop.test/report.pdf', download=True),
+			link('https://shop.test/ugc', rel='nofollow ugc'),
+			link('https://other.test/orders', 'Orders elsewhere'),
+			link('https://shop.test/orders', 'Orders'),
+		],
+	)
+
+	urls = await speculator.speculate(page, {1: '//a'})
+
+	assert urls == ['https://shop.test/orders']
+	assert page.prefetched == ['https://shop.test/orders']
+
+
+async def test_speculation_is_opt_in_per_origin():
+	speculator = Speculator(top_k=3, origins=['https://shop.test'])
+	page = FakePage('https://bank.test/', [link('https://bank.test/statements')])
+
+	assert await speculator.speculate(page, {1: '//a'}) == []
+	assert page.prefetched == []
+
+
+def test_is_safe_to_prefetch():
+	page_url = 'https://shop.test/'
+	assert is_safe_to_prefetch(link('https://shop.test/docs', 'Docs'), page_url)
+	assert not is_safe_to_prefetch(link('https://shop.test/x', 'Unsubscribe'), page_url)
+	assert not is_safe_to_prefetch(link('http://shop.test/docs'), page_url)
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from browser_use.browser import storage_state as storage_state_module
+from browser_use.browser.storage_state import (
+	StorageStateCache,
+	merge_states,
+	site_for_host,
+	split_by_site,
+)
+
+
+@pytest.fixture
+def storage_state():
+	return {
+		'cookies': [
+			{'name': 'session', 'value': 'a', 'domain': '.upwork.com', 'expires': -1},
+			{
+				'name': 'lang',
+				'value': 'en',
+				'domain': 'www.upwork.com',
+				'expires': time.time() + 60,
+			},
+			{'name': 'old', 'value': 'x', 'domain': 'bbc.co.uk', 'expires': time.time() - 60},
+		],
+		'origins': [
+			{
+				'origin': 'https://www.upwork.com',
+				'localStorage': [{'name': 'token', 'value': 'secret'}],
+			}
+		],
+	}
+
+
+needs_public_suffix_list = pytest.mark.skipif(
+	storage_state_module._extract is None, reason='tldextract is not installed'
+)
+
+
+@needs_public_suffix_list
+def test_site_for_host():
+	assert site_for_host('.upwork.com') == 'upwork.com'
+	assert site_for_host('www.upwork.com') == 'upwork.com'
+	assert site_for_host('news.bbc.co.uk') == 'bbc.co.uk'
+	assert site_for_host('a.co.uk') == 'a.co.uk'
+	assert site_for_host('www.bbc.de') == 'bbc.de'
+	assert site_for_host('localhost') == 'localhost'
+	assert site_for_host('127.0.0.1') == '127.0.0.1'
+
+
+def test_site_for_host_without_public_suffix_list(monkeypatch):
+	monkeypatch.setattr(storage_state_module, '_extract', None)
+
+	assert site_for_host('.upwork.com') == 'upwork.com'
+	assert site_for_host('news.bbc.co.uk') == 'news.bbc.co.uk'
+
+
+@needs_public_suffix_list
+def test_split_by_site(storage_state):
+	sites = split_by_site(storage_state)
+
+	assert set(sites) == {'upwork.com', 'bbc.co.uk'}
+	assert len(sites['upwork.com']['cookies']) == 2
+	assert len(sites['upwork.com']['origins']) == 1
+	assert sites['bbc.co.uk']['origins'] == []
+
+
+def test_merge_drops_expired_cookies(storage_state):
+	merged = merge_states(split_by_site(storage_state).values())
+
+	assert {c['name'] for c in merged['cookies']} == {'session', 'lang'}
+	assert len(merged['origins']) == 1
+
+
+@needs_public_suffix_list
+def test_cache_roundtrip(tmp_path, storage_state):
+	cache = StorageStateCache('work', str(tmp_path))
+
+	assert cache.load() is None
+	assert sorted(cache.save(storage_state)) == ['bbc.co.uk', 'upwork.com']
+	assert cache.sites() == ['bbc.co.uk', 'upwork.com']
+
+	only_upwork = cache.load(sites=['upwork.com'])
+	assert only_upwork is not None
+	assert len(only_upwork['cookies']) == 2
+
+	cache.clear('upwork.com')
+	assert cache.sites() == ['bbc.co.uk']
+
+
+def test_invalid_profile_name(tmp_path):
+	with pytest.raises(ValueError):
+		StorageStateCache('../escape', str(tmp_path))
+
+
+def test_saved_sessions_are_private(tmp_path, storage_state):
+	cache = StorageStateCache('work', str(tmp_path))
+
+	for site in cache.save(storage_state):
+		assert cache.path_for(site).stat().st_mode & 0o777 == 0o600
+	assert not list(cache.profile_dir.glob('*.tmp'))
@@ -0,0 +1,79 @@
+import pytest
+
+from browser_use.agent.pricing import PRICING, pricing_for, register_pricing
+from browser_use.agent.views import (
+	ActionResult,
+	AgentHistory,
+	AgentHistoryList,
+	Pricing,
+	TokenUsage,
+)
+from browser_use.browser.views import BrowserState
+
+
+def usage(input_tokens: int, output_tokens: int, cache_read: int = 0) -> TokenUsage:
+	return TokenUsage.from_usage_metadata(
+		{
+			'input_tokens': input_tokens,
+			'output_tokens': output_tokens,
+			'total_tokens': input_tokens + output_tokens,
+			'input_token_details': {'cache_read': cache_read},
+		}
+	)
+
+
+def history_item(step_usage: TokenUsage, cost: float, duration_s: float) -> AgentHistory:
+	state = BrowserState(items=[], selector_map={}, url='https://a.test', title='', tabs=[])
+	return AgentHistory(
+		model_output=None,
+		result=ActionResult(),
+		state=state,
+		usage=step_usage,
+		cost=cost,
+		llm_latency_s=duration_s / 2,
+		duration_s=duration_s,
+	)
+
+
+def test_cached_tokens_are_priced_separately():
+	pricing = Pricing(uncached_input=3.0, cached_input=0.3, output=15.0)
+
+	cost = pricing.cost(usage(1_000_000, 100_000, cache_read=800_000))
+
+	assert cost == pytest.approx(200_000 * 3.0 / 1e6 + 800_000 * 0.3 / 1e6 + 1.5)
+
+
+def test_dated_models_get_the_price_of_their_family():
+	assert pricing_for('gpt-4o-mini-2024-07-18') is PRICING['gpt-4o-mini']
+	assert pricing_for('gpt-4o-2024-08-06') is PRICING['gpt-4o']
+	assert pricing_for('claude-3-5-sonnet-20241022') is PRICING['claude-3-5-sonnet']
+	assert pricing_for('some-local-model') is None
+	assert pricing_for(None) is None
+
+
+def test_registered_pricing_is_used():
+	pricing = Pricing(uncached_input=1.0, output=2.0)
+	register_pricing('my-finetune', pricing)
+	try:
+		assert pricing_for('my-finetune-v2') is pricing
+	finally:
+		del PRICING['my-finetune']
+
+
+def test_run_totals():
+	history = AgentHistoryList(
+		history=[
+			history_item(usage(1000, 100, cache_read=500), 0.01, 2.0),
+			history_item(usage(2000, 200, cache_read=1500), 0.02, 4.0),
+		]
+	)
+
+	summary = history.usage_summary()
+
+	assert summary['input_tokens'] == 3000
+	assert summary['cache_read_tokens'] == 2000
+	assert summary['total_tokens'] == 3300
+	assert summary['cost_usd'] == pytest.approx(0.03)
+	assert summary['duration_s'] == 6.0
+	assert summary['llm_latency_s'] == 3.0
+	assert history.cache_read_tokens() == [500, 1500]